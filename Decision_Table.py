@@ -0,0 +1,97 @@
+"""
+Tabel keputusan (decision table) hasil distilasi model ML.
+
+Setiap fitur dibagi menjadi beberapa bin (batas kuantil data training), dan
+setiap sel grid menyimpan peluang kelas dari model guru (teacher): rata-rata
+peluang guru untuk baris training di sel tersebut, atau peluang guru di titik
+tengah sel jika sel kosong. Prediksi cukup searchsorted per fitur + satu lookup.
+
+Antarmuka mengikuti estimator sklearn (classes_, feature_names_in_,
+predict_proba, predict), sehingga file .pkl-nya bisa langsung dipakai
+WaterQualityModel.
+"""
+
+import numpy as np
+
+
+class DecisionTable:
+    """Lookup peluang kelas pada grid bin per fitur; lihat DecisionTable.distill"""
+
+    def __init__(self, edges, table, classes, feature_names):
+        self.edges = [np.asarray(e, dtype=np.float64) for e in edges]
+        self.table = np.asarray(table, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(self.edges)
+        self.n_classes_ = len(self.classes_)
+        # Langkah indeks datar per fitur (grid disimpan row-major)
+        sizes = [len(e) + 1 for e in self.edges]
+        self._strides = np.array([int(np.prod(sizes[i + 1:])) for i in range(len(sizes))], dtype=np.int64)
+
+    @property
+    def n_cells(self):
+        return len(self.table)
+
+    def cell_index(self, X):
+        """Indeks sel datar untuk X (n_baris, n_fitur)"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X harus berbentuk (n, {self.n_features_in_})")
+        if not np.isfinite(X).all():
+            raise ValueError("Input mengandung NaN/inf")
+        index = np.zeros(len(X), dtype=np.int64)
+        for j, edges in enumerate(self.edges):
+            index += np.searchsorted(edges, X[:, j], side='right') * self._strides[j]
+        return index
+
+    def predict_proba(self, X):
+        return self.table[self.cell_index(X)]
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @classmethod
+    def distill(cls, teacher, X, n_bins=16):
+        """
+        Bangun tabel dari model guru (estimator dengan predict_proba) dan data X
+        (DataFrame dengan kolom sesuai teacher.feature_names_in_ atau array).
+        """
+        feature_names = list(getattr(teacher, 'feature_names_in_', getattr(X, 'columns', range(X.shape[1]))))
+        values = np.asarray(X, dtype=np.float64)
+
+        # Batas interior dari kuantil; duplikat dibuang untuk fitur dengan sedikit nilai unik
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        edges = [np.unique(np.quantile(values[:, j], quantiles)) for j in range(values.shape[1])]
+        table = cls(edges, np.zeros((0, 0)), teacher.classes_, feature_names)
+
+        n_cells = int(np.prod([len(e) + 1 for e in edges]))
+        sums = np.zeros((n_cells, len(teacher.classes_)))
+        counts = np.zeros(n_cells)
+        cells = table.cell_index(values)
+        np.add.at(sums, cells, teacher.predict_proba(_as_frame(values, teacher, feature_names)))
+        np.add.at(counts, cells, 1)
+
+        # Sel kosong: peluang guru di titik tengah sel (bin terluar memakai min/max data)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centers = []
+            for j, e in enumerate(edges):
+                bounds = np.concatenate([[values[:, j].min()], e, [values[:, j].max()]])
+                centers.append((bounds[:-1] + bounds[1:]) / 2)
+            grid = np.stack(np.unravel_index(empty, [len(e) + 1 for e in edges]), axis=1)
+            points = np.column_stack([centers[j][grid[:, j]] for j in range(len(edges))])
+            sums[empty] = teacher.predict_proba(_as_frame(points, teacher, feature_names))
+            counts[empty] = 1
+
+        return cls(edges, sums / counts[:, None], teacher.classes_, feature_names)
+
+    def __repr__(self):
+        return f"DecisionTable(bins={[len(e) + 1 for e in self.edges]}, cells={self.n_cells})"
+
+
+def _as_frame(values, teacher, feature_names):
+    """Array -> DataFrame jika guru dilatih dengan nama fitur (menghindari peringatan sklearn)"""
+    if not hasattr(teacher, 'feature_names_in_'):
+        return values
+    import pandas as pd
+    return pd.DataFrame(values, columns=feature_names)
@@ -0,0 +1,248 @@
+"""
+Worker evaluasi headless, terpisah dari sesi Streamlit.
+
+Sebelumnya seluruh pipeline (ambil data, ML, sistem pakar, upload status)
+berjalan di main() app.py: ESP32 hanya mendapat status selama ada tab
+browser terbuka, dan N tab mengerjakan hal yang sama N kali serta menulis
+N update status.
+
+EvaluationWorker berjalan sebagai satu proses (run_worker.py):
+
+- ingest: pembacaan baru dari SensorStream (ring buffer, lihat
+  Sensor_Stream.py); selama stream belum live, fallback get() tiap
+  poll_interval detik
+- setiap pembacaan dievaluasi tepat sekali (evaluate_readings: ML +
+  sistem pakar, satu batch untuk semua pembacaan yang menumpuk); pembacaan
+  yang sama (nilai + timestamp) tidak dievaluasi ulang
+- status pembacaan terbaru ditulis sekali ke node sensor di Firebase
+- label sistem pakar diteruskan ke OnlineLearner (opsional)
+- hasil + heartbeat ditulis ke ResultStore (file JSON lokal, diganti secara
+  atomik); app.py membacanya sebagai viewer read-only
+- label operator dari viewer masuk lewat LabelInbox (file JSON lines di
+  samping store, hanya di-append oleh viewer); worker membacanya dari offset
+  terakhir (disimpan di store) dan meneruskannya ke OnlineLearner.record,
+  sehingga hanya worker yang menulis buffer pembelajaran online
+"""
+
+import collections
+import json
+import os
+import threading
+import time
+
+import Sistem_Pakar as sp
+from Inference_Service import evaluate_readings
+from Machine_Learning import BASE_DIR
+from Machine_Learning import logger as ml_logger
+from Sensor_Stream import READING_FIELDS, TIMESTAMP_FIELD, parse_reading
+
+
+logger = ml_logger.getChild('worker')
+
+STORE_FILE = os.path.join(BASE_DIR, "evaluation_store.json")
+STORE_HISTORY = 200        # pembacaan terakhir di store (grafik viewer)
+HEARTBEAT_INTERVAL = 5.0   # detik; store ditulis ulang walau tidak ada pembacaan baru
+WORKER_STALE_AFTER = 30.0  # viewer menganggap worker mati jika heartbeat lebih tua
+POLL_INTERVAL = 3.0        # fallback get() selama stream belum live
+
+# Field ringkas per pembacaan di riwayat store
+HISTORY_FIELDS = READING_FIELDS + (TIMESTAMP_FIELD, 'received_at', 'status', 'confidence')
+
+
+# =============================
+# STORE
+# =============================
+
+class LabelInbox:
+    """Label operator dari viewer ke worker: satu baris JSON per label, append-only"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def put(self, ph, tds, ntu, label):
+        line = json.dumps({'ph': float(ph), 'tds': float(tds), 'ntu': float(ntu), 'label': int(label),
+                           'at': time.time()})
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+    def read_from(self, offset):
+        """(label baru, offset berikutnya); baris yang belum lengkap ditunda"""
+        try:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < offset:
+                    offset = 0  # file dibuat ulang
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+        complete = data[:data.rfind(b"\n") + 1]
+        labels = [json.loads(line) for line in complete.decode('utf-8').splitlines() if line.strip()]
+        return labels, offset + len(complete)
+
+
+class ResultStore:
+    """Hasil worker untuk viewer: satu file JSON yang selalu diganti utuh"""
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.inbox = LabelInbox(f"{os.path.splitext(path)[0]}_labels.jsonl")
+
+    def write(self, snapshot):
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, self.path)
+
+    def read(self):
+        """Snapshot terakhir; None jika worker belum pernah menulis"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+def heartbeat_age(snapshot, now=None):
+    """Detik sejak heartbeat worker terakhir di snapshot"""
+    return (now if now is not None else time.time()) - snapshot['worker']['heartbeat_at']
+
+
+# =============================
+# WORKER
+# =============================
+
+class EvaluationWorker:
+    """Ingest -> evaluasi sekali -> upload status -> store, dalam satu loop"""
+
+    def __init__(self, connection, path, model, store, learner=None,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, poll_interval=POLL_INTERVAL):
+        self.connection = connection
+        self.path = path
+        self.model = model
+        self.store = store
+        self.learner = learner
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.stream = connection.stream(path)
+        self.history = collections.deque(maxlen=STORE_HISTORY)
+        self.latest = None
+        self.evaluations = 0
+        self.uploads = 0
+        self.upload_error = None
+        self.started_at = time.time()
+        self._seq = 0
+        self._last_key = None
+        self._last_poll = None
+        self._last_write = None
+        self._stop = threading.Event()
+        previous = store.read()
+        self._label_offset = previous['worker'].get('label_offset', 0) if previous else 0
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        logger.info("Evaluation worker started for %s", self.path,
+                    extra={'fields': {'event': 'worker_start', 'path': self.path, 'store': self.store.path}})
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except Exception:
+                logger.exception("Evaluation worker step failed")
+                self._stop.wait(self.poll_interval)
+        self.write_store()
+
+    def step(self, timeout=None):
+        """Satu iterasi: tunggu pembacaan baru (maks timeout detik), evaluasi, tulis store"""
+        timeout = self.heartbeat_interval if timeout is None else timeout
+        readings = self._ingest(timeout)
+        if readings:
+            self.evaluate(readings)
+        labels = self.drain_labels()
+        if readings or labels or self._last_write is None or \
+                time.monotonic() - self._last_write >= self.heartbeat_interval:
+            self.write_store()
+        return len(readings)
+
+    def drain_labels(self):
+        """Teruskan label operator baru dari inbox ke learner; jumlah label"""
+        labels, self._label_offset = self.store.inbox.read_from(self._label_offset)
+        if self.learner is not None:
+            for item in labels:
+                self.learner.record(item['ph'], item['tds'], item['ntu'], item['label'], source='operator')
+        return len(labels)
+
+    def _ingest(self, timeout):
+        if self.stream.is_live:
+            self.stream.buffer.wait(self._seq, timeout)
+            readings = self.stream.buffer.since(self._seq)
+            self._seq = self.stream.buffer.seq
+        else:
+            if self._last_poll is not None:
+                self._stop.wait(max(0.0, self._last_poll + self.poll_interval - time.monotonic()))
+            self._last_poll = time.monotonic()
+            reading = parse_reading(self.connection.get(self.path))
+            readings = [dict(reading, received_at=time.time())] if reading is not None else []
+
+        fresh = []
+        for reading in readings:
+            key = tuple(reading[field] for field in READING_FIELDS + (TIMESTAMP_FIELD,))
+            if key != self._last_key:
+                self._last_key = key
+                fresh.append(reading)
+        return fresh
+
+    def evaluate(self, readings):
+        """Evaluasi batch, upload status pembacaan terbaru, teruskan label ke learner"""
+        sp.reload_rule_base_if_changed()
+        results = evaluate_readings(self.model, *([r[field] for r in readings] for field in READING_FIELDS))
+        evaluated_at = time.time()
+        entries = []
+        for reading, result in zip(readings, results):
+            entry = {field: reading[field] for field in READING_FIELDS + (TIMESTAMP_FIELD,)}
+            entry.update(result, received_at=reading.get('received_at', evaluated_at), evaluated_at=evaluated_at)
+            entries.append(entry)
+            if self.learner is not None and entry['has_active_rules']:
+                self.learner.record(entry['ph'], entry['tds'], entry['ntu'], entry['status'], source='expert')
+
+        self.latest = entries[-1]
+        self.history.extend({field: entry[field] for field in HISTORY_FIELDS} for entry in entries)
+        self.evaluations += len(entries)
+        self.upload_status(self.latest['status'])
+
+    def upload_status(self, status):
+        try:
+            self.connection.update(self.path, {'status': status})
+            self.uploads += 1
+            self.upload_error = None
+        except Exception as e:
+            self.upload_error = f"{type(e).__name__}: {e}"
+            logger.warning("Status upload to %s failed: %s", self.path, self.upload_error,
+                           extra={'fields': {'event': 'worker_upload_failed', 'path': self.path,
+                                             'error': self.upload_error}})
+
+    def snapshot(self):
+        learning = self.learner.status() if self.learner is not None else None
+        return {
+            'worker': {
+                'pid': os.getpid(),
+                'started_at': self.started_at,
+                'heartbeat_at': time.time(),
+                'db_url': self.connection.db_url,
+                'path': self.path,
+                'stream': self.stream.status(),
+                'model_version': getattr(self.model, 'version', None),
+                'evaluations': self.evaluations,
+                'uploads': self.uploads,
+                'upload_error': self.upload_error,
+                'label_offset': self._label_offset,
+                'online_learning': learning,
+            },
+            'latest': self.latest,
+            'history': list(self.history),
+        }
+
+    def write_store(self):
+        self.store.write(self.snapshot())
+        self._last_write = time.monotonic()
@@ -0,0 +1,203 @@
+"""
+Manajer koneksi Firebase Realtime Database untuk seluruh proses dashboard.
+
+Sebelumnya setiap rerun st_autorefresh (tiap 3 detik per sesi) mem-parse
+ulang JSON service account, menghapus app firebase_admin dan membuat app
+baru, sehingga sesi TLS dan token OAuth selalu dibuang.
+
+ConnectionManager menyimpan satu FirebaseConnection (app firebase_admin
+bernama + HTTP session + token miliknya) per kunci (sidik jari credential,
+URL database):
+
+- acquire(session_id, key_bytes, db_url): sidik jari = SHA-256 isi file JSON
+  (JSON hanya di-parse saat koneksi pertama kali dibuat); sesi lain dengan
+  credential dan URL yang sama memakai koneksi yang sama (refcount = jumlah sesi)
+- release(session_id) atau sesi yang tidak aktif > idle_timeout detik
+  melepas referensi; app dihapus saat refcount menjadi 0
+- FirebaseConnection.get/update membuat app ulang (reconnect) hanya jika
+  permintaan gagal karena koneksi/autentikasi, lalu mencoba sekali lagi
+- FirebaseConnection.stream(path): satu SensorStream (REST streaming +
+  ring buffer, lihat Sensor_Stream.py) per path, dipakai bersama semua sesi
+  dan dihentikan saat koneksi ditutup
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import firebase_admin
+from firebase_admin import credentials, db, exceptions
+
+from Sensor_Stream import SensorStream
+
+
+logger = logging.getLogger(__name__)
+
+DATABASE_AUTH_OVERRIDE = {'uid': 'streamlit-app'}
+HTTP_TIMEOUT = 10  # detik per permintaan HTTP (default firebase_admin jauh lebih lama)
+SESSION_IDLE_TIMEOUT = 60.0  # sesi Streamlit yang berhenti rerun dianggap selesai
+
+# Error yang ditangani dengan membuat app (HTTP session + token) baru
+RECONNECT_ERRORS = (
+    exceptions.UnavailableError,
+    exceptions.UnauthenticatedError,
+    exceptions.DeadlineExceededError,
+    exceptions.UnknownError,
+)
+
+
+def credential_fingerprint(key_bytes):
+    """Sidik jari credential dari isi file service account (tanpa parse JSON)"""
+    return hashlib.sha256(key_bytes).hexdigest()[:16]
+
+
+# =============================
+# KONEKSI
+# =============================
+
+class FirebaseConnection:
+    """Satu app firebase_admin bernama untuk (credential, URL database)"""
+
+    def __init__(self, key_bytes, db_url):
+        self.fingerprint = credential_fingerprint(key_bytes)
+        self.db_url = db_url
+        self.name = f"wq-{self.fingerprint}-{hashlib.sha256(db_url.encode()).hexdigest()[:8]}"
+        self.sessions = {}  # session_id -> waktu acquire terakhir (dikelola ConnectionManager)
+        self.connects = 0
+        self.app = None
+        self.streams = {}  # path -> SensorStream
+        self._credential = json.loads(key_bytes)
+        self._lock = threading.Lock()
+        self.connect()
+
+    @property
+    def refcount(self):
+        return len(self.sessions)
+
+    def connect(self, failed_app=None):
+        """
+        Buat app baru (koneksi pertama atau reconnect). failed_app: app yang
+        gagal; jika app sudah diganti thread lain, tidak dibuat ulang lagi.
+        """
+        with self._lock:
+            if failed_app is not None and self.app is not failed_app:
+                return self.app
+            self._delete_app()
+            self.app = firebase_admin.initialize_app(
+                credentials.Certificate(self._credential),
+                {
+                    'databaseURL': self.db_url,
+                    'databaseAuthVariableOverride': DATABASE_AUTH_OVERRIDE,
+                    'httpTimeout': HTTP_TIMEOUT,
+                },
+                name=self.name,
+            )
+            self.connects += 1
+            logger.info("Firebase app %s connected (%d)", self.name, self.connects,
+                        extra={'fields': {'event': 'firebase_connect', 'app': self.name, 'connects': self.connects}})
+            return self.app
+
+    def _delete_app(self):
+        # Termasuk app bernama sama dari instance lama (mis. modul dimuat ulang Streamlit)
+        try:
+            firebase_admin.delete_app(self.app or firebase_admin.get_app(self.name))
+        except ValueError:
+            pass
+        self.app = None
+
+    def close(self):
+        with self._lock:
+            streams, self.streams = list(self.streams.values()), {}
+            self._delete_app()
+        for stream in streams:
+            stream.stop()
+        logger.info("Firebase app %s closed", self.name)
+
+    def _call(self, request):
+        app = self.app
+        try:
+            return request(app)
+        except RECONNECT_ERRORS as e:
+            logger.warning("Firebase request failed on %s, reconnecting: %s: %s", self.name, type(e).__name__, e)
+            return request(self.connect(failed_app=app))
+
+    def get(self, path):
+        return self._call(lambda app: db.reference(path, app=app).get())
+
+    def update(self, path, values):
+        return self._call(lambda app: db.reference(path, app=app).update(values))
+
+    def stream(self, path):
+        """Listener push untuk node path (dibuat saat pertama kali diminta)"""
+        with self._lock:
+            stream = self.streams.get(path)
+            if stream is None:
+                stream = self.streams[path] = SensorStream(
+                    self.db_url, path, token_provider=self._access_token, auth_override=DATABASE_AUTH_OVERRIDE,
+                )
+            return stream
+
+    def _access_token(self):
+        # Token OAuth milik credential app (di-refresh google-auth saat kedaluwarsa)
+        return self.app.credential.get_access_token().access_token
+
+
+# =============================
+# MANAJER
+# =============================
+
+class ConnectionManager:
+    """Koneksi bersama antar sesi dengan refcount per sesi"""
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._connections = {}   # (fingerprint, db_url) -> FirebaseConnection
+        self._session_keys = {}  # session_id -> (fingerprint, db_url)
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id, key_bytes, db_url):
+        """
+        Koneksi untuk sesi ini; dibuat hanya jika belum ada koneksi dengan
+        credential dan URL yang sama. Error credential diteruskan ke pemanggil.
+        """
+        key = (credential_fingerprint(key_bytes), db_url)
+        now = time.monotonic()
+        with self._lock:
+            if self._session_keys.get(session_id, key) != key:
+                self._release(session_id)
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = self._connections[key] = FirebaseConnection(key_bytes, db_url)
+            connection.sessions[session_id] = now
+            self._session_keys[session_id] = key
+            self._prune(now)
+            return connection
+
+    def release(self, session_id):
+        with self._lock:
+            self._release(session_id)
+
+    def _release(self, session_id):
+        key = self._session_keys.pop(session_id, None)
+        connection = self._connections.get(key)
+        if connection is None:
+            return
+        connection.sessions.pop(session_id, None)
+        if not connection.sessions:
+            del self._connections[key]
+            connection.close()
+
+    def _prune(self, now):
+        for session_id, key in list(self._session_keys.items()):
+            if now - self._connections[key].sessions[session_id] > self.idle_timeout:
+                self._release(session_id)
+
+    def stats(self):
+        with self._lock:
+            return [
+                {'app': c.name, 'db_url': c.db_url, 'sessions': c.refcount, 'connects': c.connects,
+                 'streams': [stream.status() for stream in c.streams.values()]}
+                for c in self._connections.values()
+            ]
@@ -0,0 +1,244 @@
+"""
+Generator header C dari CompiledForest untuk inferensi di perangkat (ESP32).
+
+Header yang dihasilkan berdiri sendiri (hanya <stdint.h> dan <math.h>),
+tanpa alokasi memori: semua tabel berupa array static const (di ESP32
+tersimpan di flash), dan prediksi hanya memakai variabel lokal berukuran
+tetap. Layout node:
+
+- feature   : indeks fitur yang diuji; -1 untuk daun
+- left      : node internal -> indeks global anak kiri (anak kanan = left + 1);
+              daun -> indeks baris di tabel leaf_value
+- threshold : x <= threshold -> kiri. Mode float: ambang float64 dibulatkan ke
+              bawah ke float32, sehingga untuk input float32 keputusan sama
+              persis dengan sklearn. Mode fixed-point: int32 per fitur dengan
+              FRAC_BITS bit pecahan (input disaturasi, urutan tetap terjaga)
+- leaf_value: peluang kelas per daun (float, atau Q16 uint16 di mode fixed-point)
+
+API (awalan sesuai --prefix, default wq_forest):
+
+    int wq_forest_predict(const float x[N_FEATURES], float proba[N_CLASSES]);
+
+Mengembalikan indeks kelas (lihat <prefix>_classes); proba boleh NULL.
+Input harus finite. Mode fixed-point juga menyediakan <prefix>_quantize dan
+<prefix>_predict_fixed untuk pipeline integer penuh.
+"""
+
+import math
+import re
+
+import numpy as np
+
+
+PROBA_ONE = 65535  # Q16: peluang 1.0 di mode fixed-point
+VALUES_PER_LINE = 10
+
+
+def c_identifier(name):
+    return re.sub(r'\W', '_', str(name)).strip('_') or 'x'
+
+
+def index_type(max_value):
+    return 'uint16_t' if max_value <= 0xFFFF else 'uint32_t'
+
+
+def float32_floor(values):
+    """float32 terbesar yang <= nilai float64 (untuk input float32: x <= t32 <=> x <= t64)"""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def fixed_point_bits(thresholds):
+    """Bit pecahan terbesar sehingga semua ambang (|t| + 1) muat di int32 dengan cadangan 1 bit"""
+    max_abs = float(np.max(np.abs(thresholds))) if len(thresholds) else 0.0
+    integer_bits = math.ceil(math.log2(max_abs + 1.0)) + 1
+    return max(0, min(30, 31 - integer_bits))
+
+
+def _format_array(ctype, name, values, fmt):
+    values = [fmt(v) for v in np.ravel(values)]
+    lines = [
+        "    " + ", ".join(values[i:i + VALUES_PER_LINE]) + ","
+        for i in range(0, len(values), VALUES_PER_LINE)
+    ]
+    return f"static const {ctype} {name}[{len(values)}] = {{\n" + "\n".join(lines) + "\n};\n"
+
+
+def _float_literal(value):
+    text = f"{float(value):.9g}"
+    if not any(c in text for c in '.en'):
+        text += '.0'
+    return text + 'f'
+
+
+def flatten_nodes(forest):
+    """
+    (feature int8, left, threshold float64, leaf_value) dari CompiledForest;
+    daun dikenali dari anak yang menunjuk dirinya sendiri.
+    """
+    nodes = np.arange(forest.n_nodes)
+    is_leaf = np.asarray(forest.children) == nodes
+    leaf_id = np.cumsum(is_leaf) - 1
+
+    feature = np.where(is_leaf, -1, forest.feature).astype(np.int8)
+    left = np.where(is_leaf, leaf_id, forest.children).astype(np.int64)
+    threshold = np.where(is_leaf, 0.0, forest.threshold)
+    leaf_value = np.asarray(forest.value)[is_leaf]
+    return feature, left, threshold, leaf_value
+
+
+def table_bytes(forest, fixed_point=False):
+    """Ukuran tabel const di flash (byte): akar, node (fitur + indeks + ambang 4 byte), daun"""
+    _, _, _, leaf_value = flatten_nodes(forest)
+    index_size = 2 if index_type(max(forest.n_nodes, len(leaf_value))) == 'uint16_t' else 4
+    leaf_size = 2 if fixed_point else 4
+    return forest.n_trees * index_size + forest.n_nodes * (1 + index_size + 4) + leaf_value.size * leaf_size
+
+
+def generate_c_header(forest, prefix='wq_forest', fixed_point=False, source=None):
+    """Teks header C untuk CompiledForest (lihat docstring modul)"""
+    if len(forest.feature_names) > 127:
+        raise ValueError("Maksimum 127 fitur (indeks fitur int8)")
+    prefix = c_identifier(prefix).lower()
+    macro = prefix.upper()
+    n_features = len(forest.feature_names)
+    n_classes = forest.value.shape[1]
+
+    feature, left, threshold, leaf_value = flatten_nodes(forest)
+    node_type = index_type(max(forest.n_nodes, len(leaf_value)))
+
+    out = [
+        "/*",
+        f" * {prefix}.h - dihasilkan oleh export_forest_c.py" + (f" dari {source}" if source else "") + "; jangan diedit manual.",
+        f" * Random forest: {forest.n_trees} pohon, {forest.n_nodes} node, {len(leaf_value)} daun, "
+        f"kedalaman maks {forest.max_depth}.",
+        f" * Urutan input: {', '.join(map(str, forest.feature_names))}. Input harus finite.",
+        f" * Mode: {'fixed-point (ambang int32, peluang Q16)' if fixed_point else 'float32'}. "
+        "Tanpa alokasi memori; semua tabel const.",
+        " */",
+        f"#ifndef {macro}_H",
+        f"#define {macro}_H",
+        "",
+        "#include <stdint.h>",
+        "#include <math.h>" if fixed_point else None,
+        "",
+        f"#define {macro}_N_FEATURES {n_features}",
+        f"#define {macro}_N_CLASSES {n_classes}",
+        f"#define {macro}_N_TREES {forest.n_trees}",
+        f"#define {macro}_N_NODES {forest.n_nodes}",
+    ]
+    out += [
+        f"#define {macro}_FEATURE_{c_identifier(name).upper()} {index}"
+        for index, name in enumerate(forest.feature_names)
+    ]
+    out += ["", _format_array('int32_t', f"{prefix}_classes", forest.classes_.astype(np.int64), str)]
+    out.append(_format_array(node_type, f"{prefix}_roots", forest.roots, str))
+    out.append(_format_array('int8_t', f"{prefix}_feature", feature, str))
+    out.append(_format_array(node_type, f"{prefix}_left", left, str))
+
+    if fixed_point:
+        internal = feature >= 0
+        bits = [fixed_point_bits(threshold[internal & (feature == i)]) for i in range(n_features)]
+        scaled = np.floor(threshold * np.exp2(np.take(bits, np.maximum(feature, 0))))
+        scaled = np.where(internal, scaled, 0).astype(np.int64)
+        out += [
+            f"#define {macro}_PROBA_ONE {PROBA_ONE}u",
+            _format_array('uint8_t', f"{prefix}_frac_bits", bits, str),
+            _format_array('int32_t', f"{prefix}_threshold", scaled, str),
+            _format_array('uint16_t', f"{prefix}_leaf_value", np.rint(leaf_value * PROBA_ONE).astype(np.int64), str),
+        ]
+        out.append(_FIXED_TEMPLATE.format(p=prefix, P=macro, node_type=node_type))
+    else:
+        out += [
+            _format_array('float', f"{prefix}_threshold", float32_floor(threshold), _float_literal),
+            _format_array('float', f"{prefix}_leaf_value", leaf_value.astype(np.float32), _float_literal),
+        ]
+        out.append(_FLOAT_TEMPLATE.format(p=prefix, P=macro, node_type=node_type))
+
+    out.append(f"#endif /* {macro}_H */\n")
+    return "\n".join(line for line in out if line is not None)
+
+
+# =============================
+# TEMPLATE FUNGSI C
+# =============================
+
+_FLOAT_TEMPLATE = """\
+static inline int {p}_predict(const float x[{P}_N_FEATURES], float proba[{P}_N_CLASSES])
+{{
+    float acc[{P}_N_CLASSES] = {{0}};
+    int t, c, best = 0;
+
+    for (t = 0; t < {P}_N_TREES; t++) {{
+        {node_type} n = {p}_roots[t];
+        const float *value;
+        while ({p}_feature[n] >= 0)
+            n = ({node_type})({p}_left[n] + (x[{p}_feature[n]] > {p}_threshold[n]));
+        value = &{p}_leaf_value[(uint32_t){p}_left[n] * {P}_N_CLASSES];
+        for (c = 0; c < {P}_N_CLASSES; c++)
+            acc[c] += value[c];
+    }}
+    for (c = 0; c < {P}_N_CLASSES; c++) {{
+        if (acc[c] > acc[best])
+            best = c;
+        if (proba)
+            proba[c] = acc[c] / {P}_N_TREES;
+    }}
+    return best;
+}}
+"""
+
+_FIXED_TEMPLATE = """\
+/* Nilai fixed-point fitur: floor(x * 2^frac_bits), disaturasi ke rentang int32 */
+static inline int32_t {p}_quantize(float x, int feature)
+{{
+    float scaled = floorf(ldexpf(x, {p}_frac_bits[feature]));
+    if (scaled >= 2147483647.0f)
+        return INT32_MAX;
+    if (scaled <= -2147483648.0f)
+        return INT32_MIN;
+    return (int32_t)scaled;
+}}
+
+/* votes[c]: jumlah peluang Q16 seluruh pohon (peluang = votes / (N_TREES * PROBA_ONE)) */
+static inline int {p}_predict_fixed(const int32_t xq[{P}_N_FEATURES], uint32_t votes[{P}_N_CLASSES])
+{{
+    uint32_t acc[{P}_N_CLASSES] = {{0}};
+    int t, c, best = 0;
+
+    for (t = 0; t < {P}_N_TREES; t++) {{
+        {node_type} n = {p}_roots[t];
+        const uint16_t *value;
+        while ({p}_feature[n] >= 0)
+            n = ({node_type})({p}_left[n] + (xq[{p}_feature[n]] > {p}_threshold[n]));
+        value = &{p}_leaf_value[(uint32_t){p}_left[n] * {P}_N_CLASSES];
+        for (c = 0; c < {P}_N_CLASSES; c++)
+            acc[c] += value[c];
+    }}
+    for (c = 0; c < {P}_N_CLASSES; c++) {{
+        if (acc[c] > acc[best])
+            best = c;
+        if (votes)
+            votes[c] = acc[c];
+    }}
+    return best;
+}}
+
+static inline int {p}_predict(const float x[{P}_N_FEATURES], float proba[{P}_N_CLASSES])
+{{
+    int32_t xq[{P}_N_FEATURES];
+    uint32_t votes[{P}_N_CLASSES];
+    int i, best;
+
+    for (i = 0; i < {P}_N_FEATURES; i++)
+        xq[i] = {p}_quantize(x[i], i);
+    best = {p}_predict_fixed(xq, votes);
+    if (proba)
+        for (i = 0; i < {P}_N_CLASSES; i++)
+            proba[i] = (float)votes[i] / ((float){P}_N_TREES * {P}_PROBA_ONE);
+    return best;
+}}
+"""
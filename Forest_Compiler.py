@@ -0,0 +1,192 @@
+"""
+Kompiler random forest sklearn ke array NumPy datar (flattened).
+
+Semua pohon digabung ke satu set array node:
+- feature   : indeks fitur yang diuji (0 untuk daun)
+- threshold : ambang pemisah; x <= threshold -> anak kiri (+inf untuk daun)
+- children  : indeks global anak kiri; anak kanan selalu children + 1
+              (node diurutkan ulang per pohon agar saudara bersebelahan).
+              Daun menunjuk dirinya sendiri dan selalu "ke kiri".
+- value     : peluang kelas di node (hanya bermakna untuk daun)
+- roots     : indeks node akar tiap pohon
+
+Evaluator berjalan serentak untuk semua pohon (dan semua baris) sebanyak
+max_depth langkah, tanpa sklearn di hot path. Input dikonversi ke float32
+seperti sklearn, dan peluang dijumlahkan berurutan per pohon lalu dibagi
+jumlah pohon, sehingga hasilnya identik dengan predict_proba sklearn.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+# Jumlah baris per potongan evaluasi batch (matriks baris x pohon tetap kecil)
+BATCH_CHUNK = 1024
+
+META_FILE = "meta.json"
+
+
+class CompiledForest:
+    """Forest dalam bentuk array datar; lihat compile_forest"""
+
+    ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots')
+
+    def __init__(self, feature, threshold, children, value, roots, classes, feature_names, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.feature_names = list(feature_names)
+        self.max_depth = int(max_depth)
+        self.n_trees = len(roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def _leaves(self, X):
+        """Indeks daun (n_baris, n_pohon) untuk X float64 yang sudah dibulatkan ke float32"""
+        n_features = X.shape[1]
+        flat = X.ravel()
+        # Offset baris pada X datar, dijumlahkan dengan indeks fitur node
+        row_offset = (np.arange(len(X), dtype=self.roots.dtype) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            x = np.take(flat, row_offset + np.take(self.feature, node))
+            go_right = x > np.take(self.threshold, node)
+            node = np.take(self.children, node)
+            node += go_right
+        return node
+
+    def predict_proba(self, X):
+        """Peluang kelas untuk X (n_baris, n_fitur) atau satu baris (n_fitur,)"""
+        X = np.asarray(X)
+        single = X.ndim == 1
+        # sklearn membandingkan input float32 dengan ambang float64
+        X = np.atleast_2d(X).astype(np.float32).astype(np.float64)
+        if not np.isfinite(X).all():
+            raise ValueError("Input mengandung NaN/inf")
+
+        proba = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), BATCH_CHUNK):
+            leaves = self._leaves(X[start:start + BATCH_CHUNK])
+            # Akumulasi berurutan per pohon seperti ForestClassifier.predict_proba
+            proba[start:start + len(leaves)] = np.cumsum(np.take(self.value, leaves, axis=0), axis=1)[:, -1] / self.n_trees
+
+        return proba[0] if single else proba
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.classes_[proba.argmax(axis=-1)]
+
+    def save(self, directory, **meta):
+        """
+        Simpan sebagai bundle: satu file .npy per array + meta.json.
+        Field tambahan (mis. sidik jari model sumber) ikut disimpan di meta.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        meta.update(
+            classes=self.classes_.tolist(),
+            feature_names=self.feature_names,
+            max_depth=self.max_depth,
+        )
+        # meta.json ditulis terakhir lewat rename, jadi bundle tanpa meta dianggap belum lengkap
+        tmp = os.path.join(directory, META_FILE + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, META_FILE))
+
+
+def read_meta(directory):
+    """meta.json dari bundle, atau None jika bundle belum ada/tidak lengkap"""
+    try:
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_compiled(directory, mmap_mode='r'):
+    """
+    Muat bundle hasil CompiledForest.save. Dengan mmap_mode='r' array dipetakan
+    read-only dari file, sehingga beberapa proses berbagi halaman memori yang sama.
+    """
+    meta = read_meta(directory)
+    if meta is None:
+        raise FileNotFoundError(f"Bundle forest tidak ditemukan atau tidak lengkap: {directory}")
+    # np.asarray: ndarray biasa di atas buffer mmap (tanpa overhead subclass memmap)
+    arrays = {
+        name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+        for name in CompiledForest.ARRAYS
+    }
+    return CompiledForest(
+        classes=meta['classes'],
+        feature_names=meta['feature_names'],
+        max_depth=meta['max_depth'],
+        **arrays,
+    )
+
+
+def _sibling_order(tree):
+    """
+    Urutan node baru (BFS) di mana anak kanan tepat setelah anak kiri.
+    Mengembalikan (order, new_index): order[baru] = lama, new_index[lama] = baru.
+    """
+    order = [0]
+    for old in order:
+        if tree.children_left[old] != -1:
+            order.append(tree.children_left[old])
+            order.append(tree.children_right[old])
+    order = np.array(order)
+    new_index = np.empty(len(order), dtype=np.int64)
+    new_index[order] = np.arange(len(order))
+    return order, new_index
+
+
+def compile_forest(estimator):
+    """
+    Kompilasi RandomForestClassifier/ExtraTreesClassifier (satu output) ke CompiledForest.
+    """
+    if not hasattr(estimator, 'estimators_') or getattr(estimator, 'n_outputs_', 1) != 1:
+        raise ValueError("Hanya forest klasifikasi sklearn dengan satu output yang didukung")
+
+    n_classes = int(estimator.n_classes_)
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for tree in (e.tree_ for e in estimator.estimators_):
+        order, new_index = _sibling_order(tree)
+        is_leaf = tree.children_left[order] == -1
+        own = np.arange(offset, offset + len(order))
+
+        features.append(np.where(is_leaf, 0, tree.feature[order]))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+        children.append(np.where(is_leaf, own, new_index[tree.children_left[order]] + offset))
+        values.append(tree.value[order, 0, :n_classes])
+        roots.append(offset)
+
+        offset += len(order)
+        max_depth = max(max_depth, tree.max_depth)
+
+    index_dtype = np.int32 if offset < 2 ** 31 else np.int64
+    feature_names = getattr(estimator, 'feature_names_in_', [f"x{i}" for i in range(estimator.n_features_in_)])
+    return CompiledForest(
+        feature=np.concatenate(features).astype(index_dtype),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        children=np.concatenate(children).astype(index_dtype),
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        roots=np.array(roots, dtype=index_dtype),
+        classes=estimator.classes_,
+        feature_names=feature_names,
+        max_depth=max_depth,
+    )
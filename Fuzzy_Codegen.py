@@ -0,0 +1,332 @@
+"""
+Generator implementasi C sistem pakar fuzzy (Sistem_Pakar.py) untuk firmware.
+
+Semua data diambil dari basis aturan yang aktif (rules.json): parameter
+trapesium himpunan input/output, aturan (anteseden, output, ID) dan kelompok
+aturan untuk confidence (_DANGER_RULES, _PRIORITY_RULES, ...). Hasilnya satu
+header C99 mandiri tanpa alokasi memori:
+
+- fuzzifikasi trapmf dengan percabangan yang sama dengan trapmf Python
+- inferensi Mamdani (AND = min, agregasi output = max), bitmask aturan aktif
+- defuzzifikasi centroid tertutup: titik patah tetap (parameter output dan
+  perpotongan sisi miring) sudah dihitung dan diurutkan saat generate; saat
+  runtime hanya titik potong firing strength yang disisipkan, lalu integral
+  mu dan x*mu dihitung per segmen (sama dengan _centroid_scalar, bukan grid
+  1000 titik)
+- status dari firing strength terbesar, keputusan hybrid dan confidence
+  (confidence_breakdown) untuk status ML opsional
+
+Tipe bilangan WQ_FUZZY_REAL default double (identik dengan Python); firmware
+boleh mendefinisikannya sebagai float sebelum #include demi kecepatan.
+"""
+
+import os
+import re
+
+import numpy as np
+
+import Sistem_Pakar as sp
+
+
+VALUES_PER_LINE = 8
+DEFAULT_PREFIX = 'wq_fuzzy'
+
+
+def c_identifier(name):
+    return re.sub(r'\W', '_', str(name)).strip('_') or 'x'
+
+
+def _real(value):
+    # %.17g: double ditulis persis (round-trip)
+    text = f"{float(value):.17g}"
+    return text if any(c in text for c in '.en') else text + '.0'
+
+
+def _c_string(text):
+    return '"' + str(text).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _array(ctype, name, values, fmt):
+    """Array const C; array 2 dimensi ditulis satu baris per elemen luar"""
+    values = np.asarray(values, dtype=object)
+    dims = "".join(f"[{n}]" for n in values.shape)
+    if values.ndim == 2:
+        lines = ["    {" + ", ".join(fmt(v) for v in row) + "}," for row in values]
+    else:
+        values = [fmt(v) for v in values]
+        lines = [
+            "    " + ", ".join(values[i:i + VALUES_PER_LINE]) + ","
+            for i in range(0, len(values), VALUES_PER_LINE)
+        ]
+    return f"static const {ctype} {name}{dims} = {{\n" + "\n".join(lines) + "\n};\n"
+
+
+def _rule_mask(rule_base, rule_ids):
+    return sum(1 << r for r, rule_id in enumerate(rule_base.rule_ids) if rule_id in rule_ids)
+
+
+def generate_c_header(rule_base=None, prefix=DEFAULT_PREFIX):
+    """Teks header C untuk basis aturan (default: basis aturan aktif)"""
+    rule_base = rule_base or sp.get_rule_base()
+    if len(rule_base.rules) > 32:
+        raise ValueError("Maksimum 32 aturan (bitmask uint32_t)")
+    prefix = c_identifier(prefix).lower()
+
+    source = f" dari {os.path.basename(rule_base.source)}" if rule_base.source else ""
+    out = [
+        "/*",
+        f" * {prefix}.h - dihasilkan oleh export_fuzzy_c.py{source}; jangan diedit manual.",
+        f" * Sistem pakar fuzzy Mamdani: {len(rule_base.rules)} aturan, defuzzifikasi centroid tertutup.",
+        " * Tanpa alokasi memori; semua tabel const.",
+        " */",
+        "#ifndef WQ_FUZZY_H",
+        "#define WQ_FUZZY_H",
+        "",
+        "#include <stdint.h>",
+        "",
+        "#ifndef WQ_FUZZY_REAL",
+        "#define WQ_FUZZY_REAL double",
+        "#endif",
+        "typedef WQ_FUZZY_REAL wq_fuzzy_real;",
+        "",
+        f"#define WQ_FUZZY_N_RULES {len(rule_base.rules)}",
+        f"#define WQ_FUZZY_N_OUTPUTS {len(sp.OUTPUT_NAMES)}",
+        f"#define WQ_FUZZY_N_RAMPS {len(rule_base.output_ramps)}",
+        f"#define WQ_FUZZY_N_FIXED {len(rule_base.fixed_breakpoints)}",
+        "#define WQ_FUZZY_N_POINTS (WQ_FUZZY_N_FIXED + WQ_FUZZY_N_RAMPS * WQ_FUZZY_N_OUTPUTS)",
+    ]
+    # Kode status = indeks STATUS_LABELS (sama dengan Sistem_Pakar.TIDAK_LAYAK/CUKUP_LAYAK/LAYAK)
+    out += [f"#define WQ_FUZZY_{c_identifier(name).upper()} {code}" for code, name in enumerate(sp.OUTPUT_NAMES)]
+    out += [f"#define WQ_FUZZY_DECISION_{c_identifier(name).upper()} {code}" for code, name in enumerate(
+        ('agree', 'es_layak', 'es_cukup', 'safety', 'es_only'))]
+    out.append("")
+
+    out.append(_array('char *const', 'wq_fuzzy_status_labels', sp.STATUS_LABELS, _c_string))
+    out.append(_array('char *const', 'wq_fuzzy_rule_ids', rule_base.rule_ids, _c_string))
+    for v in sp.VARIABLES:
+        sets = rule_base.input_sets[v]
+        out.append(f"#define WQ_FUZZY_N_{v.upper()}_SETS {len(sets)}")
+        out.append(_array('wq_fuzzy_real', f"wq_fuzzy_{v}_sets", list(sets.values()), _real))
+    out.append(_array('wq_fuzzy_real', 'wq_fuzzy_output_sets', list(rule_base.output_sets.values()), _real))
+    # Anteseden per aturan: indeks himpunan (ph, tds, ntu); -1 = variabel tidak dipakai
+    out.append(_array('int8_t', 'wq_fuzzy_rule_antecedents', rule_base.antecedent_index, str))
+    out.append(_array('uint8_t', 'wq_fuzzy_rule_output', rule_base.output_index, str))
+    out.append(_array('wq_fuzzy_real', 'wq_fuzzy_ramps', rule_base.output_ramps, _real))
+    out.append(_array('wq_fuzzy_real', 'wq_fuzzy_fixed_breakpoints', np.sort(rule_base.fixed_breakpoints), _real))
+    out += [
+        f"#define WQ_FUZZY_DANGER_RULES 0x{_rule_mask(rule_base, sp._DANGER_RULES):08x}u",
+        f"#define WQ_FUZZY_PRIORITY_RULES 0x{_rule_mask(rule_base, sp._PRIORITY_RULES):08x}u",
+        f"#define WQ_FUZZY_HIGH_PRIORITY_RULES 0x{_rule_mask(rule_base, sp._HIGH_PRIORITY_RULES):08x}u",
+        f"#define WQ_FUZZY_MEDIUM_PRIORITY_RULES 0x{_rule_mask(rule_base, sp._MEDIUM_PRIORITY_RULES):08x}u",
+        "",
+        _FUNCTIONS,
+        "#endif /* WQ_FUZZY_H */\n",
+    ]
+    text = "\n".join(out)
+    return text.replace('wq_fuzzy', prefix).replace('WQ_FUZZY', prefix.upper())
+
+
+# =============================
+# FUNGSI C
+# =============================
+#
+# Ditulis dengan awalan default wq_fuzzy/WQ_FUZZY; generate_c_header
+# menggantinya dengan awalan yang diminta.
+
+_FUNCTIONS = """\
+typedef struct {
+    int status;                                 /* kode status ES (indeks wq_fuzzy_status_labels) */
+    int has_active_rules;
+    wq_fuzzy_real score;                        /* centroid 0-100; 0 jika tidak ada aturan aktif */
+    wq_fuzzy_real firing[WQ_FUZZY_N_OUTPUTS];   /* firing strength per himpunan output */
+    uint32_t rules_fired;                       /* bit r = aturan ke-r (wq_fuzzy_rule_ids) aktif */
+} wq_fuzzy_result;
+
+static inline wq_fuzzy_real wq_fuzzy_trapmf(wq_fuzzy_real x, const wq_fuzzy_real p[4])
+{
+    if (x < p[0] || x > p[3])
+        return 0;
+    if (p[0] <= x && x <= p[1])
+        return p[1] != p[0] ? (x - p[0]) / (p[1] - p[0]) : 1;
+    if (p[1] < x && x < p[2])
+        return 1;
+    if (p[2] <= x && x <= p[3])
+        return p[3] != p[2] ? (p[3] - x) / (p[3] - p[2]) : 1;
+    return 0;
+}
+
+/* Centroid eksak agregat max_k(min(s_k, mu_k(x))) (setara _centroid_scalar) */
+static inline wq_fuzzy_real wq_fuzzy_centroid(const wq_fuzzy_real strengths[WQ_FUZZY_N_OUTPUTS])
+{
+    wq_fuzzy_real x[WQ_FUZZY_N_POINTS], mu[WQ_FUZZY_N_POINTS];
+    wq_fuzzy_real area = 0, moment = 0;
+    int n = WQ_FUZZY_N_FIXED, i, j, k;
+
+    for (i = 0; i < WQ_FUZZY_N_FIXED; i++)
+        x[i] = wq_fuzzy_fixed_breakpoints[i];
+    /* Sisipkan titik potong tiap sisi miring pada tiap firing strength (insertion sort) */
+    for (i = 0; i < WQ_FUZZY_N_RAMPS; i++) {
+        for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++) {
+            wq_fuzzy_real cut = (strengths[k] - wq_fuzzy_ramps[i][1]) / wq_fuzzy_ramps[i][0];
+            cut = cut < 0 ? 0 : (cut > 100 ? 100 : cut);
+            for (j = n; j > 0 && x[j - 1] > cut; j--)
+                x[j] = x[j - 1];
+            x[j] = cut;
+            n++;
+        }
+    }
+    for (i = 0; i < n; i++) {
+        wq_fuzzy_real agregat = 0;
+        for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++) {
+            wq_fuzzy_real m = wq_fuzzy_trapmf(x[i], wq_fuzzy_output_sets[k]);
+            m = strengths[k] < m ? strengths[k] : m;
+            agregat = agregat > m ? agregat : m;
+        }
+        mu[i] = agregat;
+    }
+    for (i = 0; i + 1 < n; i++) {
+        wq_fuzzy_real h = x[i + 1] - x[i];
+        area += h * (mu[i] + mu[i + 1]) / 2;
+        moment += h * (x[i] * (2 * mu[i] + mu[i + 1]) + x[i + 1] * (mu[i] + 2 * mu[i + 1])) / 6;
+    }
+    return area == 0 ? 50 : moment / area;
+}
+
+/* Inferensi fuzzy (setara fuzzy_inference dengan defuzzifikasi 'centroid') */
+static inline void wq_fuzzy_infer(wq_fuzzy_real ph, wq_fuzzy_real tds, wq_fuzzy_real ntu, wq_fuzzy_result *out)
+{
+    wq_fuzzy_real mu_ph[WQ_FUZZY_N_PH_SETS], mu_tds[WQ_FUZZY_N_TDS_SETS], mu_ntu[WQ_FUZZY_N_NTU_SETS];
+    wq_fuzzy_real best;
+    int i, k;
+
+    for (i = 0; i < WQ_FUZZY_N_PH_SETS; i++)
+        mu_ph[i] = wq_fuzzy_trapmf(ph, wq_fuzzy_ph_sets[i]);
+    for (i = 0; i < WQ_FUZZY_N_TDS_SETS; i++)
+        mu_tds[i] = wq_fuzzy_trapmf(tds, wq_fuzzy_tds_sets[i]);
+    for (i = 0; i < WQ_FUZZY_N_NTU_SETS; i++)
+        mu_ntu[i] = wq_fuzzy_trapmf(ntu, wq_fuzzy_ntu_sets[i]);
+
+    for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++)
+        out->firing[k] = 0;
+    out->rules_fired = 0;
+
+    /* AND = min atas anteseden yang dipakai, agregasi per output = max */
+    for (i = 0; i < WQ_FUZZY_N_RULES; i++) {
+        const int8_t *a = wq_fuzzy_rule_antecedents[i];
+        wq_fuzzy_real strength = 1;
+        if (a[0] >= 0 && mu_ph[a[0]] < strength)
+            strength = mu_ph[a[0]];
+        if (a[1] >= 0 && mu_tds[a[1]] < strength)
+            strength = mu_tds[a[1]];
+        if (a[2] >= 0 && mu_ntu[a[2]] < strength)
+            strength = mu_ntu[a[2]];
+        if (strength > 0) {
+            k = wq_fuzzy_rule_output[i];
+            if (strength > out->firing[k])
+                out->firing[k] = strength;
+            out->rules_fired |= (uint32_t)1 << i;
+        }
+    }
+
+    out->has_active_rules = out->rules_fired != 0;
+    if (!out->has_active_rules) {
+        out->status = WQ_FUZZY_TIDAK_LAYAK;
+        out->score = 0;
+        return;
+    }
+    /* Status = himpunan output dengan firing strength terbesar (seri -> urutan pertama) */
+    out->status = 0;
+    best = out->firing[0];
+    for (k = 1; k < WQ_FUZZY_N_OUTPUTS; k++) {
+        if (out->firing[k] > best) {
+            best = out->firing[k];
+            out->status = k;
+        }
+    }
+    out->score = wq_fuzzy_centroid(out->firing);
+}
+
+/* Catatan keputusan hybrid (indeks DECISION_NOTES); status final selalu status ES */
+static inline int wq_fuzzy_decision(int es_status, int ml_status)
+{
+    if (ml_status == es_status)
+        return WQ_FUZZY_DECISION_AGREE;
+    if (ml_status == WQ_FUZZY_TIDAK_LAYAK && es_status == WQ_FUZZY_LAYAK)
+        return WQ_FUZZY_DECISION_ES_LAYAK;
+    if ((ml_status == WQ_FUZZY_TIDAK_LAYAK || ml_status == WQ_FUZZY_LAYAK) && es_status == WQ_FUZZY_CUKUP_LAYAK)
+        return WQ_FUZZY_DECISION_ES_CUKUP;
+    if (ml_status == WQ_FUZZY_LAYAK && es_status == WQ_FUZZY_TIDAK_LAYAK)
+        return WQ_FUZZY_DECISION_SAFETY;
+    return WQ_FUZZY_DECISION_ES_ONLY;
+}
+
+/*
+ * Confidence 0-100 (setara EvaluationResult.confidence / confidence_breakdown).
+ * ml_status: kode status ML, atau -1 jika ML tidak tersedia.
+ */
+static inline int wq_fuzzy_confidence(const wq_fuzzy_result *r, wq_fuzzy_real ph, wq_fuzzy_real tds,
+                                      wq_fuzzy_real ntu, int ml_status)
+{
+    int ml_confidence = 0, es_confidence = 0, quality = 0, specificity = 0, strength_bonus, k;
+    wq_fuzzy_real max_strength = 0;
+
+    /* Tanpa aturan aktif atau R1-R6 (alarm bahaya) aktif: 25 hanya jika ML menyatakan layak */
+    if (!r->has_active_rules || (r->rules_fired & WQ_FUZZY_DANGER_RULES))
+        return ml_status == WQ_FUZZY_LAYAK ? 25 : 0;
+
+    if (ml_status >= 0 && ml_status == r->status)
+        ml_confidence = 25;
+
+    for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++)
+        if (r->firing[k] > max_strength)
+            max_strength = r->firing[k];
+    strength_bonus = (int)(max_strength * 10);
+
+    if (r->status == WQ_FUZZY_LAYAK) {
+        if (6.95 <= ph && ph <= 7.05)
+            quality += 3;
+        else if (6.8 <= ph && ph <= 7.2)
+            quality += 2;
+        else if (6.5 <= ph && ph <= 8.5)
+            quality += 1;
+        if (tds <= 300)
+            quality += 3;
+        else if (tds <= 500)
+            quality += 2;
+        else if (tds <= 600)
+            quality += 1;
+        if (ntu <= 1)
+            quality += 4;
+        else if (ntu <= 3)
+            quality += 3;
+        else if (ntu <= 5)
+            quality += 2;
+        if (r->rules_fired & WQ_FUZZY_PRIORITY_RULES)
+            specificity = 15;
+        else if (r->rules_fired & WQ_FUZZY_HIGH_PRIORITY_RULES)
+            specificity = 10;
+        es_confidence = 40 + strength_bonus + quality + specificity;
+        es_confidence = es_confidence < 0 ? 0 : (es_confidence > 75 ? 75 : es_confidence);
+    } else if (r->status == WQ_FUZZY_CUKUP_LAYAK) {
+        if (6.95 <= ph && ph <= 7.05)
+            quality += 2;
+        else if (6.8 <= ph && ph <= 7.2)
+            quality += 1;
+        if (tds <= 300)
+            quality += 2;
+        else if (tds <= 500)
+            quality += 1;
+        if (ntu <= 1)
+            quality += 1;
+        if (r->rules_fired & WQ_FUZZY_MEDIUM_PRIORITY_RULES)
+            specificity = 10;
+        else if (r->rules_fired)
+            specificity = 5;
+        es_confidence = 25 + strength_bonus + quality + specificity;
+        es_confidence = es_confidence < 0 ? 0 : (es_confidence > 50 ? 50 : es_confidence);
+    }
+
+    k = ml_confidence + es_confidence;
+    return k < 0 ? 0 : (k > 100 ? 100 : k);
+}
+"""
@@ -0,0 +1,422 @@
+"""
+Layanan inferensi lokal dengan micro-batching untuk ML + sistem pakar.
+
+Pembacaan dari banyak klien (sesi Streamlit) masuk ke satu antrean asyncio.
+MicroBatcher mengumpulkannya menjadi batch sampai max_batch pembacaan atau
+batas max_latency sejak pembacaan pertama, lalu menjalankan satu kali
+WaterQualityModel.predict_batch + evaluate_water_quality_batch di thread
+worker. Event loop tetap melayani koneksi selama batch berjalan, sehingga
+permintaan berikutnya otomatis terkumpul menjadi batch selanjutnya.
+
+Protokol: HTTP/1.1 + JSON (keep-alive) di localhost atau Unix socket.
+- POST /evaluate  {"ph": 7.1, "tds": 250, "ntu": 1.2}           -> satu hasil
+- POST /evaluate  {"readings": [{"ph": ..., "tds": ..., "ntu": ...}, ...]} -> {"results": [...]}
+- GET  /stats     throughput, kedalaman antrean, ukuran batch, latensi
+- GET  /health
+
+InferenceClient dipakai app.py; hasilnya (ServiceEvaluation) punya field
+yang sama dengan EvaluationResult yang dibaca dashboard.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import http.client
+import json
+import math
+import socket
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+import Sistem_Pakar as sp
+from Machine_Learning import logger as ml_logger
+
+
+logger = ml_logger.getChild('service')
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_LATENCY_MS = 5.0
+
+# Jendela statistik: throughput dihitung atas STATS_WINDOW detik terakhir,
+# persentil latensi atas LATENCY_SAMPLES permintaan terakhir
+STATS_WINDOW = 10.0
+LATENCY_SAMPLES = 2000
+
+# rules.json diperiksa paling sering sekali per interval ini (hot reload)
+RULE_RELOAD_INTERVAL = 1.0
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+# =============================
+# EVALUASI BATCH
+# =============================
+
+def evaluate_readings(model, ph, tds, ntu):
+    """
+    Evaluasi hybrid untuk array pembacaan: satu predict_batch ML dan satu
+    evaluate_water_quality_batch. Mengembalikan list dict per pembacaan
+    (siap JSON) dengan field yang dipakai dashboard.
+    """
+    ph = np.asarray(ph, dtype=np.float64)
+    tds = np.asarray(tds, dtype=np.float64)
+    ntu = np.asarray(ntu, dtype=np.float64)
+
+    if model is not None:
+        ml_labels, ml_confidence = model.predict_batch(ph, tds, ntu)
+    else:
+        ml_labels, ml_confidence = None, None
+    final_status, details, confidence, has_active_rules = sp.evaluate_water_quality_batch(ph, tds, ntu, ml_labels)
+
+    rules = sp.get_rule_base().rules
+    active = details['rules_active']
+    strengths = details['rule_strength']
+
+    results = []
+    for i in range(len(ph)):
+        status = sp.STATUS_LABELS[final_status[i]]
+        rule_index = np.flatnonzero(active[i])
+        results.append({
+            'ml_result': str(ml_labels[i]) if ml_labels is not None else None,
+            'ml_confidence': int(ml_confidence[i]) if ml_confidence is not None else None,
+            'status': status,
+            'es_status': sp.STATUS_LABELS[details['es_status'][i]],
+            'decision': int(details['decision'][i]),
+            'score': float(details['score'][i]),
+            'confidence': confidence[i].item(),
+            'has_active_rules': bool(has_active_rules[i]),
+            'rules_fired': [[rules[r][0], float(strengths[i, r]), rules[r][3]] for r in rule_index],
+            'recommendations': sp.get_recommendations(status, ph[i].item(), tds[i].item(), ntu[i].item()),
+        })
+    return results
+
+
+# =============================
+# MICRO-BATCHING
+# =============================
+
+class MicroBatcher:
+    """
+    Antrean pembacaan -> batch. Dibuat dan dijalankan di dalam event loop
+    (lihat start); submit dipanggil dari coroutine handler koneksi.
+    """
+
+    def __init__(self, model, max_batch=DEFAULT_MAX_BATCH, max_latency_ms=DEFAULT_MAX_LATENCY_MS):
+        self.model = model
+        self.max_batch = max(1, int(max_batch))
+        self.max_latency = max_latency_ms / 1000.0
+        self._queue = None
+        self._task = None
+        # Satu worker: batch diproses berurutan, antrean terisi selama batch berjalan
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference-batch")
+        self._last_rule_check = 0.0
+
+        self.started_at = time.time()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self.in_flight = 0
+        self._completed = collections.deque()
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._batch_sizes = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, ph, tds, ntu):
+        """Hasil evaluasi (dict) untuk satu pembacaan, setelah batch-nya selesai"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.requests += 1
+        await self._queue.put((loop.time(), ph, tds, ntu, future))
+        return await future
+
+    async def _collect(self):
+        """Batch berikutnya: tunggu item pertama, lalu kumpulkan sampai penuh atau tenggat habis"""
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        batch = [first]
+        deadline = first[0] + self.max_latency
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _process(self, ph, tds, ntu):
+        now = time.monotonic()
+        if now - self._last_rule_check >= RULE_RELOAD_INTERVAL:
+            self._last_rule_check = now
+            sp.reload_rule_base_if_changed()
+        return evaluate_readings(self.model, ph, tds, ntu)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self.in_flight = len(batch)
+            columns = [np.array([item[k] for item in batch], dtype=np.float64) for k in (1, 2, 3)]
+            try:
+                results = await loop.run_in_executor(self._executor, self._process, *columns)
+            except Exception as e:
+                self.errors += len(batch)
+                logger.exception("Inference batch of %d failed", len(batch))
+                for item in batch:
+                    if not item[4].done():
+                        item[4].set_exception(e)
+                continue
+            finally:
+                self.in_flight = 0
+
+            done = loop.time()
+            for item, result in zip(batch, results):
+                if not item[4].done():
+                    item[4].set_result(result)
+                self._latencies.append(done - item[0])
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._completed.append((time.monotonic(), len(batch)))
+
+    def stats(self):
+        now = time.monotonic()
+        while self._completed and now - self._completed[0][0] > STATS_WINDOW:
+            self._completed.popleft()
+        recent = sum(n for _, n in self._completed)
+        latencies = np.array(self._latencies) * 1000 if self._latencies else None
+        return {
+            'uptime_s': time.time() - self.started_at,
+            'requests': self.requests,
+            'batches': self.batches,
+            'errors': self.errors,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'in_flight': self.in_flight,
+            'throughput_per_s': recent / STATS_WINDOW,
+            'mean_batch_size': float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+            'max_batch_size': self.max_batch_seen,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'max': float(latencies.max()),
+            } if latencies is not None else None,
+            'max_batch': self.max_batch,
+            'max_latency_ms': self.max_latency * 1000,
+        }
+
+
+# =============================
+# SERVER HTTP
+# =============================
+
+def _parse_reading(item):
+    try:
+        values = tuple(float(item[name]) for name in ('ph', 'tds', 'ntu'))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("setiap pembacaan butuh field numerik ph, tds, ntu")
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError("ph, tds, ntu harus bernilai finite")
+    return values
+
+
+class InferenceServer:
+    """Server HTTP minimal (asyncio streams) di atas MicroBatcher"""
+
+    def __init__(self, batcher, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self._server = None
+
+    async def start(self):
+        self.batcher.start()
+        if self.unix_path:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.unix_path)
+            logger.info("Inference service listening on unix:%s", self.unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            logger.info("Inference service listening on http://%s:%d", self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def _route(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/stats':
+            return 200, self.batcher.stats()
+        if path != '/evaluate':
+            return 404, {'error': f"path tidak dikenal: {path}"}
+        if method != 'POST':
+            return 405, {'error': "gunakan POST"}
+
+        try:
+            payload = json.loads(body or b'{}')
+            if isinstance(payload, dict) and 'readings' in payload:
+                readings = [_parse_reading(item) for item in payload['readings']]
+                results = await asyncio.gather(*(self.batcher.submit(*r) for r in readings))
+                return 200, {'results': results}
+            return 200, await self.batcher.submit(*_parse_reading(payload))
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+# =============================
+# KLIEN
+# =============================
+
+class ServiceUnavailable(Exception):
+    """Layanan inferensi tidak bisa dihubungi atau membalas dengan error"""
+
+
+class ServiceEvaluation:
+    """Hasil evaluasi dari layanan; field sama dengan yang dibaca app.py dari EvaluationResult"""
+
+    __slots__ = (
+        'ml_result', 'ml_confidence', 'status', 'es_status', 'decision', 'score',
+        'confidence', 'has_active_rules', 'rules_fired', 'recommendations',
+    )
+
+    def __init__(self, fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+        self.rules_fired = [tuple(rule) for rule in self.rules_fired or ()]
+
+    def __repr__(self):
+        return f"ServiceEvaluation(status={self.status!r}, confidence={self.confidence}, ml_result={self.ml_result!r})"
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class InferenceClient:
+    """
+    Klien sinkron untuk app.py. url: "http://127.0.0.1:8765" atau "unix:///path/socket".
+    Satu koneksi keep-alive per thread (setiap sesi Streamlit berjalan di thread sendiri).
+    """
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+        parsed = urllib.parse.urlparse(url)
+        if parsed.scheme == 'unix':
+            self._connect = lambda: _UnixHTTPConnection(parsed.path, timeout)
+        elif parsed.scheme == 'http':
+            self._connect = lambda: http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+        else:
+            raise ValueError(f"URL layanan harus http:// atau unix://, bukan {url!r}")
+        self._local = threading.local()
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        # Koneksi keep-alive yang ditutup server dicoba ulang sekali dengan koneksi baru
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = self._connect()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = json.loads(response.read() or b'null')
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise ServiceUnavailable(f"{self.url}: {e}") from e
+                continue
+            if response.status != 200:
+                raise ServiceUnavailable(f"{self.url}{path}: HTTP {response.status} {data}")
+            return data
+
+    def evaluate(self, ph, tds, ntu):
+        return ServiceEvaluation(self._request('POST', '/evaluate', {'ph': ph, 'tds': tds, 'ntu': ntu}))
+
+    def evaluate_many(self, readings):
+        """readings: iterable (ph, tds, ntu) -> list ServiceEvaluation"""
+        payload = {'readings': [{'ph': p, 'tds': t, 'ntu': n} for p, t, n in readings]}
+        return [ServiceEvaluation(r) for r in self._request('POST', '/evaluate', payload)['results']]
+
+    def stats(self):
+        return self._request('GET', '/stats')
+
+    def health(self):
+        return self._request('GET', '/health')
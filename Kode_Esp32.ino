@@ -5,6 +5,9 @@
 #include <math.h>
 #include <time.h>
 
+// Sistem pakar fuzzy dari rules.json (python export_fuzzy_c.py -o wq_fuzzy.h)
+#include "wq_fuzzy.h"
+
 // ================= WIFI =================
 #define WIFI_SSID "idoy"
 #define WIFI_PASSWORD "112345678"
@@ -244,13 +247,17 @@ void loop() {
   Serial.print("TDS: ");
   Serial.println(tds);
 
-  // Baca status dari Firebase
-  if (Firebase.RTDB.getString(&fbdo, "/sensor/status")) {
-    String status = fbdo.stringData();
-    Serial.print("Status: ");
-    Serial.println(status);
-    handleStatus(status);
-  }
+  // Status dihitung lokal dengan sistem pakar yang sama dengan dashboard
+  // (status final dashboard = status sistem pakar), tanpa menunggu Firebase
+  wq_fuzzy_result fuzzy;
+  wq_fuzzy_infer(ph, tds, ntu, &fuzzy);
+  String status = wq_fuzzy_status_labels[fuzzy.status];
+  Serial.print("Status: ");
+  Serial.print(status);
+  Serial.print(" (skor ");
+  Serial.print(fuzzy.score);
+  Serial.println(")");
+  handleStatus(status);
 
   delay(3000);
 }
\ No newline at end of file
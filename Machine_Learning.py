@@ -1,112 +1,466 @@
+import itertools
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+
 import joblib
 import pandas as pd
 import numpy as np
+from sklearn.base import BaseEstimator
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+from Forest_Compiler import compile_forest, load_compiled, read_meta
+
+
+logger = logging.getLogger(__name__)
+
+# Modul tanpa dependensi ML yang memakai logging.getLogger(__name__) sendiri;
+# configure_logging memasang handler yang sama pada logger-logger ini
+EXTERNAL_LOGGERS = ('Sistem_Pakar', 'Sistem_Pakar_LUT', 'Sensor_Stream', 'Firebase_Connection')
+
+
+# =============================
+# LOGGING
+# =============================
+
+class SamplingFilter(logging.Filter):
+    """
+    Loloskan 1 dari setiap `every` record prediksi (record dengan extra
+    sampled=True); record lain (load, error) selalu lolos.
+    """
+
+    def __init__(self, every=1):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False) or self.every == 1:
+            return True
+        return next(self._counter) % self.every == 0
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Satu objek JSON per baris: ts, level, logger, msg, plus field terstruktur (extra fields=...)"""
+
+    def format(self, record):
+        entry = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=None, sample_every=None, json_lines=None, stream=None):
+    """
+    Pasang handler untuk logger modul ini (beserta anak-anaknya) dan
+    EXTERNAL_LOGGERS. Default dibaca dari environment:
+    ML_LOG_LEVEL (INFO), ML_LOG_SAMPLE_EVERY (1), ML_LOG_FORMAT ('text' atau 'json').
+    Log prediksi ada di level DEBUG; selama DEBUG mati tidak ada string yang diformat.
+    Aman dipanggil berulang (mis. setiap rerun Streamlit): konfigurasi yang sama
+    tidak memasang ulang handler, sehingga penghitung sampling tetap berjalan.
+    """
+    global _LOGGING_CONFIG
+    level = level or os.environ.get('ML_LOG_LEVEL', 'INFO')
+    sample_every = sample_every or int(os.environ.get('ML_LOG_SAMPLE_EVERY', '1'))
+    if json_lines is None:
+        json_lines = os.environ.get('ML_LOG_FORMAT', 'text').lower() == 'json'
+    
+    config = (level, sample_every, json_lines, stream)
+    if _LOGGING_CONFIG is not None and _LOGGING_CONFIG[0] == config:
+        return _LOGGING_CONFIG[1]
+    
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.addFilter(SamplingFilter(sample_every))
+    handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    
+    for target in [logger] + [logging.getLogger(name) for name in EXTERNAL_LOGGERS]:
+        for old in list(target.handlers):
+            target.removeHandler(old)
+        target.addHandler(handler)
+        target.setLevel(level.upper() if isinstance(level, str) else level)
+        target.propagate = False
+    _LOGGING_CONFIG = (config, handler)
+    return handler
+
+
+_LOGGING_CONFIG = None
+
+
+# Posisi input (ph, tds, ntu) untuk tiap nama fitur model; -1 = tidak dikenal (diisi 0)
+INPUT_INDEX = {'ph': 0, 'solids': 1, 'tds': 1, 'turbidity': 2, 'ntu': 2}
+
+# Batch hingga ukuran ini memakai forest terkompilasi; di atasnya sklearn (Cython) lebih cepat
+COMPILED_BATCH_MAX = 256
+
+
+DEFAULT_FEATURES = ['ph', 'Solids', 'Turbidity']
+
+
+# =============================
+# DATA TRAINING
+# =============================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+POTABILITY_FILE = os.path.join(BASE_DIR, "water_quality_potability_v2.csv")
+SENSOR_FILE = os.path.join(BASE_DIR, "dataset_sensor.csv")
+TARGET = 'Potability'
+
+# Split hold-out sama dengan notebook (train_test_split test_size=0.2, random_state=42)
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+
+
+def load_training_data(potability_path=POTABILITY_FILE, sensor_path=SENSOR_FILE):
+    """
+    Data training seperti water_quality_v2.ipynb: Solids dataset potability
+    diskalakan ke rentang TDS sensor (/62000*1000), digabung dengan
+    dataset_sensor.csv, duplikat dibuang, ph kosong diisi rata-rata.
+    Returns: (X DataFrame ph/Solids/Turbidity, y Series Potability)
+    """
+    df = pd.read_csv(potability_path)[DEFAULT_FEATURES + [TARGET]]
+    df['Solids'] = (df['Solids'] / 62000) * 1000
+    df = pd.concat([df, pd.read_csv(sensor_path, encoding='utf-8-sig')], axis=0, ignore_index=True)
+    df = df.drop_duplicates()
+    df['ph'] = df['ph'].fillna(df['ph'].mean())
+    return df[DEFAULT_FEATURES], df[TARGET]
+
+
+def split_training_data(X, y, test_size=TEST_SIZE, random_state=SPLIT_SEED):
+    """(x_train, x_test, y_train, y_test) dengan split yang sama seperti notebook"""
+    return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+
+def resident_memory_mb():
+    """RSS proses saat ini (MB); fallback ke puncak RSS jika /proc tidak tersedia"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss dalam KB di Linux, byte di macOS
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+    except (ImportError, OSError):
+        return None
+
+
+def bundle_path(model_path):
+    """Lokasi bundle forest (array .npy yang bisa di-mmap) untuk file model .pkl"""
+    return os.path.splitext(model_path)[0] + ".forest"
+
+
+def metrics_path(model_path):
+    """Lokasi file metrik (keluaran train.py) untuk file model .pkl"""
+    return os.path.splitext(model_path)[0] + ".metrics.json"
+
+
+def _source_fingerprint(model_path):
+    """Ukuran + mtime file .pkl; bundle dengan sidik jari berbeda dianggap basi"""
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
 
 
 class WaterQualityModel:
-    def __init__(self, model_path="water_potability_model.pkl"):
+    """
+    Model ML dimuat secara lazy pada prediksi pertama.
+    
+    Forest sklearn disimpan sekali sebagai bundle array (<model>.forest/) lalu
+    dipetakan read-only dengan mmap: beberapa proses Streamlit berbagi halaman
+    memori yang sama dan tidak perlu unpickle sklearn. Estimator sklearn asli
+    (atribut `model`) baru dimuat jika benar-benar dibutuhkan.
+    """
+
+    def __init__(self, model_path="water_potability_model.pkl", lazy=True):
+        self.model_path = model_path
+        self.bundle_path = bundle_path(model_path)
+        self.load_report = None
+        self.feature_names = None
+        self.compiled = None
+        self._model = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._frame_fallback_logged = False
+        
+        if not os.path.exists(model_path) and read_meta(self.bundle_path) is None:
+            logger.error("Model file '%s' not found!", model_path)
+            raise FileNotFoundError(model_path)
+        
+        if not lazy:
+            self._ensure_loaded()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @property
+    def metrics(self):
+        """Metrik training dari <model>.metrics.json (train.py), atau None jika tidak ada"""
         try:
-            self.model = joblib.load(model_path)
-            print(f"Model loaded successfully from {model_path}")
-            
-            # Get feature names from the trained model
-            if hasattr(self.model, 'feature_names_in_'):
-                self.feature_names = list(self.model.feature_names_in_)
-                print(f"Model expects features: {self.feature_names}")
-            else:
-                # Fallback jika model tidak menyimpan feature names
-                # Sesuaikan dengan urutan training data
-                self.feature_names = ['ph', 'Solids', 'Turbidity']
-                print(f"Model doesn't have feature_names_in_, using default: {self.feature_names}")
-                
+            with open(metrics_path(self.model_path), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def model(self):
+        """Estimator sklearn asli; dimuat dari .pkl saat pertama kali diakses"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._unpickle()
+        return self._model
+
+    def _unpickle(self):
+        try:
+            model = joblib.load(self.model_path)
         except FileNotFoundError:
-            print(f"Error: Model file '{model_path}' not found!")
+            logger.error("Model file '%s' not found!", self.model_path)
             raise
         except Exception as e:
-            print(f"Error loading model: {str(e)}")
+            logger.error("Error loading model: %s", e)
             raise
+        logger.info("Model loaded successfully from %s", self.model_path)
+        return model
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+
+    def _load(self):
+        """Muat forest dari bundle mmap jika masih sesuai dengan .pkl, selain itu unpickle + kompilasi"""
+        started = time.perf_counter()
+        rss_before = resident_memory_mb()
+        fingerprint = _source_fingerprint(self.model_path)
+        meta = read_meta(self.bundle_path)
+        
+        if meta is not None and (fingerprint is None or meta.get('source') == fingerprint):
+            self.compiled = load_compiled(self.bundle_path)
+            self.feature_names = list(meta['model_feature_names'])
+            source = 'mmap'
+        else:
+            self._model = self._unpickle()
+            self._resolve_model_features()
+            if self._is_forest(self._model):
+                self.compiled = compile_forest(self._model)
+                self.compiled = self._save_bundle(fingerprint) or self.compiled
+            source = 'pickle'
+        
+        self._resolve_features()
+        self._loaded = True
+        
+        rss_after = resident_memory_mb()
+        self.load_report = {
+            'source': source,
+            'load_seconds': time.perf_counter() - started,
+            'rss_before_mb': rss_before,
+            'rss_after_mb': rss_after,
+            'bundle_mb': self.compiled.nbytes() / 2 ** 20 if self.compiled is not None else None,
+        }
+        logger.info(
+            "Model ready via %s in %.3fs (RSS %s -> %s MB)", source, self.load_report['load_seconds'],
+            f"{rss_before:.1f}" if rss_before is not None else "?",
+            f"{rss_after:.1f}" if rss_after is not None else "?",
+            extra={'fields': {'event': 'ml_model_load', 'model_path': self.model_path, **self.load_report}}
+        )
+
+    @staticmethod
+    def _is_forest(model):
+        return isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)) and model.n_outputs_ == 1
+
+    def _resolve_model_features(self):
+        # Get feature names from the trained model
+        if hasattr(self._model, 'feature_names_in_'):
+            self.feature_names = list(self._model.feature_names_in_)
+            logger.info("Model expects features: %s", self.feature_names)
+        else:
+            # Fallback jika model tidak menyimpan feature names
+            # Sesuaikan dengan urutan training data
+            self.feature_names = list(DEFAULT_FEATURES)
+            logger.warning("Model doesn't have feature_names_in_, using default: %s", self.feature_names)
+
+    def _save_bundle(self, fingerprint):
+        """
+        Tulis bundle ke direktori sementara lalu rename (proses lain tidak pernah
+        melihat bundle setengah jadi), kemudian muat ulang lewat mmap.
+        Gagal menulis (mis. direktori read-only) tidak fatal: forest di memori tetap dipakai.
+        """
+        tmp = f"{self.bundle_path}.tmp{os.getpid()}"
+        try:
+            self.compiled.save(tmp, source=fingerprint, model_feature_names=self.feature_names)
+            if os.path.isdir(self.bundle_path):
+                shutil.rmtree(self.bundle_path, ignore_errors=True)
+            os.rename(tmp, self.bundle_path)
+            logger.info("Forest bundle written to %s", self.bundle_path)
+            return load_compiled(self.bundle_path)
+        except OSError as e:
+            logger.warning("Could not write forest bundle %s: %s", self.bundle_path, e)
+            return None
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _resolve_features(self):
+        """
+        Pemetaan fitur -> input dihitung sekali. Urutan kolom diambil dari
+        feature_names (= feature_names_in_ model), sehingga buffer NumPy yang
+        diisi dengan urutan ini sudah lolos pemeriksaan nama fitur sklearn.
+        """
+        self.feature_index = [INPUT_INDEX.get(name.lower(), -1) for name in self.feature_names]
+        for name, index in zip(self.feature_names, self.feature_index):
+            if index < 0:
+                logger.warning("Unknown feature '%s', filling with 0", name)
+        self._slots = [(column, index) for column, index in enumerate(self.feature_index) if index >= 0]
+        
+        # Forest sklearn dikompilasi ke array datar (Forest_Compiler): tanpa DataFrame,
+        # validasi, atau dispatch joblib per panggilan; hasil identik dengan predict_proba
+        if self.compiled is not None:
+            logger.info("Forest compiled: %d trees, %d nodes", self.compiled.n_trees, self.compiled.n_nodes)
+
+    def _buffers(self):
+        """Buffer float64 (1, n_fitur) per thread untuk satu pembacaan"""
+        local = self._local
+        if not hasattr(local, 'row'):
+            local.row = np.zeros((1, len(self.feature_names)), dtype=np.float64)
+        return local.row
+
+    def predict_proba_one(self, ph, tds, ntu):
+        """
+        Peluang kelas untuk satu pembacaan.
+
+        Tanpa pandas hanya untuk forest terkompilasi (RandomForest/ExtraTrees
+        sklearn) dan model tanpa feature_names_in_ (mis. DecisionTable).
+        Estimator sklearn lain yang dilatih dengan nama fitur (pipeline,
+        boosting, dll.) tetap memakai DataFrame satu baris per panggilan agar
+        validasi nama fitur sklearn terpenuhi; hal ini dicatat sekali per model.
+        Nilai non-finite (NaN/inf) lewat jalur DataFrame agar divalidasi sklearn.
+        """
+        self._ensure_loaded()
+        values = (ph, tds, ntu)
+        if not (math.isfinite(ph) and math.isfinite(tds) and math.isfinite(ntu)):
+            return self.model.predict_proba(self._feature_frame(ph, tds, ntu))[0]
+        
+        row = self._buffers()
+        for column, index in self._slots:
+            row[0, column] = values[index]
+        
+        if self.compiled is not None:
+            return self.compiled.predict_proba(row[0])
+        
+        # Estimator sklearn dengan nama fitur butuh DataFrame; model lain (mis. DecisionTable) cukup array
+        if isinstance(self.model, BaseEstimator) and hasattr(self.model, 'feature_names_in_'):
+            if not self._frame_fallback_logged:
+                self._frame_fallback_logged = True
+                logger.info(
+                    "%s is not a compiled forest; single-reading predictions use a one-row DataFrame",
+                    type(self.model).__name__,
+                    extra={'fields': {'event': 'ml_dataframe_fallback', 'model_path': self.model_path,
+                                      'estimator': type(self.model).__name__}})
+            return self.model.predict_proba(self._feature_frame(ph, tds, ntu))[0]
+        return self.model.predict_proba(row)[0]
+
+    def _predict_one(self, ph, tds, ntu):
+        """(label, confidence) untuk satu pembacaan lewat jalur cepat"""
+        self._ensure_loaded()
+        if self.compiled is None and not hasattr(self.model, 'predict_proba'):
+            labels, confidences = self.predict_batch(ph, tds, ntu)
+            return str(labels[0]), int(confidences[0])
+        
+        proba = self.predict_proba_one(ph, tds, ntu)
+        best = int(proba.argmax())
+        classes = self.compiled.classes_ if self.compiled is not None else self.model.classes_
+        result = "Layak Minum" if classes[best] == 1 else "Tidak Layak Minum"
+        return result, int(proba[best] * 100)
+
+    def _feature_frame(self, ph, tds, ntu):
+        """DataFrame fitur dengan urutan kolom sesuai model (ph, Solids, Turbidity)"""
+        self._ensure_loaded()
+        ph = np.atleast_1d(np.asarray(ph, dtype=float))
+        tds = np.atleast_1d(np.asarray(tds, dtype=float))
+        ntu = np.atleast_1d(np.asarray(ntu, dtype=float))
+        
+        inputs = (ph, tds, ntu)
+        
+        # Model biasanya dilatih dengan kolom: ph, Solids (TDS), Turbidity (NTU)
+        columns = {
+            name: inputs[index] if index >= 0 else np.zeros(len(ph))
+            for name, index in zip(self.feature_names, self.feature_index)
+        }
+        return pd.DataFrame(columns, columns=self.feature_names)
+
+    def predict_batch(self, ph, tds, ntu):
+        """
+        Prediksi untuk banyak pembacaan sekaligus (array ph, tds, ntu).
+        Forest dijalankan sekali lewat predict_proba; label = kelas dengan
+        peluang terbesar (sama dengan model.predict).
+        Returns: (labels, confidences) - array label status dan confidence 0-100
+        """
+        X = self._feature_frame(ph, tds, ntu)
+        
+        # Batch besar lebih cepat di sklearn, tetapi hanya jika estimator sudah
+        # dimuat; forest hasil mmap tidak memicu unpickle hanya demi kecepatan
+        use_compiled = self.compiled is not None and (len(X) <= COMPILED_BATCH_MAX or self._model is None)
+        if use_compiled and np.isfinite(X.to_numpy()).all():
+            proba = self.compiled.predict_proba(X.to_numpy(dtype=np.float64))
+            pred = self.compiled.classes_[proba.argmax(axis=1)]
+            confidences = (proba.max(axis=1) * 100).astype(int)
+        elif hasattr(self.model, 'predict_proba'):
+            proba = self.model.predict_proba(X)
+            pred = self.model.classes_[proba.argmax(axis=1)]
+            confidences = (proba.max(axis=1) * 100).astype(int)
+        else:
+            pred = self.model.predict(X)
+            confidences = np.full(len(X), 85)  # Default confidence
+        
+        labels = np.where(pred == 1, "Layak Minum", "Tidak Layak Minum")
+        return labels, confidences
 
     def predict(self, ph, tds, ntu):
+        # Gagal memuat model adalah error konfigurasi, bukan prediksi default
+        self._ensure_loaded()
         try:
-            # Debug: Print input values
-            print(f"\nML Model Input:")
-            print(f"   pH  : {ph}")
-            print(f"   TDS : {tds}")
-            print(f"   NTU : {ntu}")
-            
-            # Create feature mapping based on model's expected features
-            # Model biasanya dilatih dengan kolom: ph, Solids, Turbidity
-            feature_mapping = {
-                'ph': ph,
-                'Solids': tds,  # TDS = Total Dissolved Solids
-                'Turbidity': ntu  # NTU = Turbidity
-            }
-            
-            # Buat DataFrame dengan urutan kolom sesuai model
-            data = []
-            for feature_name in self.feature_names:
-                if feature_name in feature_mapping:
-                    data.append(feature_mapping[feature_name])
-                elif feature_name.lower() == 'ph':
-                    data.append(ph)
-                elif feature_name.lower() in ['solids', 'tds']:
-                    data.append(tds)
-                elif feature_name.lower() in ['turbidity', 'ntu']:
-                    data.append(ntu)
-                else:
-                    # Jika ada feature lain yang tidak dikenali, isi dengan 0 atau NaN
-                    print(f"⚠️ Unknown feature '{feature_name}', filling with median value")
-                    data.append(0)
+            result, confidence = self._predict_one(ph, tds, ntu)
             
-            X = pd.DataFrame([data], columns=self.feature_names)
-            
-            print(f"DataFrame for prediction:")
-            print(X)
-            
-            # Predict
-            pred = self.model.predict(X)[0]
-            
-            # Get prediction probability if available
-            if hasattr(self.model, 'predict_proba'):
-                proba = self.model.predict_proba(X)[0]
-                print(f"Prediction probabilities: {proba}")
-            
-            result = "Layak Minum" if pred == 1 else "Tidak Layak Minum"
-            print(f"ML Prediction: {result}")
+            # Argumen log hanya dibentuk jika DEBUG aktif (tanpa biaya saat produksi)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "ML prediction ph=%s tds=%s ntu=%s -> %s (%d%%)", ph, tds, ntu, result, confidence,
+                    extra={'sampled': True, 'fields': {
+                        'event': 'ml_prediction', 'ph': ph, 'tds': tds, 'ntu': ntu,
+                        'result': result, 'confidence': confidence,
+                    }}
+                )
             
             return result
             
         except Exception as e:
-            print(f"Error during prediction: {str(e)}")
-            print(f"Input values: ph={ph}, tds={tds}, ntu={ntu}")
+            logger.error("Error during prediction: %s (ph=%s, tds=%s, ntu=%s)", e, ph, tds, ntu)
             # Return default prediction on error
             return "Tidak Layak Minum"
 
     def predict_with_confidence(self, ph, tds, ntu):
+        self._ensure_loaded()
         try:
-            # Create input DataFrame
-            feature_mapping = {
-                'ph': ph,
-                'Solids': tds,
-                'Turbidity': ntu
-            }
-            
-            data = [feature_mapping.get(fn, 0) for fn in self.feature_names]
-            X = pd.DataFrame([data], columns=self.feature_names)
-            
-            # Get prediction
-            pred = self.model.predict(X)[0]
-            result = "Layak Minum" if pred == 1 else "Tidak Layak Minum"
-            
-            # Get confidence if model supports probability
-            if hasattr(self.model, 'predict_proba'):
-                proba = self.model.predict_proba(X)[0]
-                confidence = int(max(proba) * 100)
-            else:
-                confidence = 85  # Default confidence
-            
-            return result, confidence
+            return self._predict_one(ph, tds, ntu)
             
         except Exception as e:
-            print(f"Error in predict_with_confidence: {str(e)}")
-            return "Tidak Layak Minum", 50
\ No newline at end of file
+            logger.error("Error in predict_with_confidence: %s", e)
+            return "Tidak Layak Minum", 50
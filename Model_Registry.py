@@ -0,0 +1,262 @@
+"""
+Registry model ML berversi dengan hot swap di dashboard yang sedang berjalan.
+
+Struktur direktori:
+
+    model_registry/
+        v0001/model.pkl, metadata.json
+        v0002/model.pkl, metadata.json
+        CURRENT            <- nama versi aktif (ditulis atomik)
+
+metadata.json berisi fitur, kelas model, hash SHA-256 file model dan data
+training, serta metrik. Versi baru ditulis ke direktori sementara lalu
+di-rename, sehingga pembaca tidak pernah melihat versi setengah jadi.
+
+HotSwapModel membungkus WaterQualityModel: thread latar memantau CURRENT,
+memuat versi baru (unpickle/mmap + kompilasi), menjalankan prediksi warm-up,
+lalu menukar referensi model sekaligus. Prediksi di loop refresh tidak
+pernah menunggu pemuatan versi baru.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+import joblib
+import numpy as np
+
+from Machine_Learning import BASE_DIR, POTABILITY_FILE, SENSOR_FILE, WaterQualityModel
+from Machine_Learning import logger as ml_logger
+
+
+# Anak logger Machine_Learning: ikut handler/format dari configure_logging
+logger = ml_logger.getChild('registry')
+
+REGISTRY_DIR = os.path.join(BASE_DIR, "model_registry")
+CURRENT_FILE = "CURRENT"
+MODEL_FILE = "model.pkl"
+METADATA_FILE = "metadata.json"
+VERSION_PATTERN = re.compile(r"^v(\d+)$")
+
+# Interval pemeriksaan versi baru (detik) dan pembacaan untuk prediksi warm-up
+WATCH_INTERVAL = 10.0
+WARMUP_READING = (7.0, 300.0, 1.0)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def training_data_hash(paths):
+    """Hash per file data training + hash gabungan (urutan file diperhitungkan)"""
+    files = {os.path.basename(path): file_sha256(path) for path in paths}
+    combined = hashlib.sha256("".join(f"{name}:{digest}\n" for name, digest in files.items()).encode())
+    return files, combined.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# =============================
+# REGISTRY
+# =============================
+
+class ModelRegistry:
+    """Direktori versi model; lihat docstring modul untuk strukturnya"""
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def _version_dirs(self):
+        """(nomor, nama) semua direktori vNNNN, termasuk yang belum lengkap"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted((int(match.group(1)), name) for name in names if (match := VERSION_PATTERN.match(name)))
+
+    def versions(self):
+        """Versi lengkap (ada metadata.json), urut dari yang terlama"""
+        return [
+            name for _, name in self._version_dirs()
+            if os.path.exists(os.path.join(self.root, name, METADATA_FILE))
+        ]
+
+    def current_version(self):
+        """Versi aktif dari CURRENT; tanpa CURRENT dipakai versi terbaru (None jika kosong)"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), encoding='utf-8') as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except OSError:
+            pass
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def model_path(self, version):
+        return os.path.join(self.root, version, MODEL_FILE)
+
+    def metadata(self, version):
+        with open(os.path.join(self.root, version, METADATA_FILE), encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, version=None, lazy=True):
+        """WaterQualityModel untuk versi tertentu (default: versi aktif)"""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"Registry model kosong: {self.root}")
+        return WaterQualityModel(self.model_path(version), lazy=lazy)
+
+    def publish(self, model_path, metrics=None, training_data=(POTABILITY_FILE, SENSOR_FILE), promote=True):
+        """
+        Salin model .pkl sebagai versi baru beserta metadata.
+        Returns: nama versi baru (mis. 'v0003')
+        """
+        estimator = joblib.load(model_path)
+        files, combined = training_data_hash(training_data) if training_data else ({}, None)
+        features = getattr(estimator, 'feature_names_in_', None)
+        metadata = {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'model_file': MODEL_FILE,
+            'model_sha256': file_sha256(model_path),
+            'model_class': type(estimator).__name__,
+            'features': list(features) if features is not None else None,
+            'classes': np.asarray(getattr(estimator, 'classes_', [])).tolist(),
+            'training_data': files,
+            'training_data_hash': combined,
+            'metrics': metrics or {},
+        }
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f".publish-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            shutil.copyfile(model_path, os.path.join(tmp, MODEL_FILE))
+            # Nomor versi dicoba ulang jika proses lain menerbitkan versi yang sama lebih dulu
+            while True:
+                version = f"v{max((n for n, _ in self._version_dirs()), default=0) + 1:04d}"
+                metadata['version'] = version
+                with open(os.path.join(tmp, METADATA_FILE), 'w', encoding='utf-8') as f:
+                    json.dump(metadata, f, indent=2)
+                try:
+                    os.rename(tmp, os.path.join(self.root, version))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(self.root, version)):
+                        raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        logger.info("Model %s published as %s", model_path, version)
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version):
+        """Jadikan versi aktif (dipakai HotSwapModel pada pemeriksaan berikutnya)"""
+        if version not in self.versions():
+            raise ValueError(f"Versi tidak ditemukan di registry: {version}")
+        _write_atomic(os.path.join(self.root, CURRENT_FILE), version + "\n")
+        logger.info("Model version %s promoted", version)
+
+
+# =============================
+# HOT SWAP
+# =============================
+
+class HotSwapModel:
+    """
+    WaterQualityModel yang mengikuti versi aktif registry.
+
+    Semua atribut/method (predict, predict_with_confidence, predict_batch,
+    load_report, ...) diteruskan ke model versi aktif. Versi baru dimuat dan
+    di-warm-up di thread latar; penukaran hanya satu assignment referensi,
+    sehingga setiap panggilan memakai satu versi secara utuh.
+    """
+
+    def __init__(self, registry, interval=WATCH_INTERVAL, watch=True):
+        self.registry = registry
+        self.interval = interval
+        self.version = registry.current_version()
+        self._current = registry.load(self.version)
+        self._failed_version = None
+        self._stop = threading.Event()
+        self._thread = None
+        if watch:
+            self.start()
+
+    def __getattr__(self, name):
+        # Hanya dipanggil untuk atribut yang tidak ada di HotSwapModel sendiri
+        if name == '_current':
+            raise AttributeError(name)
+        return getattr(self._current, name)
+
+    @property
+    def metadata(self):
+        return self.registry.metadata(self.version)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-registry-watch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_for_update()
+            except Exception:
+                logger.exception("Model registry check failed")
+
+    def check_for_update(self):
+        """
+        Muat versi aktif registry jika berbeda dari versi yang dipakai.
+        Versi baru harus lolos prediksi warm-up sebelum ditukar; versi yang
+        gagal tidak dicoba ulang sampai versi aktif berubah lagi.
+        Mengembalikan True jika model ditukar.
+        """
+        version = self.registry.current_version()
+        if version is None or version == self.version or version == self._failed_version:
+            return False
+
+        try:
+            candidate = self.registry.load(version, lazy=False)
+            proba = candidate.predict_proba_one(*WARMUP_READING)
+            if not np.isfinite(proba).all() or not np.isclose(proba.sum(), 1.0):
+                raise ValueError(f"Warm-up prediction tidak valid: {proba}")
+        except Exception as e:
+            self._failed_version = version
+            logger.error("Model version %s rejected, keeping %s: %s: %s", version, self.version, type(e).__name__, e)
+            return False
+
+        previous = self.version
+        self._current = candidate
+        self.version = version
+        logger.info(
+            "Model swapped %s -> %s (loaded via %s in %.3fs)", previous, version,
+            candidate.load_report['source'], candidate.load_report['load_seconds'],
+            extra={'fields': {'event': 'ml_model_swap', 'from': previous, 'to': version}}
+        )
+        return True
+
+    def __repr__(self):
+        return f"HotSwapModel(registry={self.registry.root!r}, version={self.version!r})"
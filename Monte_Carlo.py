@@ -0,0 +1,116 @@
+"""
+Propagasi ketidakpastian sensor (Monte Carlo) melalui keputusan hybrid.
+
+Setiap pembacaan diganggu (perturbed) ribuan kali sesuai model noise per
+sensor, lalu semua sampel dievaluasi sekaligus lewat evaluate_water_quality_batch
+dan WaterQualityModel.predict_batch (satu kali predict_proba). Hasilnya adalah
+peluang tiap kelas status dan sebaran confidence, bukan satu status tunggal.
+"""
+
+import time
+
+import numpy as np
+
+import Sistem_Pakar as sp
+
+
+DEFAULT_SAMPLES = 2000
+
+
+class NoiseModel:
+    """
+    Noise Gaussian aditif: sigma = absolute + relative * |nilai|,
+    hasil sampel dipotong ke [low, high].
+    """
+
+    def __init__(self, absolute=0.0, relative=0.0, low=0.0, high=None):
+        if absolute < 0 or relative < 0:
+            raise ValueError("absolute dan relative harus >= 0")
+        self.absolute = absolute
+        self.relative = relative
+        self.low = low
+        self.high = high
+
+    def sample(self, value, n, rng):
+        sigma = self.absolute + self.relative * abs(value)
+        samples = value + rng.normal(0.0, sigma, n) if sigma > 0 else np.full(n, float(value))
+        return np.clip(samples, self.low, self.high)
+
+    def __repr__(self):
+        return f"NoiseModel(absolute={self.absolute}, relative={self.relative}, low={self.low}, high={self.high})"
+
+
+# Perkiraan noise sesuai cara firmware (Kode_Esp32.ino) membaca sensor:
+# - pH: median dari 10 bacaan ADC -> noise kecil
+# - TDS: satu bacaan ADC mentah, kurva kubik -> noise relatif paling besar
+# - Kekeruhan: rata-rata 30 bacaan ADC -> noise kecil plus galat kalibrasi relatif
+DEFAULT_NOISE = {
+    'ph': NoiseModel(absolute=0.05, low=0.0, high=14.0),
+    'tds': NoiseModel(absolute=10.0, relative=0.05),
+    'ntu': NoiseModel(absolute=0.2, relative=0.03),
+}
+
+
+class UncertaintyResult:
+    """Ringkasan hasil Monte Carlo untuk satu pembacaan"""
+
+    __slots__ = (
+        'ph', 'tds', 'ntu', 'n_samples', 'status_probability', 'es_status_probability',
+        'ml_layak_probability', 'confidence_mean', 'confidence_std', 'confidence_percentiles',
+        'no_rules_fraction', 'elapsed_s',
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def most_likely_status(self):
+        return max(self.status_probability, key=self.status_probability.get)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        probabilities = ", ".join(f"{label}: {p:.1%}" for label, p in self.status_probability.items())
+        return (f"UncertaintyResult({probabilities}; confidence {self.confidence_mean:.1f} "
+                f"± {self.confidence_std:.1f}, n={self.n_samples})")
+
+
+def perturb(ph, tds, ntu, n_samples=DEFAULT_SAMPLES, noise=None, rng=None):
+    """Sampel (ph, tds, ntu) terganggu untuk satu pembacaan; noise per variabel bisa dioverride"""
+    noise = {**DEFAULT_NOISE, **(noise or {})}
+    rng = rng if rng is not None else np.random.default_rng()
+    return tuple(noise[var].sample(value, n_samples, rng) for var, value in zip(sp.VARIABLES, (ph, tds, ntu)))
+
+
+def propagate(ph, tds, ntu, model=None, n_samples=DEFAULT_SAMPLES, noise=None, seed=None):
+    """
+    Jalankan Monte Carlo untuk satu pembacaan sensor.
+
+    model: WaterQualityModel (opsional); tanpa model hanya sistem pakar yang dievaluasi.
+    noise: dict variabel -> NoiseModel untuk mengganti DEFAULT_NOISE.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    ph_s, tds_s, ntu_s = perturb(ph, tds, ntu, n_samples, noise, rng)
+
+    ml_labels = model.predict_batch(ph_s, tds_s, ntu_s)[0] if model is not None else None
+    final_status, details, confidence, has_active_rules = sp.evaluate_water_quality_batch(ph_s, tds_s, ntu_s, ml_labels)
+
+    status_counts = np.bincount(final_status, minlength=len(sp.STATUS_LABELS)) / n_samples
+    es_counts = np.bincount(details['es_status'], minlength=len(sp.STATUS_LABELS)) / n_samples
+    p5, p50, p95 = np.percentile(confidence, [5, 50, 95])
+
+    return UncertaintyResult(
+        ph=ph, tds=tds, ntu=ntu,
+        n_samples=n_samples,
+        status_probability=dict(zip(sp.STATUS_LABELS, status_counts.tolist())),
+        es_status_probability=dict(zip(sp.STATUS_LABELS, es_counts.tolist())),
+        ml_layak_probability=float((ml_labels == "Layak Minum").mean()) if ml_labels is not None else None,
+        confidence_mean=float(confidence.mean()),
+        confidence_std=float(confidence.std()),
+        confidence_percentiles={'p5': float(p5), 'p50': float(p50), 'p95': float(p95)},
+        no_rules_fraction=float((~has_active_rules).mean()),
+        elapsed_s=time.perf_counter() - started,
+    )
@@ -0,0 +1,304 @@
+"""
+Pembelajaran online (opt-in) dari pembacaan sensor yang diberi label.
+
+- Label berasal dari sistem pakar (status "Layak Minum" / "Tidak Layak Minum";
+  "Cukup Layak Minum" tidak dipakai sebagai label) atau dari operator.
+  Label operator mengalahkan label sistem pakar untuk pembacaan yang sama.
+- OnlineLearner.record hanya memasukkan pembacaan ke antrean di memori;
+  thread worker menulisnya ke buffer CSV (online_readings.csv).
+- Sesuai jadwal (interval + jumlah pembacaan baru minimum) worker melatih
+  model challenger di proses terpisah (tidak memegang GIL dashboard):
+  parameter sama dengan model aktif, data = data training notebook +
+  pembacaan online bagian train.
+- Hold-out = bagian pembacaan online yang tidak pernah dipakai training,
+  dipilih dari hash fitur (stabil antar siklus). Model aktif dilatih dengan
+  seluruh data notebook, jadi hanya pembacaan online yang adil sebagai hold-out.
+- Challenger diterbitkan + dipromosikan ke registry model hanya jika
+  akurasinya pada hold-out melampaui model aktif; HotSwapModel di dashboard
+  lalu menukar model di latar belakang.
+"""
+
+import collections
+import concurrent.futures
+import csv
+import datetime
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from Machine_Learning import BASE_DIR, DEFAULT_FEATURES, POTABILITY_FILE, SENSOR_FILE, TARGET
+from Machine_Learning import logger as ml_logger
+
+
+logger = ml_logger.getChild('online')
+
+BUFFER_FILE = os.path.join(BASE_DIR, "online_readings.csv")
+BUFFER_COLUMNS = ['timestamp', 'ph', 'Solids', 'Turbidity', TARGET, 'source']
+SOURCES = ('expert', 'operator')
+
+# Status sistem pakar -> label Potability; "Cukup Layak Minum" sengaja tidak ada
+STATUS_LABELS = {"Layak Minum": 1, "Tidak Layak Minum": 0}
+
+HOLDOUT_PERCENT = 20
+UPDATE_INTERVAL = 3600.0  # detik antar siklus training
+MIN_NEW_READINGS = 50     # pembacaan baru minimum sejak siklus terakhir
+MIN_HOLDOUT = 30          # hold-out minimum sebelum promosi dipertimbangkan
+MIN_IMPROVEMENT = 0.0     # challenger harus > akurasi model aktif + nilai ini
+RECENT_KEYS = 2000        # pembacaan identik (rerun Streamlit) tidak dicatat ulang
+SEED = 42
+
+
+# =============================
+# BUFFER
+# =============================
+
+class ReadingBuffer:
+    """Buffer pembacaan berlabel: CSV append-only"""
+
+    def __init__(self, path=BUFFER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, rows):
+        """rows: iterable (timestamp, ph, tds, ntu, label, source)"""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(BUFFER_COLUMNS)
+                writer.writerows(rows)
+
+    def load(self):
+        """
+        DataFrame pembacaan (kolom BUFFER_COLUMNS). Untuk fitur yang sama,
+        label operator terakhir dipakai; tanpa label operator, label terakhir.
+        """
+        try:
+            df = pd.read_csv(self.path)
+        except (OSError, pd.errors.EmptyDataError):
+            return pd.DataFrame(columns=BUFFER_COLUMNS)
+        df['priority'] = (df['source'] == 'operator').astype(int)
+        df = df.sort_values(['priority', 'timestamp'], kind='stable')
+        df = df.drop_duplicates(DEFAULT_FEATURES, keep='last').drop(columns='priority')
+        return df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+def split_holdout(df, percent=HOLDOUT_PERCENT):
+    """(train, holdout) berdasarkan hash fitur: pembacaan yang sama selalu di sisi yang sama"""
+    if df.empty:
+        return df, df
+    in_holdout = pd.util.hash_pandas_object(df[DEFAULT_FEATURES], index=False).to_numpy() % 100 < percent
+    return df[~in_holdout], df[in_holdout]
+
+
+# =============================
+# CHALLENGER (proses terpisah)
+# =============================
+
+def train_challenger(champion_path, buffer_path, output_path, holdout_percent=HOLDOUT_PERCENT, seed=SEED):
+    """
+    Latih challenger dan bandingkan dengan model aktif pada hold-out online.
+    Dijalankan di proses worker; mengembalikan dict laporan (tanpa objek model).
+    """
+    import joblib
+    from sklearn.base import clone
+    from sklearn.ensemble import RandomForestClassifier
+
+    from Machine_Learning import load_training_data
+    from train import FINAL_PARAMS
+
+    started = time.perf_counter()
+    champion = joblib.load(champion_path)
+    online_train, holdout = split_holdout(ReadingBuffer(buffer_path).load(), holdout_percent)
+
+    base_X, base_y = load_training_data()
+    X = pd.concat([base_X, online_train[DEFAULT_FEATURES]], ignore_index=True)
+    y = pd.concat([base_y, online_train[TARGET].astype(int)], ignore_index=True)
+
+    # Parameter sama dengan model aktif jika berupa Random Forest, selain itu setelan notebook
+    if isinstance(champion, RandomForestClassifier):
+        challenger = clone(champion).set_params(random_state=seed, n_jobs=None)
+    else:
+        challenger = RandomForestClassifier(**FINAL_PARAMS, random_state=seed)
+    challenger.fit(X, y)
+    joblib.dump(challenger, output_path)
+
+    report = {
+        'base_rows': len(base_X),
+        'online_train_rows': len(online_train),
+        'holdout_rows': len(holdout),
+        'champion_accuracy': None,
+        'challenger_accuracy': None,
+        'train_seconds': time.perf_counter() - started,
+    }
+    if len(holdout):
+        X_holdout = holdout[DEFAULT_FEATURES]
+        y_holdout = holdout[TARGET].astype(int).to_numpy()
+        report['champion_accuracy'] = float((champion.predict(X_holdout) == y_holdout).mean())
+        report['challenger_accuracy'] = float((challenger.predict(X_holdout) == y_holdout).mean())
+    return report
+
+
+# =============================
+# ONLINE LEARNER
+# =============================
+
+class OnlineLearner:
+    """
+    Pencatat pembacaan berlabel + worker latar untuk siklus challenger.
+    Tidak ada method yang dipanggil dashboard melakukan I/O atau training.
+    """
+
+    def __init__(self, registry, buffer=None, interval=UPDATE_INTERVAL, min_new=MIN_NEW_READINGS,
+                 min_holdout=MIN_HOLDOUT, min_improvement=MIN_IMPROVEMENT, start=True):
+        self.registry = registry
+        self.buffer = buffer or ReadingBuffer()
+        self.interval = interval
+        self.min_new = min_new
+        self.min_holdout = min_holdout
+        self.min_improvement = min_improvement
+
+        self.pending = len(self.buffer.load())  # pembacaan baru sejak siklus terakhir
+        self.last_cycle = None
+        self.last_report = None
+        self.cycles = 0
+        self.promotions = 0
+
+        self._queue = queue.Queue()
+        self._recent = set()
+        self._recent_order = collections.deque()
+        self._recent_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._cycle_lock = threading.Lock()
+        self._thread = None
+        # spawn: proses training tidak mewarisi thread/state Streamlit
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn')
+        )
+        if start:
+            self.start()
+
+    def record(self, ph, tds, ntu, label, source='expert'):
+        """
+        Catat pembacaan berlabel (label: status sistem pakar atau 0/1).
+        Mengembalikan False jika label tidak dipakai atau pembacaan sudah tercatat.
+        """
+        if source not in SOURCES:
+            raise ValueError(f"source harus salah satu dari {SOURCES}")
+        if isinstance(label, str):
+            label = STATUS_LABELS.get(label.strip())
+        if label not in (0, 1):
+            return False
+
+        key = (round(float(ph), 4), round(float(tds), 4), round(float(ntu), 4), int(label), source)
+        with self._recent_lock:
+            if key in self._recent:
+                return False
+            self._recent.add(key)
+            self._recent_order.append(key)
+            if len(self._recent_order) > RECENT_KEYS:
+                self._recent.discard(self._recent_order.popleft())
+
+        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        self._queue.put_nowait((timestamp, key[0], key[1], key[2], key[3], source))
+        return True
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="online-learning", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=True)
+
+    def _drain(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            self.buffer.append(rows)
+            self.pending += len(rows)
+
+    def _due(self):
+        elapsed = time.monotonic() - self.last_cycle if self.last_cycle is not None else self.interval
+        return self.pending >= self.min_new and elapsed >= self.interval
+
+    def _run(self):
+        while not self._stop.wait(1.0):
+            try:
+                self._drain()
+                if self._due():
+                    self.run_cycle()
+            except Exception:
+                logger.exception("Online learning cycle failed")
+
+    def run_cycle(self):
+        """
+        Satu siklus: latih challenger (proses worker), bandingkan pada hold-out,
+        promosikan jika lebih baik. Mengembalikan laporan siklus.
+        """
+        with self._cycle_lock:
+            self._drain()
+            version = self.registry.current_version()
+            if version is None:
+                raise RuntimeError(f"Registry model kosong: {self.registry.root}")
+
+            # Siklus gagal pun menunggu interval berikutnya, tidak diulang tiap detik
+            self.last_cycle = time.monotonic()
+            fd, output_path = tempfile.mkstemp(suffix=".pkl", prefix="challenger-")
+            os.close(fd)
+            try:
+                report = self._pool.submit(
+                    train_challenger, self.registry.model_path(version), self.buffer.path, output_path
+                ).result()
+                report.update(champion_version=version, promoted_version=None,
+                              finished_at=datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'))
+
+                champion, challenger = report['champion_accuracy'], report['challenger_accuracy']
+                if report['holdout_rows'] < self.min_holdout:
+                    report['decision'] = f"hold-out {report['holdout_rows']} < {self.min_holdout}, tidak dipromosikan"
+                elif challenger > champion + self.min_improvement:
+                    metrics = {'online_holdout_accuracy': challenger, 'champion_holdout_accuracy': champion,
+                               'online_train_rows': report['online_train_rows'], 'holdout_rows': report['holdout_rows']}
+                    report['promoted_version'] = self.registry.publish(
+                        output_path, metrics=metrics, training_data=(POTABILITY_FILE, SENSOR_FILE, self.buffer.path)
+                    )
+                    report['decision'] = f"dipromosikan ({challenger:.4f} > {champion:.4f})"
+                    self.promotions += 1
+                else:
+                    report['decision'] = f"tidak lebih baik ({challenger:.4f} <= {champion:.4f} + {self.min_improvement})"
+            finally:
+                os.remove(output_path)
+
+            self.pending = 0
+            self.last_report = report
+            self.cycles += 1
+            logger.info("Online learning cycle vs %s: %s", version, report['decision'],
+                        extra={'fields': {'event': 'ml_online_cycle', **report}})
+            return report
+
+    def status(self):
+        """Ringkasan untuk dashboard (tanpa I/O)"""
+        return {
+            'queued': self._queue.qsize(),
+            'pending': self.pending,
+            'cycles': self.cycles,
+            'promotions': self.promotions,
+            'last_report': self.last_report,
+        }
@@ -0,0 +1,370 @@
+"""
+Ingest data sensor berbasis push dari Firebase Realtime Database.
+
+Sebelumnya dashboard memanggil db.reference(path).get() penuh pada setiap
+rerun st_autorefresh: latensi sampai 3 detik dan setiap rerun membayar satu
+read walaupun data tidak berubah.
+
+SensorStream membuka satu koneksi REST streaming (Server-Sent Events,
+GET <db_url>/<path>.json dengan Accept: text/event-stream) di thread latar
+belakang dan menyimpan salinan node di memori:
+
+- event put/patch diterapkan ke salinan node; pembacaan lengkap (ph, tds,
+  ntu, timestamp) ditambahkan ke RingBuffer saat field timestamp ditulis
+  (ESP32 menulis ph, tds, ntu lalu timestamp terakhir), sehingga tulisan
+  per field tidak menghasilkan pembacaan setengah jadi dan tulisan status
+  dari dashboard tidak menghasilkan pembacaan baru
+- keep-alive diabaikan; koneksi yang diam > read_timeout dianggap putus
+- auth_revoked (token kedaluwarsa): sambung ulang segera dengan token baru
+- stop() membangunkan thread di tahap mana pun (menunggu header respons
+  maupun membaca event); koneksi TCP yang sedang dibuka paling lama
+  CONNECT_TIMEOUT detik. state menjadi 'stopped' hanya setelah thread keluar
+- cancel (akses ditolak), error HTTP/jaringan, atau stream berakhir:
+  sambung ulang dengan exponential backoff + jitter; backoff direset setelah
+  koneksi berhasil menerima snapshot awal
+
+Dashboard membaca RingBuffer (tanpa I/O jaringan) selama stream live.
+"""
+
+import http.client
+import json
+import logging
+import random
+import socket
+import threading
+import time
+import urllib.parse
+from collections import deque
+
+
+logger = logging.getLogger(__name__)
+
+READING_FIELDS = ('ph', 'tds', 'ntu')
+TIMESTAMP_FIELD = 'timestamp'
+BUFFER_SIZE = 512          # pembacaan terakhir yang disimpan
+READ_TIMEOUT = 90.0        # detik; Firebase mengirim keep-alive tiap ~30 detik
+CONNECT_TIMEOUT = 10.0     # detik untuk membuka koneksi TCP/TLS
+BACKOFF_INITIAL = 1.0      # detik sebelum percobaan sambung ulang pertama
+BACKOFF_MAX = 60.0
+MAX_REDIRECTS = 5          # Firebase dapat mengalihkan stream ke server lain (307)
+
+
+class StreamCancelled(Exception):
+    """Server mengirim event cancel (mis. rules database menolak akses)"""
+
+
+class AuthRevoked(Exception):
+    """Token akses kedaluwarsa/dicabut; sambung ulang dengan token baru"""
+
+
+def stream_url(db_url, path, access_token=None, auth_override=None):
+    """URL REST streaming untuk node path"""
+    url = db_url.rstrip('/') + '/' + path.strip('/') + '.json'
+    params = {}
+    if access_token:
+        params['access_token'] = access_token
+    if auth_override is not None:
+        params['auth_variable_override'] = json.dumps(auth_override, separators=(',', ':'))
+    return url + ('?' + urllib.parse.urlencode(params) if params else '')
+
+
+def iter_events(lines):
+    """(event, data) dari baris-baris SSE (bytes atau str, dengan/tanpa newline)"""
+    event, data = None, []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r\n')
+        if not line:
+            if event is not None or data:
+                yield event or 'message', "\n".join(data)
+            event, data = None, []
+        elif line.startswith(':'):
+            continue
+        else:
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'event':
+                event = value
+            elif field == 'data':
+                data.append(value)
+
+
+def apply_event(state, path, data, merge=False):
+    """
+    Salinan node setelah event put (merge=False) atau patch (merge=True) di
+    path relatif ('/', '/ph', ...). Nilai None menghapus child.
+    """
+    keys = [key for key in path.split('/') if key]
+    if not keys:
+        if merge:
+            state = dict(state) if isinstance(state, dict) else {}
+            for key, value in (data or {}).items():
+                _set_child(state, [key], value)
+            return state
+        return data
+    state = dict(state) if isinstance(state, dict) else {}
+    if merge:
+        for key, value in (data or {}).items():
+            _set_child(state, keys + [key], value)
+    else:
+        _set_child(state, keys, data)
+    return state
+
+
+def _set_child(node, keys, value):
+    for key in keys[:-1]:
+        child = node.get(key)
+        node[key] = child = dict(child) if isinstance(child, dict) else {}
+        node = child
+    if value is None:
+        node.pop(keys[-1], None)
+    else:
+        node[keys[-1]] = value
+
+
+def parse_reading(node):
+    """Pembacaan {ph, tds, ntu, timestamp} dari node sensor; None jika belum lengkap"""
+    if not isinstance(node, dict) or any(field not in node for field in READING_FIELDS):
+        return None
+    try:
+        reading = {field: float(node[field]) for field in READING_FIELDS}
+    except (TypeError, ValueError):
+        return None
+    reading[TIMESTAMP_FIELD] = node.get(TIMESTAMP_FIELD, "00:00:00")
+    return reading
+
+
+def _interrupt(sock):
+    # Dipanggil dari thread lain: shutdown membangunkan recv yang sedang menunggu,
+    # close() tetap dilakukan oleh thread stream
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+# =============================
+# RING BUFFER
+# =============================
+
+class RingBuffer:
+    """Pembacaan terakhir (deque berukuran tetap), aman dipakai antar thread"""
+
+    def __init__(self, maxlen=BUFFER_SIZE):
+        self._items = deque(maxlen=maxlen)
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    @property
+    def seq(self):
+        """Nomor urut pembacaan terakhir (0 = kosong)"""
+        return self._seq
+
+    def append(self, reading):
+        with self._condition:
+            self._seq += 1
+            self._items.append(dict(reading, seq=self._seq, received_at=time.time()))
+            self._condition.notify_all()
+            return self._seq
+
+    def latest(self):
+        with self._condition:
+            return dict(self._items[-1]) if self._items else None
+
+    def since(self, seq):
+        """Pembacaan dengan nomor urut > seq (yang masih ada di buffer)"""
+        with self._condition:
+            return [dict(item) for item in self._items if item['seq'] > seq]
+
+    def snapshot(self):
+        return self.since(0)
+
+    def wait(self, after_seq, timeout=None):
+        """Tunggu pembacaan dengan nomor urut > after_seq; True jika ada"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._seq > after_seq, timeout)
+
+
+# =============================
+# STREAM
+# =============================
+
+class SensorStream:
+    """Listener REST streaming untuk satu node sensor di thread latar belakang"""
+
+    def __init__(self, db_url, path, token_provider=None, auth_override=None, buffer_size=BUFFER_SIZE,
+                 read_timeout=READ_TIMEOUT, backoff_initial=BACKOFF_INITIAL, backoff_max=BACKOFF_MAX,
+                 start=True):
+        self.db_url = db_url
+        self.path = path
+        self.buffer = RingBuffer(buffer_size)
+        self.read_timeout = read_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.state = 'stopped'
+        self.connects = 0
+        self.events = 0
+        self.last_event_at = None
+        self.last_error = None
+        self._token_provider = token_provider
+        self._auth_override = auth_override
+        self._node = None
+        self._last_key = None
+        self._connection = None  # HTTPConnection yang sedang dipakai thread stream
+        self._sock = None        # socket-nya (connection.sock menjadi None setelah respons Connection: close)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if start:
+            self.start()
+
+    @property
+    def is_live(self):
+        """Stream tersambung dan snapshot awal sudah diterima"""
+        return self.state == 'live'
+
+    def latest(self):
+        return self.buffer.latest()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            if not self._stop.is_set():
+                return
+            self._thread.join()  # stop() sebelumnya belum selesai
+        self._stop.clear()
+        self.state = 'connecting'
+        self._thread = threading.Thread(target=self._run, name=f"sensor-stream{self.path}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=CONNECT_TIMEOUT + 1.0):
+        """Hentikan thread stream; True jika thread sudah keluar dalam timeout"""
+        with self._lock:
+            self._stop.set()
+            sock = self._sock
+        if sock is not None:
+            _interrupt(sock)
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def status(self):
+        return {
+            'path': self.path, 'state': self.state, 'connects': self.connects, 'events': self.events,
+            'readings': self.buffer.seq, 'last_event_at': self.last_event_at, 'last_error': self.last_error,
+        }
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            self.state = 'connecting'
+            try:
+                self._stream_once()
+                error = ConnectionError("stream ditutup server")
+            except Exception as e:  # termasuk error token provider; thread tidak boleh mati
+                error = e
+            if self._stop.is_set():
+                break
+            if self.state == 'live':
+                attempt = 0  # koneksi sempat sehat: mulai lagi dari backoff awal
+            if isinstance(error, AuthRevoked):
+                delay = 0.0
+            else:
+                delay = self._backoff(attempt)
+                attempt += 1
+            self.state = 'backoff'
+            self.last_error = f"{type(error).__name__}: {error}"
+            logger.warning("Sensor stream %s disconnected, retry in %.1fs: %s", self.path, delay, self.last_error,
+                           extra={'fields': {'event': 'stream_disconnect', 'path': self.path,
+                                             'retry_seconds': round(delay, 3), 'error': self.last_error}})
+            self._stop.wait(delay)
+        self.state = 'stopped'
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_initial * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _token(self):
+        return self._token_provider() if self._token_provider is not None else None
+
+    def _set_connection(self, connection):
+        """
+        Ganti koneksi aktif (koneksi lama ditutup). Koneksi didaftarkan sebelum
+        dibuka agar stop() selalu bisa menjangkaunya; gagal jika stop() sudah dipanggil.
+        """
+        with self._lock:
+            previous, self._connection = self._connection, connection
+            self._sock = connection.sock if connection is not None else None
+            stopped = self._stop.is_set()
+        if previous is not None and previous is not connection:
+            previous.close()
+        if connection is not None and stopped:
+            raise ConnectionAbortedError("stream dihentikan")
+
+    def _open(self):
+        url = stream_url(self.db_url, self.path, self._token(), self._auth_override)
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            connection = connection_class(parts.netloc, timeout=CONNECT_TIMEOUT)
+            self._set_connection(connection)
+            connection.connect()
+            # stop() selama connect() tidak punya socket untuk dimatikan: periksa lagi
+            self._set_connection(connection)
+            connection.sock.settimeout(self.read_timeout)
+            connection.request('GET', urllib.parse.urlunsplit(('', '', parts.path, parts.query, '')),
+                               headers={'Accept': 'text/event-stream', 'Cache-Control': 'no-cache'})
+            response = connection.getresponse()
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                url = urllib.parse.urljoin(url, response.getheader('Location'))
+                continue
+            if response.status != 200:
+                body = response.read(512).decode('utf-8', 'replace')
+                raise ConnectionError(f"HTTP {response.status}: {body}")
+            return response
+        raise ConnectionError("terlalu banyak redirect")
+
+    def _stream_once(self):
+        try:
+            response = self._open()
+            self.connects += 1
+            for event, data in iter_events(iter(response.readline, b'')):
+                self.events += 1
+                self.last_event_at = time.time()
+                if event in ('put', 'patch'):
+                    self._handle(json.loads(data), merge=event == 'patch')
+                elif event == 'cancel':
+                    raise StreamCancelled(data)
+                elif event == 'auth_revoked':
+                    raise AuthRevoked(data)
+        finally:
+            self._set_connection(None)
+
+    def _handle(self, payload, merge):
+        path = payload.get('path', '/')
+        data = payload.get('data')
+        self._node = apply_event(self._node, path, data, merge)
+
+        keys = [key for key in path.split('/') if key]
+        first = self.state != 'live'
+        if first:
+            self.state = 'live'
+            logger.info("Sensor stream %s live", self.path,
+                        extra={'fields': {'event': 'stream_live', 'path': self.path, 'connects': self.connects}})
+
+        if keys:
+            touched = {keys[0]}
+        elif isinstance(data, dict):
+            touched = set(data)
+        else:
+            touched = set()
+        reading = parse_reading(self._node)
+        if reading is None:
+            return
+        key = tuple(reading[field] for field in READING_FIELDS + (TIMESTAMP_FIELD,))
+        has_timestamp = isinstance(self._node, dict) and TIMESTAMP_FIELD in self._node
+        complete = first or TIMESTAMP_FIELD in touched or not has_timestamp
+        if complete and key != self._last_key:
+            self._last_key = key
+            self.buffer.append(reading)
@@ -1,6 +1,16 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
 import numpy as np
 
 
+# Tanpa import Machine_Learning: handler dipasang oleh configure_logging (EXTERNAL_LOGGERS)
+logger = logging.getLogger(__name__)
+
+
 # =============================
 # FUNGSI KEANGGOTAAN FUZZY (TRAPEZOIDAL)
 # =============================
@@ -23,83 +33,319 @@ def trapmf(x, params):
         return 0.0
 
 
+def trapmf_batch(x, params):
+    """
+    Versi vektor dari trapmf: x berupa array, hasil array derajat keanggotaan
+    dengan percabangan yang sama persis dengan trapmf.
+    """
+    x = np.asarray(x, dtype=float)
+    a, b, c, d = params
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rising = (x - a) / (b - a) if b != a else np.ones_like(x)
+        falling = (d - x) / (d - c) if d != c else np.ones_like(x)
+    return np.select(
+        [(x < a) | (x > d), (a <= x) & (x <= b), (b < x) & (x < c), (c <= x) & (x <= d)],
+        [0.0, rising, 1.0, falling],
+        default=0.0
+    )
+
+
+# =============================
+# BASIS PENGETAHUAN (rules.json)
+# =============================
+#
+# Himpunan fuzzy input/output dan aturan R1-R22 disimpan sebagai data di
+# rules.json. Saat dimuat, basis aturan dikompilasi menjadi matriks indeks
+# anteseden (untuk jalur batch) dan bitmask aturan per himpunan (untuk jalur
+# skalar), sehingga hanya aturan yang semua himpunan antesedennya bernilai
+# > 0 yang dievaluasi.
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+VARIABLES = ('ph', 'tds', 'ntu')
+
+# Kode status untuk API batch (indeks = urutan himpunan output)
+STATUS_LABELS = ("Tidak Layak Minum", "Cukup Layak Minum", "Layak Minum")
+OUTPUT_NAMES = ("Tidak Layak", "Cukup Layak", "Layak")
+
+# Metode defuzzifikasi (lihat set_defuzzifikasi_method):
+# - 'centroid'        : centroid eksak (integral tertutup dari agregat piecewise-linear)
+# - 'sampled'         : centroid diskret pada grid (metode awal, dipakai sebagai referensi)
+# - 'bisector'        : titik yang membagi luas agregat menjadi dua (grid)
+# - 'mom'             : mean of maximum, rata-rata x dengan keanggotaan maksimum (grid)
+# - 'weighted_average': rata-rata centroid himpunan output berbobot firing strength
+DEFUZZIFIKASI_METHODS = ('centroid', 'sampled', 'bisector', 'mom', 'weighted_average')
+# Metode yang dihitung pada grid titik; resolusi = jumlah titik pada [0, 100]
+SAMPLED_METHODS = ('sampled', 'bisector', 'mom')
+DEFUZZIFIKASI_METHOD = 'centroid'
+DEFUZZIFIKASI_RESOLUTION = 1000
+
+
+class RuleBase:
+    """Basis aturan yang sudah dikompilasi dari rules.json"""
+
+    def __init__(self, data, source=None, mtime=None):
+        self.source = source
+        self.mtime = mtime
+        self.input_sets = {v: dict(data['input_sets'][v]) for v in VARIABLES}
+        self.output_sets = dict(data['output_sets'])
+
+        if tuple(self.output_sets) != OUTPUT_NAMES:
+            raise ValueError(f"output_sets harus berisi {list(OUTPUT_NAMES)} sesuai urutan")
+        for sets in list(self.input_sets.values()) + [self.output_sets]:
+            for name, params in sets.items():
+                if len(params) != 4 or sorted(params) != list(params):
+                    raise ValueError(f"Parameter trapesium '{name}' harus [a, b, c, d] dengan a <= b <= c <= d")
+
+        # RULES: (id, himpunan output, (pH, TDS, Kekeruhan), kondisi); None = variabel tidak dipakai
+        self.rules = []
+        for rule in data['rules']:
+            antecedents = tuple(rule['if'].get(v) for v in VARIABLES)
+            unknown = set(rule['if']) - set(VARIABLES)
+            if unknown:
+                raise ValueError(f"Aturan {rule['id']}: variabel tidak dikenal {sorted(unknown)}")
+            for v, name in zip(VARIABLES, antecedents):
+                if name is not None and name not in self.input_sets[v]:
+                    raise ValueError(f"Aturan {rule['id']}: himpunan '{name}' tidak ada pada variabel {v}")
+            if all(name is None for name in antecedents):
+                raise ValueError(f"Aturan {rule['id']}: anteseden kosong")
+            if rule['then'] not in self.output_sets:
+                raise ValueError(f"Aturan {rule['id']}: output '{rule['then']}' tidak dikenal")
+            self.rules.append((rule['id'], rule['then'], antecedents, rule.get('kondisi', rule['id'])))
+
+        self.rule_ids = [rule[0] for rule in self.rules]
+        if len(set(self.rule_ids)) != len(self.rule_ids):
+            raise ValueError("ID aturan harus unik")
+
+        self._compile()
+
+    def _compile(self):
+        set_names = {v: list(sets) for v, sets in self.input_sets.items()}
+        all_rules = (1 << len(self.rules)) - 1
+
+        # Matriks indeks anteseden (n_rules, 3); -1 = tidak dipakai, menunjuk kolom bernilai 1.0
+        self.antecedent_index = np.array([
+            [set_names[v].index(name) if name is not None else -1 for v, name in zip(VARIABLES, antecedents)]
+            for _, _, antecedents, _ in self.rules
+        ], dtype=int).reshape(len(self.rules), len(VARIABLES))
+        self.output_index = np.array([OUTPUT_NAMES.index(rule[1]) for rule in self.rules], dtype=int)
+
+        # Bitmask aturan per (variabel, himpunan) dan aturan yang tidak memakai variabel tsb
+        self.set_masks = {v: [0] * len(set_names[v]) for v in VARIABLES}
+        self.free_masks = {v: all_rules for v in VARIABLES}
+        for r, (_, _, antecedents, _) in enumerate(self.rules):
+            for v, name in zip(VARIABLES, antecedents):
+                if name is not None:
+                    self.set_masks[v][set_names[v].index(name)] |= 1 << r
+                    self.free_masks[v] &= ~(1 << r)
+
+        # Konstanta defuzzifikasi yang bergantung pada himpunan output
+        self._output_grids = {}
+        self.x_range, self.output_mu = self.output_grid(1000)
+        self.output_ramps = _output_ramps(self.output_sets)
+        self.fixed_breakpoints = _fixed_breakpoints(self.output_sets, self.output_ramps)
+        self.output_ramps_list = self.output_ramps.tolist()
+        self.fixed_breakpoints_list = self.fixed_breakpoints.tolist()
+        self.crisp_scores = {}
+        # Centroid tiap himpunan output (utuh, tanpa dipotong) untuk 'weighted_average'
+        self.output_centroids = np.array([_trapezoid_centroid(params) for params in self.output_sets.values()])
+        self.output_centroids_list = self.output_centroids.tolist()
+
+    def output_grid(self, resolution):
+        """Grid x (resolution titik pada [0, 100]) dan keanggotaan himpunan output di grid tsb"""
+        grid = self._output_grids.get(resolution)
+        if grid is None:
+            x_range = np.linspace(0, 100, resolution)
+            output_mu = np.array([[trapmf(x, params) for x in x_range] for params in self.output_sets.values()])
+            grid = self._output_grids[resolution] = (x_range, output_mu)
+        return grid
+
+    def candidate_rules(self, memberships):
+        """
+        Indeks aturan yang semua himpunan antesedennya bernilai > 0.
+        memberships: list derajat keanggotaan per variabel (urutan VARIABLES).
+        """
+        mask = -1
+        for v, values in zip(VARIABLES, memberships):
+            allowed = self.free_masks[v]
+            for set_mask, value in zip(self.set_masks[v], values):
+                if value > 0:
+                    allowed |= set_mask
+            mask &= allowed
+
+        r = 0
+        while mask:
+            if mask & 1:
+                yield r
+            mask >>= 1
+            r += 1
+
+
+def _trapezoid_centroid(params):
+    """Centroid trapesium [a, b, c, d] setinggi 1: sisi naik, puncak datar, sisi turun"""
+    a, b, c, d = params
+    pieces = [
+        ((b - a) / 2, a + 2 * (b - a) / 3),
+        (c - b, (b + c) / 2),
+        ((d - c) / 2, c + (d - c) / 3),
+    ]
+    area = sum(piece_area for piece_area, _ in pieces)
+    if area == 0:
+        return float(a)
+    return sum(piece_area * x for piece_area, x in pieces) / area
+
+
+def _output_ramps(output_sets):
+    """Sisi miring himpunan output sebagai garis (slope, intercept) pada semesta [0, 100]"""
+    ramps = []
+    for a, b, c, d in output_sets.values():
+        if b != a:
+            ramps.append((1 / (b - a), -a / (b - a)))
+        if d != c:
+            ramps.append((-1 / (d - c), d / (d - c)))
+    return np.array(ramps)
+
+
+def _fixed_breakpoints(output_sets, ramps):
+    """Titik patah agregat yang tidak bergantung firing strength"""
+    points = [0.0, 100.0] + [v for params in output_sets.values() for v in params]
+    # Perpotongan antar sisi miring himpunan output
+    for i, (m1, c1) in enumerate(ramps):
+        for m2, c2 in ramps[i + 1:]:
+            if m1 != m2:
+                points.append((c2 - c1) / (m1 - m2))
+    return np.clip(np.array(points, dtype=float), 0, 100)
+
+
+_RULE_BASE = None
+_RULE_BASE_LOCK = threading.Lock()
+_RULE_BASE_LISTENERS = []
+
+
+def load_rule_base(path=None):
+    """
+    Muat dan kompilasi basis aturan dari file JSON, lalu jadikan aktif.
+    Alias modul (PH_SETS, TDS_SETS, NTU_SETS, OUTPUT_SETS, RULES, RULE_IDS)
+    ikut diperbarui.
+    """
+    global _RULE_BASE, PH_SETS, TDS_SETS, NTU_SETS, OUTPUT_SETS, RULES, RULE_IDS
+    path = path or RULES_FILE
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    rule_base = RuleBase(data, source=path, mtime=os.stat(path).st_mtime_ns)
+
+    with _RULE_BASE_LOCK:
+        _RULE_BASE = rule_base
+        PH_SETS = rule_base.input_sets['ph']
+        TDS_SETS = rule_base.input_sets['tds']
+        NTU_SETS = rule_base.input_sets['ntu']
+        OUTPUT_SETS = rule_base.output_sets
+        RULES = rule_base.rules
+        RULE_IDS = rule_base.rule_ids
+
+    for listener in list(_RULE_BASE_LISTENERS):
+        listener(rule_base)
+    return rule_base
+
+
+def reload_rule_base_if_changed():
+    """
+    Muat ulang rules.json jika file berubah sejak terakhir dimuat (hot reload).
+    Jika file baru tidak valid, basis aturan lama tetap dipakai.
+    Mengembalikan True jika basis aturan diganti.
+    """
+    current = _RULE_BASE
+    try:
+        mtime = os.stat(current.source).st_mtime_ns
+    except OSError:
+        return False
+    if mtime == current.mtime:
+        return False
+
+    try:
+        load_rule_base(current.source)
+        logger.info("Rule base reloaded from %s", current.source,
+                    extra={'fields': {'event': 'rules_reloaded', 'source': current.source}})
+        return True
+    except Exception as e:
+        # Catat mtime agar file yang sama tidak dicoba terus-menerus
+        current.mtime = mtime
+        logger.warning("Rule base reload from %s failed: %s", current.source, e,
+                       extra={'fields': {'event': 'rules_reload_failed', 'source': current.source,
+                                         'error': f"{type(e).__name__}: {e}"}})
+        return False
+
+
+def on_rule_base_change(listener):
+    """Daftarkan fungsi listener(rule_base) yang dipanggil setiap basis aturan diganti"""
+    _RULE_BASE_LISTENERS.append(listener)
+    return listener
+
+
+def get_rule_base():
+    """Basis aturan yang sedang aktif"""
+    return _RULE_BASE
+
+
+load_rule_base()
+
+
 # =============================
 # FUZZIFIKASI PARAMETER
 # =============================
 
+def _fuzzifikasi(x, sets):
+    return {name: trapmf(x, params) for name, params in sets.items()}
+
+
 def fuzzifikasi_ph(ph):
     """
     Fuzzifikasi pH berdasarkan himpunan fuzzy trapezoidal
     Sesuai dokumentasi: Tabel 1 - Klasifikasi Tingkat pH
     """
-    membership = {}
-    
-    # Asam: pH ≤ 6.5 (Tidak Layak)
-    membership['Asam'] = trapmf(ph, [0, 0, 6.5, 6.6])
-    
-    # Sedikit Asam: 6.6 <= pH <= 6.9 (Cukup)
-    membership['Sedikit Asam'] = trapmf(ph, [6.5, 6.6, 6.9, 7.0])
-    
-    # Netral: pH = 7.0 (Optimal)
-    membership['Netral'] = trapmf(ph, [6.9, 7.0, 7.0, 7.1])
-    
-    # Sedikit Basa: 7.1 <= pH <= 8.5 (Cukup)
-    membership['Sedikit Basa'] = trapmf(ph, [7.0, 7.1, 8.5, 8.6])
-    
-    # Basa: pH ≥ 8.6 (Tidak Layak)
-    membership['Basa'] = trapmf(ph, [8.5, 8.6, 14, 14])
-        
-    return membership
+    return _fuzzifikasi(ph, _RULE_BASE.input_sets['ph'])
 
 
 def fuzzifikasi_tds(tds):
     """
     Fuzzifikasi TDS berdasarkan himpunan fuzzy trapezoidal
     """
-    membership = {}
-    
-    membership['Sempurna'] = trapmf(tds, [0, 0, 300, 301])
-    membership['Baik'] = trapmf(tds, [300, 301, 600, 601])
-    membership['Cukup'] = trapmf(tds, [600, 601, 900, 901])
-    membership['Buruk'] = trapmf(tds, [900, 901, 1199, 1200])
-    membership['Tidak Diterima'] = trapmf(tds, [1199, 1200, 2000, 2000])
-    
-    return membership
+    return _fuzzifikasi(tds, _RULE_BASE.input_sets['tds'])
 
 
 def fuzzifikasi_kekeruhan(ntu):
     """
     Fuzzifikasi Kekeruhan berdasarkan himpunan fuzzy trapezoidal
     """
-    membership = {}
-    
-    membership['Sempurna'] = trapmf(ntu, [0, 0, 1.0, 1.1])
-    membership['Baik'] = trapmf(ntu, [1.0, 1.1, 5.0, 5.1])
-    membership['Cukup'] = trapmf(ntu, [5.0, 5.1, 25.0, 25.1])
-    membership['Buruk'] = trapmf(ntu, [25.0, 25.1, 100.0, 100.1])
-    membership['Tidak Diterima'] = trapmf(ntu, [100.0, 100.1, 300.0, 300.0])
-    
-    return membership
+    return _fuzzifikasi(ntu, _RULE_BASE.input_sets['ntu'])
 
 
 # =============================
 # DEFUZZIFIKASI OUTPUT
 # =============================
 
-def defuzzifikasi_output(firing_strength):
+def defuzzifikasi_output(firing_strength, method=None, resolution=None):
     """
-    Defuzzifikasi menggunakan himpunan fuzzy output trapezoidal
+    Defuzzifikasi menggunakan himpunan fuzzy output trapezoidal.
+    method/resolution default ke DEFUZZIFIKASI_METHOD/DEFUZZIFIKASI_RESOLUTION.
     """
-    output_params = {
-        'Tidak Layak': [0, 0, 40, 50],
-        'Cukup Layak': [40, 50, 70, 80],
-        'Layak': [70, 80, 100, 100]
-    }
+    method = method or DEFUZZIFIKASI_METHOD
+    resolution = resolution or DEFUZZIFIKASI_RESOLUTION
+    rule_base = _RULE_BASE
+    if method == 'centroid':
+        return _centroid_scalar([firing_strength.get(name, 0) for name in rule_base.output_sets], rule_base)
+    if method == 'weighted_average':
+        return _weighted_average_scalar([firing_strength.get(name, 0) for name in rule_base.output_sets], rule_base)
+    if method != 'sampled':
+        strengths = [[firing_strength.get(name, 0) for name in rule_base.output_sets]]
+        return float(defuzzifikasi_output_batch(strengths, method, resolution)[0])
+    
+    output_params = rule_base.output_sets
     
     numerator = 0
     denominator = 0
     
-    x_range = np.linspace(0, 100, 1000)
+    x_range = np.linspace(0, 100, resolution)
     
     for x in x_range:
         membership_agregat = 0
@@ -117,150 +363,95 @@ def defuzzifikasi_output(firing_strength):
     return numerator / denominator
 
 
+def _centroid_scalar(strengths, rule_base):
+    """Centroid eksak untuk satu pembacaan tanpa overhead NumPy (hasil identik dengan versi batch)"""
+    x = list(rule_base.fixed_breakpoints_list)
+    for slope, intercept in rule_base.output_ramps_list:
+        for s in strengths:
+            x.append(min(max((s - intercept) / slope, 0.0), 100.0))
+    x.sort()
+    
+    mu = []
+    for xi in x:
+        agregat = 0.0
+        for s, params in zip(strengths, rule_base.output_sets.values()):
+            agregat = max(agregat, min(s, trapmf(xi, params)))
+        mu.append(agregat)
+    
+    area = 0.0
+    moment = 0.0
+    for x0, x1, mu0, mu1 in zip(x, x[1:], mu, mu[1:]):
+        h = x1 - x0
+        area += h * (mu0 + mu1) / 2
+        moment += h * (x0 * (2 * mu0 + mu1) + x1 * (mu0 + 2 * mu1)) / 6
+    
+    return 50 if area == 0 else moment / area
+
+
+def _weighted_average_scalar(strengths, rule_base):
+    numerator = 0.0
+    denominator = 0.0
+    for s, centroid in zip(strengths, rule_base.output_centroids_list):
+        numerator += s * centroid
+        denominator += s
+    return 50 if denominator == 0 else numerator / denominator
+
+
+def set_defuzzifikasi_method(method, resolution=None):
+    """
+    Pilih metode defuzzifikasi global (DEFUZZIFIKASI_METHODS).
+    resolution hanya berpengaruh pada metode grid (SAMPLED_METHODS).
+    """
+    global DEFUZZIFIKASI_METHOD, DEFUZZIFIKASI_RESOLUTION
+    _check_defuzzifikasi(method, resolution)
+    DEFUZZIFIKASI_METHOD = method
+    if resolution is not None:
+        DEFUZZIFIKASI_RESOLUTION = int(resolution)
+    clear_evaluation_cache()
+
+
+def _check_defuzzifikasi(method, resolution):
+    if method not in DEFUZZIFIKASI_METHODS:
+        raise ValueError(f"Metode defuzzifikasi tidak dikenal: {method}")
+    if resolution is not None and int(resolution) < 2:
+        raise ValueError("Resolusi defuzzifikasi minimal 2 titik")
+
+
 # =============================
 # SISTEM INFERENSI FUZZY
 # =============================
 
-def fuzzy_inference(ph, tds, ntu):
+def fuzzy_inference(ph, tds, ntu, method=None, resolution=None):
     """
     Sistem inferensi fuzzy untuk evaluasi kualitas air
+    method/resolution: metode defuzzifikasi per panggilan (default global)
     """
     
     details = {}
+    rule_base = _RULE_BASE
     
     # 1. FUZZIFIKASI
-    ph_membership = fuzzifikasi_ph(ph)
-    tds_membership = fuzzifikasi_tds(tds)
-    ntu_membership = fuzzifikasi_kekeruhan(ntu)
+    ph_membership = _fuzzifikasi(ph, rule_base.input_sets['ph'])
+    tds_membership = _fuzzifikasi(tds, rule_base.input_sets['tds'])
+    ntu_membership = _fuzzifikasi(ntu, rule_base.input_sets['ntu'])
     
     details['ph_membership'] = ph_membership
     details['tds_membership'] = tds_membership
     details['ntu_membership'] = ntu_membership
     
     # 2. INFERENSI FUZZY
-    firing_strength = {
-        'Tidak Layak': 0,
-        'Cukup Layak': 0,
-        'Layak': 0
-    }
+    firing_strength = {name: 0 for name in rule_base.output_sets}
     
     rules_fired = []
     
-    # --- ATURAN TIDAK LAYAK MINUM (R1-R6) ---
-    
-    r1 = ph_membership['Asam']
-    if r1 > 0:
-        firing_strength['Tidak Layak'] = max(firing_strength['Tidak Layak'], r1)
-        rules_fired.append(('R1', r1, 'pH Asam'))
-    
-    r2 = ph_membership['Basa']
-    if r2 > 0:
-        firing_strength['Tidak Layak'] = max(firing_strength['Tidak Layak'], r2)
-        rules_fired.append(('R2', r2, 'pH Basa'))
-    
-    r3 = tds_membership['Buruk']
-    if r3 > 0:
-        firing_strength['Tidak Layak'] = max(firing_strength['Tidak Layak'], r3)
-        rules_fired.append(('R3', r3, 'TDS Buruk'))
-    
-    r4 = tds_membership['Tidak Diterima']
-    if r4 > 0:
-        firing_strength['Tidak Layak'] = max(firing_strength['Tidak Layak'], r4)
-        rules_fired.append(('R4', r4, 'TDS Tidak Diterima'))
-    
-    r5 = ntu_membership['Buruk']
-    if r5 > 0:
-        firing_strength['Tidak Layak'] = max(firing_strength['Tidak Layak'], r5)
-        rules_fired.append(('R5', r5, 'Kekeruhan Buruk'))
-    
-    r6 = ntu_membership['Tidak Diterima']
-    if r6 > 0:
-        firing_strength['Tidak Layak'] = max(firing_strength['Tidak Layak'], r6)
-        rules_fired.append(('R6', r6, 'Kekeruhan Tidak Diterima'))
-    
-    # --- ATURAN CUKUP LAYAK MINUM (R7-R16) ---
-    
-    r7 = min(ph_membership['Sedikit Asam'], tds_membership['Cukup'], ntu_membership['Cukup'])
-    if r7 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r7)
-        rules_fired.append(('R7', r7, 'pH Sedikit Asam, TDS Cukup, Kekeruhan Cukup'))
-    
-    r8 = min(ph_membership['Sedikit Basa'], tds_membership['Cukup'], ntu_membership['Cukup'])
-    if r8 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r8)
-        rules_fired.append(('R8', r8, 'pH Sedikit Basa, TDS Cukup, Kekeruhan Cukup'))
-    
-    r9 = min(ph_membership['Netral'], tds_membership['Cukup'], ntu_membership['Baik'])
-    if r9 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r9)
-        rules_fired.append(('R9', r9, 'pH Netral, TDS Cukup, Kekeruhan Baik'))
-    
-    r10 = min(ph_membership['Netral'], tds_membership['Baik'], ntu_membership['Cukup'])
-    if r10 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r10)
-        rules_fired.append(('R10', r10, 'pH Netral, TDS Baik, Kekeruhan Cukup'))   
-
-    r11 = min(ph_membership['Sedikit Asam'], tds_membership['Baik'], ntu_membership['Baik'])
-    if r11 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r11)
-        rules_fired.append(('R11', r11, 'pH Sedikit Asam, TDS Baik, Kekeruhan Baik'))
-    
-    r12 = min(ph_membership['Sedikit Basa'], tds_membership['Baik'], ntu_membership['Baik'])
-    if r12 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r12)
-        rules_fired.append(('R12', r12, 'pH Sedikit Basa, TDS Baik, Kekeruhan Baik'))
-
-    r13 = min(ph_membership['Sedikit Asam'], tds_membership['Baik'], ntu_membership['Sempurna'])
-    if r13 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r13)
-        rules_fired.append(('R13', r13, 'pH Sedikit Asam, TDS Baik, Kekeruhan Sempurna'))
-
-    r14 = min(ph_membership['Sedikit Basa'], tds_membership['Baik'], ntu_membership['Sempurna'])
-    if r14 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r14)
-        rules_fired.append(('R14', r14, 'pH Sedikit Basa, TDS Baik, Kekeruhan Sempurna'))
-
-    r15 = min(ph_membership['Sedikit Asam'], tds_membership['Sempurna'], ntu_membership['Baik'])
-    if r15 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r15)
-        rules_fired.append(('R15', r15, 'pH Sedikit Asam, TDS Sempurna, Kekeruhan Baik'))
-
-    r16 = min(ph_membership['Sedikit Basa'], tds_membership['Sempurna'], ntu_membership['Baik'])
-    if r16 > 0:
-        firing_strength['Cukup Layak'] = max(firing_strength['Cukup Layak'], r16)
-        rules_fired.append(('R16', r16, 'pH Sedikit Basa, TDS Sempurna, Kekeruhan Baik'))
-
-    # --- ATURAN LAYAK MINUM (R17-R22) ---
-
-    r17 = min(ph_membership['Sedikit Asam'], tds_membership['Sempurna'], ntu_membership['Sempurna'])
-    if r17 > 0:
-        firing_strength['Layak'] = max(firing_strength['Layak'], r17)
-        rules_fired.append(('R17', r17, 'pH Sedikit Asam, TDS Sempurna, Kekeruhan Sempurna'))
-
-    r18 = min(ph_membership['Sedikit Basa'], tds_membership['Sempurna'], ntu_membership['Sempurna'])
-    if r18 > 0:
-        firing_strength['Layak'] = max(firing_strength['Layak'], r18)
-        rules_fired.append(('R18', r18, 'pH Sedikit Basa, TDS Sempurna, Kekeruhan Sempurna'))
-
-    r19 = min(ph_membership['Netral'], tds_membership['Sempurna'], ntu_membership['Sempurna'])
-    if r19 > 0:
-        firing_strength['Layak'] = max(firing_strength['Layak'], r19)
-        rules_fired.append(('R19', r19, 'pH Netral, TDS Sempurna, Kekeruhan Sempurna'))
-
-    r20 = min(ph_membership['Netral'], tds_membership['Baik'], ntu_membership['Baik'])
-    if r20 > 0:
-        firing_strength['Layak'] = max(firing_strength['Layak'], r20)
-        rules_fired.append(('R20', r20, 'pH Netral, TDS Baik, Kekeruhan Baik'))
-
-    r21 = min(ph_membership['Netral'], tds_membership['Sempurna'], ntu_membership['Baik'])
-    if r21 > 0:
-        firing_strength['Layak'] = max(firing_strength['Layak'], r21)
-        rules_fired.append(('R21', r21, 'pH Netral, TDS Sempurna, Kekeruhan Baik'))
-
-    r22 = min(ph_membership['Netral'], tds_membership['Baik'], ntu_membership['Sempurna'])
-    if r22 > 0:
-        firing_strength['Layak'] = max(firing_strength['Layak'], r22)
-        rules_fired.append(('R22', r22, 'pH Netral, TDS Baik, Kekeruhan Sempurna'))
+    # Hanya aturan yang semua himpunan antesedennya > 0 yang dievaluasi (AND = min, OR = max)
+    memberships = (ph_membership, tds_membership, ntu_membership)
+    for r in rule_base.candidate_rules([m.values() for m in memberships]):
+        rule_id, output, antecedents, condition = rule_base.rules[r]
+        strength = min(m[name] for m, name in zip(memberships, antecedents) if name is not None)
+        if strength > 0:
+            firing_strength[output] = max(firing_strength[output], strength)
+            rules_fired.append((rule_id, strength, condition))
         
     details['firing_strength'] = firing_strength
     details['rules_fired'] = rules_fired
@@ -269,7 +460,7 @@ def fuzzy_inference(ph, tds, ntu):
     
     # 3. DEFUZZIFIKASI
     if has_active_rules:
-        score = defuzzifikasi_output(firing_strength)
+        score = defuzzifikasi_output(firing_strength, method, resolution)
         
         max_strength = max(firing_strength.values())
         if max_strength == 0:
@@ -320,64 +511,38 @@ def calculate_confidence(status, firing_strength, rules_fired, ph, tds, ntu, ph_
     
     Total: ML + ES (max 100%)
     """
+    breakdown = confidence_breakdown(status, firing_strength, rules_fired, ph, tds, ntu, ml_result, es_result)
+    return breakdown['confidence'], render_confidence_explanation(breakdown)
+
+
+def confidence_breakdown(status, firing_strength, rules_fired, ph, tds, ntu, ml_result=None, es_result=None):
+    """
+    Bagian numerik dari calculate_confidence (tanpa membentuk teks).
+    Mengembalikan dict komponen confidence yang bisa dirender belakangan
+    dengan render_confidence_explanation.
+    """
+    breakdown = {'ph': ph, 'tds': tds, 'ntu': ntu, 'ml_result': ml_result}
     
     # === CEK RULE R1-R6 (ALARM BAHAYA) ===
     danger_rules = ['R1', 'R2', 'R3', 'R4', 'R5', 'R6']
     active_danger_rules = [r[0] for r in rules_fired if r[0] in danger_rules]
     
     if active_danger_rules:
-        rule_names = ', '.join(active_danger_rules)
-        
+        breakdown['danger_rules'] = active_danger_rules
         # KASUS KHUSUS: Jika ML bilang "Layak Minum" saat R1-R6 aktif
-        if ml_result is not None and ml_result.strip() == "Layak Minum":
-            confidence = 25
-            explanation = f"""
-Perhitungan Confidence (Sistem Baru):
-⚠️ ALARM BAHAYA AKTIF: {rule_names}
-• Rule R1-R6 mendeteksi parameter berbahaya
-• TETAPI ML memprediksi: "Layak Minum"
-• ML berani berbeda pendapat dengan ES → +25%
-• ES contribution: 0% (alarm bahaya)
-• TOTAL: 25% (HANYA DARI ML - TETAP WASPADAI ALARM ES)
-
-⚠️ CATATAN PENTING: 
-Meskipun ML memprediksi "Layak Minum", sistem pakar mendeteksi 
-parameter yang melewati batas aman. Disarankan untuk berhati-hati 
-dan memverifikasi dengan pengukuran ulang atau sumber lain.
-"""
-            return confidence, explanation
-        
-        # KASUS NORMAL: ML setuju dengan ES atau ML bilang lebih buruk
-        else:
-            confidence = 0
-            explanation = f"""
-Perhitungan Confidence (Sistem Baru):
-⚠️ ALARM BAHAYA AKTIF: {rule_names}
-• Rule R1-R6 adalah alarm keamanan
-• ML prediction: {ml_result if ml_result else 'N/A'}
-• Confidence MUTLAK: 0%
-• ML contribution: 0% (setuju dengan alarm atau lebih pesimis)
-• ES contribution: 0% (alarm bahaya)
-• TOTAL: 0% (TIDAK ADA KEPERCAYAAN - AIR BERBAHAYA)
-"""
-            return confidence, explanation
+        breakdown['ml_disagrees'] = ml_result is not None and ml_result.strip() == "Layak Minum"
+        breakdown['confidence'] = 25 if breakdown['ml_disagrees'] else 0
+        return breakdown
     
     ml_confidence = 0
     es_confidence = 0
     
     # === KOMPONEN ML (0% atau 25%) ===
     if ml_result is not None and es_result is not None:
-        ml_normalized = ml_result.strip()
-        es_normalized = es_result.strip()
-        
-        if ml_normalized == es_normalized:
+        breakdown['ml_normalized'] = ml_result.strip()
+        breakdown['es_normalized'] = es_result.strip()
+        if breakdown['ml_normalized'] == breakdown['es_normalized']:
             ml_confidence = 25
-            ml_note = f"ML SETUJU dengan ES ({ml_normalized}) → +25%"
-        else:
-            ml_confidence = 0
-            ml_note = f"ML TIDAK SETUJU dengan ES (ML: {ml_normalized}, ES: {es_normalized}) → 0%"
-    else:
-        ml_note = "ML tidak tersedia"
     
     # === KOMPONEN ES (0-75%) ===
     if status == "Layak Minum":
@@ -422,15 +587,6 @@ Perhitungan Confidence (Sistem Baru):
         
         es_confidence = base_es + strength_bonus + quality_adjustment + rule_specificity_bonus
         es_confidence = max(0, min(max_es, es_confidence))
-        
-        explanation_detail = f"""
-  - Base ES (Layak Minum): {base_es}%
-  - Firing Strength: +{strength_bonus}% (μ={max_firing_strength:.3f})
-  - Parameter Quality: +{quality_adjustment}%
-    · pH {ph:.2f}: {'optimal' if 6.95 <= ph <= 7.05 else 'baik' if 6.5 <= ph <= 8.5 else 'buruk'}
-    · TDS {tds:.1f}: {'optimal' if tds <= 300 else 'baik' if tds <= 600 else 'cukup'}
-    · NTU {ntu:.2f}: {'optimal' if ntu <= 1 else 'baik' if ntu <= 5 else 'cukup'}
-  - Rule Specificity: +{rule_specificity_bonus}%"""
     
     elif status == "Cukup Layak Minum":
         base_es = 25
@@ -465,22 +621,93 @@ Perhitungan Confidence (Sistem Baru):
         
         es_confidence = base_es + strength_bonus + quality_adjustment + rule_specificity_bonus
         es_confidence = max(0, min(max_es, es_confidence))
-        
-        explanation_detail = f"""
-  - Base ES (Cukup Layak): {base_es}%
-  - Firing Strength: +{strength_bonus}% (μ={max_firing_strength:.3f})
-  - Parameter Quality: +{quality_adjustment}%
-  - Rule Specificity: +{rule_specificity_bonus}%"""
     
-    else:  # "Tidak Layak Minum"
-        es_confidence = 0
-        explanation_detail = "  - Base ES (Tidak Layak): 0% (tidak ada kontribusi)"
+    if status in ("Layak Minum", "Cukup Layak Minum"):
+        breakdown.update(
+            base_es=base_es,
+            strength_bonus=strength_bonus,
+            max_firing_strength=max_firing_strength,
+            quality_adjustment=quality_adjustment,
+            rule_specificity_bonus=rule_specificity_bonus,
+        )
     
     # === TOTAL CONFIDENCE ===
     confidence = ml_confidence + es_confidence
     confidence = max(0, min(100, confidence))
     
-    explanation = f"""
+    breakdown.update(status=status, ml_confidence=ml_confidence, es_confidence=es_confidence, confidence=confidence)
+    return breakdown
+
+
+def render_confidence_explanation(breakdown):
+    """Teks penjelasan confidence dari hasil confidence_breakdown"""
+    if 'danger_rules' in breakdown:
+        rule_names = ', '.join(breakdown['danger_rules'])
+        ml_result = breakdown['ml_result']
+        
+        if breakdown['ml_disagrees']:
+            return f"""
+Perhitungan Confidence (Sistem Baru):
+⚠️ ALARM BAHAYA AKTIF: {rule_names}
+• Rule R1-R6 mendeteksi parameter berbahaya
+• TETAPI ML memprediksi: "Layak Minum"
+• ML berani berbeda pendapat dengan ES → +25%
+• ES contribution: 0% (alarm bahaya)
+• TOTAL: 25% (HANYA DARI ML - TETAP WASPADAI ALARM ES)
+
+⚠️ CATATAN PENTING: 
+Meskipun ML memprediksi "Layak Minum", sistem pakar mendeteksi 
+parameter yang melewati batas aman. Disarankan untuk berhati-hati 
+dan memverifikasi dengan pengukuran ulang atau sumber lain.
+"""
+        
+        return f"""
+Perhitungan Confidence (Sistem Baru):
+⚠️ ALARM BAHAYA AKTIF: {rule_names}
+• Rule R1-R6 adalah alarm keamanan
+• ML prediction: {ml_result if ml_result else 'N/A'}
+• Confidence MUTLAK: 0%
+• ML contribution: 0% (setuju dengan alarm atau lebih pesimis)
+• ES contribution: 0% (alarm bahaya)
+• TOTAL: 0% (TIDAK ADA KEPERCAYAAN - AIR BERBAHAYA)
+"""
+    
+    ml_confidence = breakdown['ml_confidence']
+    es_confidence = breakdown['es_confidence']
+    confidence = breakdown['confidence']
+    ph, tds, ntu = breakdown['ph'], breakdown['tds'], breakdown['ntu']
+    
+    if 'ml_normalized' in breakdown:
+        ml_normalized = breakdown['ml_normalized']
+        es_normalized = breakdown['es_normalized']
+        if ml_confidence:
+            ml_note = f"ML SETUJU dengan ES ({ml_normalized}) → +25%"
+        else:
+            ml_note = f"ML TIDAK SETUJU dengan ES (ML: {ml_normalized}, ES: {es_normalized}) → 0%"
+    else:
+        ml_note = "ML tidak tersedia"
+    
+    if breakdown['status'] == "Layak Minum":
+        explanation_detail = f"""
+  - Base ES (Layak Minum): {breakdown['base_es']}%
+  - Firing Strength: +{breakdown['strength_bonus']}% (μ={breakdown['max_firing_strength']:.3f})
+  - Parameter Quality: +{breakdown['quality_adjustment']}%
+    · pH {ph:.2f}: {'optimal' if 6.95 <= ph <= 7.05 else 'baik' if 6.5 <= ph <= 8.5 else 'buruk'}
+    · TDS {tds:.1f}: {'optimal' if tds <= 300 else 'baik' if tds <= 600 else 'cukup'}
+    · NTU {ntu:.2f}: {'optimal' if ntu <= 1 else 'baik' if ntu <= 5 else 'cukup'}
+  - Rule Specificity: +{breakdown['rule_specificity_bonus']}%"""
+    
+    elif breakdown['status'] == "Cukup Layak Minum":
+        explanation_detail = f"""
+  - Base ES (Cukup Layak): {breakdown['base_es']}%
+  - Firing Strength: +{breakdown['strength_bonus']}% (μ={breakdown['max_firing_strength']:.3f})
+  - Parameter Quality: +{breakdown['quality_adjustment']}%
+  - Rule Specificity: +{breakdown['rule_specificity_bonus']}%"""
+    
+    else:  # "Tidak Layak Minum"
+        explanation_detail = "  - Base ES (Tidak Layak): 0% (tidak ada kontribusi)"
+    
+    return f"""
 Perhitungan Confidence (Sistem Baru):
 • Komponen ML (0% atau 25%): {ml_confidence}%
   {ml_note}
@@ -488,8 +715,17 @@ Perhitungan Confidence (Sistem Baru):
 {explanation_detail}
 • TOTAL: {confidence}% ({ml_confidence}% ML + {es_confidence}% ES)
 """
-    
-    return confidence, explanation
+
+
+# Catatan keputusan hybrid; hybrid_decision_batch mengembalikan indeks tuple ini
+DECISION_NOTES = (
+    "✅ ML dan ES setuju",
+    "⚖️ ES diprioritaskan (rule-based lebih spesifik untuk kondisi Layak)",
+    "⚖️ ES diprioritaskan (rule-based lebih spesifik untuk kondisi Cukup Layak)",
+    "⚠️ Prioritas keamanan (ES mendeteksi kondisi tidak aman)",
+    "⚖️ Menggunakan hasil ES",
+)
+DECISION_AGREE, DECISION_ES_LAYAK, DECISION_ES_CUKUP, DECISION_SAFETY, DECISION_ES_ONLY = range(len(DECISION_NOTES))
 
 
 def hybrid_decision(ph, tds, ntu, ml_result):
@@ -501,27 +737,27 @@ def hybrid_decision(ph, tds, ntu, ml_result):
     
     if ml_result == es_status:
         final_status = ml_result
-        decision_note = "✅ ML dan ES setuju"
+        decision_note = DECISION_NOTES[DECISION_AGREE]
     
     elif ml_result == "Tidak Layak Minum" and es_status == "Layak Minum":
         final_status = "Layak Minum"
-        decision_note = "⚖️ ES diprioritaskan (rule-based lebih spesifik untuk kondisi Layak)"
+        decision_note = DECISION_NOTES[DECISION_ES_LAYAK]
     
     elif ml_result == "Tidak Layak Minum" and es_status == "Cukup Layak Minum":
         final_status = "Cukup Layak Minum"
-        decision_note = "⚖️ ES diprioritaskan (rule-based lebih spesifik untuk kondisi Cukup Layak)"
+        decision_note = DECISION_NOTES[DECISION_ES_CUKUP]
     
     elif ml_result == "Layak Minum" and es_status == "Cukup Layak Minum":
         final_status = "Cukup Layak Minum"
-        decision_note = "⚖️ ES diprioritaskan (rule-based lebih spesifik untuk kondisi Cukup Layak)"
+        decision_note = DECISION_NOTES[DECISION_ES_CUKUP]
     
     elif ml_result == "Layak Minum" and es_status == "Tidak Layak Minum":
         final_status = "Tidak Layak Minum"
-        decision_note = "⚠️ Prioritas keamanan (ES mendeteksi kondisi tidak aman)"
+        decision_note = DECISION_NOTES[DECISION_SAFETY]
     
     else:
         final_status = es_status
-        decision_note = "⚖️ Menggunakan hasil ES"
+        decision_note = DECISION_NOTES[DECISION_ES_ONLY]
     
     return final_status, es_status, ml_result, decision_note, details, has_active_rules
 
@@ -531,17 +767,123 @@ def evaluate_water_quality(ph, tds, ntu, ml_result=None):
     Evaluasi kualitas air menggunakan Fuzzy Logic (Trapezoidal)
     """
     
-    explanations = []
+    result = evaluate(ph, tds, ntu, ml_result)
+    return result.status, list(result.explanations), result.confidence, result.has_active_rules
+
+
+def evaluate(ph, tds, ntu, ml_result=None):
+    """
+    Seperti evaluate_water_quality, tetapi mengembalikan EvaluationResult.
+    Teks penjelasan dan rekomendasi baru dibentuk saat atributnya dibaca.
+    """
     
+    cache = _EVALUATION_CACHE
+    if cache is not None:
+        return cache.evaluate(ph, tds, ntu, ml_result)
+    
+    return _evaluate(ph, tds, ntu, ml_result)
+
+
+class EvaluationResult:
+    """
+    Hasil evaluasi satu pembacaan sensor.
+
+    Field numerik (status, score, confidence, rule_ids, rule_strengths) langsung
+    tersedia; explanations dan recommendations dirender saat pertama kali
+    diakses lalu disimpan.
+    """
+
+    __slots__ = (
+        'ph', 'tds', 'ntu', 'ml_result', 'status', 'es_status', 'ml_status',
+        'decision_note', 'score', 'confidence', 'has_active_rules',
+        'rule_ids', 'rule_strengths', 'firing_strength',
+        '_details', '_breakdown', '_explanations', '_recommendations',
+    )
+
+    def __init__(self, ph, tds, ntu, ml_result, status, es_status, ml_status,
+                 decision_note, details, has_active_rules, breakdown):
+        self.ph = ph
+        self.tds = tds
+        self.ntu = ntu
+        self.ml_result = ml_result
+        self.status = status
+        self.es_status = es_status
+        self.ml_status = ml_status
+        self.decision_note = decision_note
+        self.score = details['score']
+        self.has_active_rules = has_active_rules
+        self.rule_ids = tuple(rule[0] for rule in details['rules_fired'])
+        self.rule_strengths = np.array([rule[1] for rule in details['rules_fired']], dtype=np.float64)
+        self.firing_strength = details['firing_strength']
+        self._details = details
+        self._breakdown = breakdown
+        self._explanations = None
+        self._recommendations = None
+        
+        if breakdown is not None:
+            self.confidence = breakdown['confidence']
+        elif ml_result is not None and ml_result == "Layak Minum":
+            # Tidak ada aturan aktif: hanya ML yang memprediksi Layak
+            self.confidence = 25
+        else:
+            self.confidence = 0
+
+    @property
+    def rules_fired(self):
+        """Daftar (id_rule, firing_strength, kondisi) seperti di fuzzy_inference"""
+        return self._details['rules_fired']
+
+    @property
+    def details(self):
+        return self._details
+
+    @property
+    def explanations(self):
+        if self._explanations is None:
+            self._explanations = tuple(_render_explanations(self))
+        return self._explanations
+
+    @property
+    def recommendations(self):
+        if self._recommendations is None:
+            self._recommendations = get_recommendations(self.status, self.ph, self.tds, self.ntu)
+        return self._recommendations
+
+    def __repr__(self):
+        return (f"EvaluationResult(status={self.status!r}, score={self.score:.2f}, "
+                f"confidence={self.confidence}, rule_ids={self.rule_ids!r})")
+
+
+def _evaluate(ph, tds, ntu, ml_result=None):
     if ml_result is not None:
         final_status, es_status, ml_status, decision_note, details, has_active_rules = hybrid_decision(ph, tds, ntu, ml_result)
-        score = details['score']
     else:
         es_status, score, details, has_active_rules = fuzzy_inference(ph, tds, ntu)
         final_status = es_status
         ml_status = None
         decision_note = None
     
+    breakdown = None
+    if has_active_rules:
+        breakdown = confidence_breakdown(
+            final_status,
+            details['firing_strength'],
+            details['rules_fired'],
+            ph, tds, ntu,
+            ml_result,
+            es_status
+        )
+    
+    return EvaluationResult(ph, tds, ntu, ml_result, final_status, es_status, ml_status,
+                            decision_note, details, has_active_rules, breakdown)
+
+
+def _render_explanations(result):
+    ph, tds, ntu = result.ph, result.tds, result.ntu
+    ml_result = result.ml_result
+    details = result.details
+    explanations = []
+    
     explanations.append(f"pH = {ph}")
     explanations.append(f"TDS = {tds} mg/L")
     explanations.append(f"Kekeruhan = {ntu} NTU")
@@ -558,22 +900,17 @@ def evaluate_water_quality(ph, tds, ntu, ml_result=None):
     if ntu_sig:
         explanations.append(f"Kekeruhan Fuzzy: {', '.join(ntu_sig)}")
     
-    if not has_active_rules:
+    if not result.has_active_rules:
         explanations.append("\n❌ Tidak ada aturan sistem pakar yang aktif")
         explanations.append("Kombinasi parameter tidak memenuhi kriteria keamanan apapun")
         
-        # Confidence calculation untuk no rules
         if ml_result is not None:
             if ml_result == "Layak Minum":
-                confidence = 25
-                explanations.append(f"\n⚠️ Confidence: {confidence}% (hanya dari ML yang memprediksi Layak, ES tidak aktif)")
+                explanations.append(f"\n⚠️ Confidence: {result.confidence}% (hanya dari ML yang memprediksi Layak, ES tidak aktif)")
             else:
-                confidence = 0
-                explanations.append(f"\n⚠️ Confidence: {confidence}% (ML setuju dengan kondisi tidak pasti, tidak ada kontribusi)")
-        else:
-            confidence = 0
+                explanations.append(f"\n⚠️ Confidence: {result.confidence}% (ML setuju dengan kondisi tidak pasti, tidak ada kontribusi)")
         
-        return final_status, explanations, confidence, has_active_rules
+        return explanations
     
     if details['rules_fired']:
         explanations.append("\n✅ Aturan Aktif:")
@@ -585,31 +922,518 @@ def evaluate_water_quality(ph, tds, ntu, ml_result=None):
         if strength > 0:
             explanations.append(f"  {status_label}: {strength:.3f}")
     
-    confidence, confidence_explanation = calculate_confidence(
-        final_status,
-        details['firing_strength'], 
-        details['rules_fired'],
-        ph, tds, ntu,
-        details['ph_membership'],
-        details['tds_membership'],
-        details['ntu_membership'],
-        ml_result,
-        es_status
+    explanations.append(f"\nDefuzzifikasi Score: {result.score:.2f}")
+    
+    if ml_result is not None:
+        explanations.append(f"\n🤖 Prediksi ML: {result.ml_status}")
+        explanations.append(f"🧠 Prediksi ES: {result.es_status}")
+        explanations.append(f"⚖️ Keputusan: {result.decision_note}")
+        explanations.append(f"🎯 Status Final: {result.status}")
+    else:
+        explanations.append(f"Status Akhir: {result.status}")
+    
+    explanations.append(render_confidence_explanation(result._breakdown))
+    
+    return explanations
+
+
+# =============================
+# CACHE EVALUASI (LRU)
+# =============================
+
+# Resolusi sensor (jumlah desimal) untuk kunci cache: pH, TDS, NTU
+CACHE_DECIMALS = (2, 1, 2)
+
+
+class EvaluationCache:
+    """
+    Cache LRU terbatas untuk evaluate / evaluate_water_quality.
+
+    Input dikuantisasi ke resolusi sensor (round ke CACHE_DECIMALS) dan
+    evaluasi dilakukan pada nilai yang sudah dikuantisasi, sehingga semua
+    pembacaan dalam satu kunci mendapat hasil yang sama persis. Kunci juga
+    memuat label ML, metode & resolusi defuzzifikasi, dan basis aturan aktif.
+    """
+
+    def __init__(self, maxsize=1024, decimals=CACHE_DECIMALS):
+        if maxsize <= 0:
+            raise ValueError("maxsize harus > 0")
+        self.maxsize = maxsize
+        self.decimals = tuple(decimals)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def evaluate(self, ph, tds, ntu, ml_result=None):
+        ph, tds, ntu = (round(float(x), d) for x, d in zip((ph, tds, ntu), self.decimals))
+        # Basis aturan aktif ikut menjadi kunci agar hasil lama tidak terpakai saat hot reload
+        key = (ph, tds, ntu, ml_result, DEFUZZIFIKASI_METHOD, DEFUZZIFIKASI_RESOLUTION, _RULE_BASE)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        
+        if entry is None:
+            entry = _evaluate(ph, tds, ntu, ml_result)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        
+        # EvaluationResult dipakai bersama; teks yang sudah dirender ikut tersimpan
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'currsize': len(self._entries),
+                'maxsize': self.maxsize,
+                'decimals': self.decimals,
+            }
+
+
+_EVALUATION_CACHE = None
+
+
+def enable_evaluation_cache(maxsize=1024, decimals=CACHE_DECIMALS):
+    """
+    Aktifkan cache LRU untuk evaluate_water_quality (opt-in).
+    Aman dipanggil berulang (mis. setiap rerun Streamlit): cache yang sudah
+    aktif dengan konfigurasi sama tidak dibuat ulang.
+    """
+    global _EVALUATION_CACHE
+    cache = _EVALUATION_CACHE
+    if cache is None or cache.maxsize != maxsize or cache.decimals != tuple(decimals):
+        _EVALUATION_CACHE = EvaluationCache(maxsize, decimals)
+    return _EVALUATION_CACHE
+
+
+def disable_evaluation_cache():
+    """Matikan cache; evaluate_water_quality kembali menghitung setiap panggilan"""
+    global _EVALUATION_CACHE
+    _EVALUATION_CACHE = None
+
+
+def clear_evaluation_cache():
+    """Kosongkan cache (dipanggil otomatis saat basis aturan dimuat ulang)"""
+    cache = _EVALUATION_CACHE
+    if cache is not None:
+        cache.clear()
+
+
+def evaluation_cache_info():
+    """Statistik cache: hits, misses, evictions, invalidations, currsize, maxsize; None jika nonaktif"""
+    cache = _EVALUATION_CACHE
+    return cache.info() if cache is not None else None
+
+
+on_rule_base_change(lambda rule_base: clear_evaluation_cache())
+
+
+# =============================
+# INFERENSI BATCH (VEKTORISASI NUMPY)
+# =============================
+
+_DANGER_RULES = ['R1', 'R2', 'R3', 'R4', 'R5', 'R6']
+_PRIORITY_RULES = ['R19', 'R20', 'R21', 'R22']
+_HIGH_PRIORITY_RULES = ['R17', 'R18']
+_MEDIUM_PRIORITY_RULES = ['R11', 'R12', 'R13', 'R14', 'R15', 'R16']
+
+_STATUS_CODES = {label: code for code, label in enumerate(STATUS_LABELS)}
+TIDAK_LAYAK, CUKUP_LAYAK, LAYAK = range(len(STATUS_LABELS))
+
+# Ukuran potongan baris agar matriks (baris x 1000 titik) tetap kecil di memori
+_DEFUZZ_CHUNK = 2048
+
+
+def _fuzzifikasi_batch(x, sets):
+    return {name: trapmf_batch(x, params) for name, params in sets.items()}
+
+
+def _defuzzifikasi_centroid(firing_strength, rule_base):
+    """
+    Centroid eksak dari agregat max_k(min(s_k, mu_k(x))).
+    
+    Agregat bersifat piecewise-linear; semua titik patahnya adalah parameter
+    trapesium, perpotongan antar sisi miring, dan titik di mana sisi miring
+    mencapai tingkat potong s_k. Di antara titik patah yang sudah diurutkan,
+    integral mu dan x*mu dihitung tertutup per segmen.
+    """
+    slopes, intercepts = rule_base.output_ramps[:, 0], rule_base.output_ramps[:, 1]
+    clip_points = (firing_strength[:, None, :] - intercepts[None, :, None]) / slopes[None, :, None]
+    clip_points = np.clip(clip_points.reshape(len(firing_strength), -1), 0, 100)
+    
+    fixed = rule_base.fixed_breakpoints
+    x = np.sort(np.concatenate([
+        np.broadcast_to(fixed, (len(firing_strength), len(fixed))),
+        clip_points
+    ], axis=1), axis=1)
+    
+    mu = np.zeros_like(x)
+    for k, params in enumerate(rule_base.output_sets.values()):
+        mu = np.maximum(mu, np.minimum(firing_strength[:, k:k + 1], trapmf_batch(x, params)))
+    
+    x0, x1 = x[:, :-1], x[:, 1:]
+    mu0, mu1 = mu[:, :-1], mu[:, 1:]
+    h = x1 - x0
+    # Akumulasi berurutan (cumsum) agar identik dengan _centroid_scalar
+    area = np.cumsum(h * (mu0 + mu1) / 2, axis=1)[:, -1]
+    moment = np.cumsum(h * (x0 * (2 * mu0 + mu1) + x1 * (mu0 + 2 * mu1)) / 6, axis=1)[:, -1]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(area == 0, 50, moment / area)
+
+
+def _sampled_aggregate(firing_strength, rule_base, resolution):
+    """Agregat max_k(min(s_k, mu_k(x))) pada grid, per potongan _DEFUZZ_CHUNK baris"""
+    x_range, output_mu = rule_base.output_grid(resolution)
+    for start in range(0, len(firing_strength), _DEFUZZ_CHUNK):
+        fs = firing_strength[start:start + _DEFUZZ_CHUNK]
+        yield start, x_range, np.minimum(fs[:, :, None], output_mu[None, :, :]).max(axis=1)
+
+
+def _defuzzifikasi_sampled(firing_strength, rule_base, resolution=1000):
+    scores = np.empty(len(firing_strength))
+    for start, x_range, agregat in _sampled_aggregate(firing_strength, rule_base, resolution):
+        numerator = np.cumsum(x_range * agregat, axis=1)[:, -1]
+        denominator = np.cumsum(agregat, axis=1)[:, -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores[start:start + len(agregat)] = np.where(denominator == 0, 50, numerator / denominator)
+    return scores
+
+
+def _defuzzifikasi_bisector(firing_strength, rule_base, resolution=1000):
+    """Titik grid pertama di mana luas kumulatif agregat mencapai separuh luas total"""
+    scores = np.empty(len(firing_strength))
+    for start, x_range, agregat in _sampled_aggregate(firing_strength, rule_base, resolution):
+        cumulative = np.cumsum(agregat, axis=1)
+        total = cumulative[:, -1]
+        index = (cumulative >= total[:, None] / 2).argmax(axis=1)
+        scores[start:start + len(agregat)] = np.where(total == 0, 50, x_range[index])
+    return scores
+
+
+def _defuzzifikasi_mom(firing_strength, rule_base, resolution=1000):
+    """Rata-rata titik grid dengan keanggotaan agregat maksimum"""
+    scores = np.empty(len(firing_strength))
+    for start, x_range, agregat in _sampled_aggregate(firing_strength, rule_base, resolution):
+        peak = agregat.max(axis=1)
+        at_peak = agregat == peak[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = (at_peak * x_range).sum(axis=1) / at_peak.sum(axis=1)
+        scores[start:start + len(agregat)] = np.where(peak == 0, 50, mean)
+    return scores
+
+
+def _defuzzifikasi_weighted_average(firing_strength, rule_base):
+    """Rata-rata centroid himpunan output berbobot firing strength"""
+    numerator = np.cumsum(firing_strength * rule_base.output_centroids, axis=1)[:, -1]
+    denominator = np.cumsum(firing_strength, axis=1)[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator == 0, 50, numerator / denominator)
+
+
+def defuzzifikasi_output_batch(firing_strength, method=None, resolution=None):
+    """
+    Versi vektor dari defuzzifikasi_output.
+    firing_strength: array (n, 3) dengan urutan kolom OUTPUT_SETS.
+
+    Mode 'sampled' mengakumulasi secara berurutan (cumsum) agar identik
+    bit-per-bit dengan loop skalar. Di luar pita transisi keanggotaan firing
+    strength hanya bernilai 0 atau 1, sehingga baris seperti itu memakai
+    tabel 2^3 kombinasi yang dihitung sekali per metode.
+    """
+    method = method or DEFUZZIFIKASI_METHOD
+    resolution = resolution or DEFUZZIFIKASI_RESOLUTION
+    _check_defuzzifikasi(method, resolution)
+    
+    rule_base = _RULE_BASE
+    firing_strength = np.asarray(firing_strength, dtype=float).reshape(-1, len(OUTPUT_NAMES))
+    scores = np.empty(len(firing_strength))
+    
+    crisp = ((firing_strength == 0) | (firing_strength == 1)).all(axis=1)
+    if crisp.any():
+        weights = 1 << np.arange(len(OUTPUT_NAMES))
+        scores[crisp] = _crisp_scores(method, resolution, rule_base)[(firing_strength[crisp] == 1) @ weights]
+    
+    if not crisp.all():
+        rest = firing_strength[~crisp]
+        if method in SAMPLED_METHODS:
+            # Metode grid mahal per baris: hitung sekali per kombinasi unik
+            rest, inverse = np.unique(rest, axis=0, return_inverse=True)
+            scores[~crisp] = _defuzzify(rest, method, resolution, rule_base)[inverse.reshape(-1)]
+        else:
+            scores[~crisp] = _defuzzify(rest, method, resolution, rule_base)
+    
+    return scores
+
+
+_DEFUZZIFIERS = {
+    'centroid': _defuzzifikasi_centroid,
+    'sampled': _defuzzifikasi_sampled,
+    'bisector': _defuzzifikasi_bisector,
+    'mom': _defuzzifikasi_mom,
+    'weighted_average': _defuzzifikasi_weighted_average,
+}
+
+
+def _defuzzify(firing_strength, method, resolution, rule_base):
+    if method in SAMPLED_METHODS:
+        return _DEFUZZIFIERS[method](firing_strength, rule_base, resolution)
+    return _DEFUZZIFIERS[method](firing_strength, rule_base)
+
+
+def _crisp_scores(method, resolution, rule_base):
+    """Skor untuk semua kombinasi firing strength 0/1, dihitung sekali per metode"""
+    key = (method, resolution) if method in SAMPLED_METHODS else method
+    if key not in rule_base.crisp_scores:
+        combos = (np.arange(2 ** len(OUTPUT_NAMES))[:, None] >> np.arange(len(OUTPUT_NAMES))) & 1
+        rule_base.crisp_scores[key] = _defuzzify(combos.astype(float), method, resolution, rule_base)
+    return rule_base.crisp_scores[key]
+
+
+def _rule_columns(rule_base, rule_ids):
+    return [i for i, rule_id in enumerate(rule_base.rule_ids) if rule_id in rule_ids]
+
+
+def fuzzy_inference_batch(ph, tds, ntu, method=None, resolution=None):
+    """
+    Sistem inferensi fuzzy untuk banyak pembacaan sekaligus.
+    
+    Menerima array pH, TDS, dan NTU (ukuran sama) dan mengembalikan
+    (status, score, details, has_active_rules) seperti fuzzy_inference,
+    tetapi dalam bentuk array:
+    - status: kode status (indeks STATUS_LABELS)
+    - score: skor defuzzifikasi
+    - details['firing_strength']: array (n, 3) dengan urutan OUTPUT_SETS
+    - details['rule_strength']: array (n, jumlah aturan) dengan urutan RULE_IDS
+    - details['rules_active']: mask boolean (n, jumlah aturan)
+    method/resolution: metode defuzzifikasi per panggilan (default global)
+    """
+    rule_base = _RULE_BASE
+    ph = np.atleast_1d(np.asarray(ph, dtype=float))
+    tds = np.atleast_1d(np.asarray(tds, dtype=float))
+    ntu = np.atleast_1d(np.asarray(ntu, dtype=float))
+    n = len(ph)
+    
+    # 1. FUZZIFIKASI
+    memberships = tuple(
+        _fuzzifikasi_batch(x, rule_base.input_sets[v]) for x, v in zip((ph, tds, ntu), VARIABLES)
+    )
+    
+    # 2. INFERENSI FUZZY (operator AND = min, agregasi OR = max)
+    # Matriks keanggotaan per variabel diberi kolom tambahan bernilai 1.0 untuk
+    # anteseden yang tidak dipakai (indeks -1), sehingga min() tidak terpengaruh.
+    rule_strength = None
+    for v, membership in enumerate(memberships):
+        matrix = np.column_stack(list(membership.values()) + [np.ones(n)])
+        terms = matrix[:, rule_base.antecedent_index[:, v]]
+        rule_strength = terms if rule_strength is None else np.minimum(rule_strength, terms)
+    
+    rules_active = rule_strength > 0
+    firing_strength = np.zeros((n, len(OUTPUT_NAMES)))
+    for k in range(len(OUTPUT_NAMES)):
+        columns = rule_base.output_index == k
+        if columns.any():
+            firing_strength[:, k] = np.where(rules_active[:, columns], rule_strength[:, columns], 0).max(axis=1)
+    
+    has_active_rules = rules_active.any(axis=1)
+    
+    # 3. DEFUZZIFIKASI (hanya baris dengan aturan aktif)
+    score = np.zeros(n)
+    status = np.full(n, TIDAK_LAYAK)
+    if has_active_rules.any():
+        score[has_active_rules] = defuzzifikasi_output_batch(firing_strength[has_active_rules], method, resolution)
+        # argmax memilih indeks pertama saat seri, sama dengan loop skalar
+        status[has_active_rules] = firing_strength[has_active_rules].argmax(axis=1)
+    
+    details = {
+        'ph_membership': memberships[0],
+        'tds_membership': memberships[1],
+        'ntu_membership': memberships[2],
+        'firing_strength': firing_strength,
+        'rule_ids': rule_base.rule_ids,
+        'rule_strength': rule_strength,
+        'rules_active': rules_active,
+        'score': score,
+        'status': status,
+        'has_active_rules': has_active_rules,
+    }
+    
+    return status, score, details, has_active_rules
+
+
+def _status_codes(labels, n, strip=True):
+    """Ubah label status (string atau kode) menjadi array kode; label tak dikenal = -1"""
+    def to_code(label):
+        if isinstance(label, str):
+            return _STATUS_CODES.get(label.strip() if strip else label, -1)
+        return -1 if label is None else int(label)
+    
+    if isinstance(labels, str) or np.ndim(labels) == 0:
+        return np.full(n, to_code(labels))
+    
+    labels = np.asarray(labels)
+    if labels.dtype.kind in 'iu':
+        return np.broadcast_to(labels.astype(int), (n,)).copy()
+    
+    if labels.dtype.kind != 'U':
+        return np.broadcast_to(np.array([to_code(label) for label in labels.ravel()]), (n,)).copy()
+    
+    # Hanya label unik yang dipetakan, lalu disebar kembali ke semua baris
+    unique_labels, inverse = np.unique(labels, return_inverse=True)
+    codes = np.array([to_code(str(label)) for label in unique_labels])
+    return np.broadcast_to(codes[inverse.reshape(-1)], (n,)).copy()
+
+
+def hybrid_decision_batch(es_status, ml_result=None):
+    """
+    Versi vektor dari logika voting hybrid_decision.
+    
+    es_status: kode/label status ES per baris; ml_result: None, satu label,
+    atau array label/kode ML. Label ML dibandingkan apa adanya (tanpa strip),
+    sama seperti hybrid_decision.
+    Mengembalikan (final_status, decision): kode status final dan indeks
+    DECISION_NOTES per baris (-1 jika ML tidak tersedia).
+    """
+    es_codes = _status_codes(es_status, np.size(es_status))
+    n = len(es_codes)
+    # Pada semua cabang status final mengikuti ES
+    final_status = es_codes.copy()
+    
+    if ml_result is None:
+        return final_status, np.full(n, -1)
+    
+    ml_codes = _status_codes(ml_result, n, strip=False)
+    ml_tidak = ml_codes == TIDAK_LAYAK
+    ml_layak = ml_codes == LAYAK
+    decision = np.select(
+        [
+            ml_codes == es_codes,
+            ml_tidak & (es_codes == LAYAK),
+            (ml_tidak | ml_layak) & (es_codes == CUKUP_LAYAK),
+            ml_layak & (es_codes == TIDAK_LAYAK),
+        ],
+        [DECISION_AGREE, DECISION_ES_LAYAK, DECISION_ES_CUKUP, DECISION_SAFETY],
+        DECISION_ES_ONLY
+    )
+    return final_status, decision
+
+
+def calculate_confidence_batch(status, firing_strength, rules_active, ph, tds, ntu, ml_result=None, es_result=None):
+    """
+    Versi vektor dari calculate_confidence (tanpa teks penjelasan).
+    
+    status, es_result: kode/label status per baris; firing_strength: array
+    (n, 3) urutan OUTPUT_SETS; rules_active: mask boolean (n, jumlah aturan)
+    urutan RULE_IDS; ml_result: None, satu label, atau array label/kode.
+    Mengembalikan array confidence (0-100) yang sama dengan calculate_confidence
+    per baris.
+    """
+    ph = np.atleast_1d(np.asarray(ph, dtype=float))
+    tds = np.atleast_1d(np.asarray(tds, dtype=float))
+    ntu = np.atleast_1d(np.asarray(ntu, dtype=float))
+    n = len(ph)
+    status = _status_codes(status, n)
+    firing_strength = np.asarray(firing_strength, dtype=float).reshape(n, len(OUTPUT_NAMES))
+    rules_active = np.asarray(rules_active, dtype=bool).reshape(n, -1)
+    
+    rule_base = _RULE_BASE
+    def any_rule(rule_ids):
+        return rules_active[:, _rule_columns(rule_base, rule_ids)].any(axis=1)
+    
+    # === CEK RULE R1-R6 (ALARM BAHAYA) ===
+    danger = any_rule(_DANGER_RULES)
+    
+    # === KOMPONEN ML (0% atau 25%) ===
+    if ml_result is not None:
+        ml_codes = _status_codes(ml_result, n)
+        ml_layak = ml_codes == LAYAK
+        if es_result is not None:
+            ml_agree = (ml_codes >= 0) & (ml_codes == _status_codes(es_result, n))
+        else:
+            ml_agree = np.zeros(n, dtype=bool)
+    else:
+        ml_layak = ml_agree = np.zeros(n, dtype=bool)
+    ml_confidence = np.where(ml_agree, 25, 0)
+    
+    # === KOMPONEN ES ===
+    strength_bonus = np.trunc(firing_strength.max(axis=1) * 10).astype(int)
+    
+    # Status Layak Minum (base 40, max 75)
+    quality_layak = (
+        np.select([(6.95 <= ph) & (ph <= 7.05), (6.8 <= ph) & (ph <= 7.2), (6.5 <= ph) & (ph <= 8.5)], [3, 2, 1], 0)
+        + np.select([tds <= 300, tds <= 500, tds <= 600], [3, 2, 1], 0)
+        + np.select([ntu <= 1, ntu <= 3, ntu <= 5], [4, 3, 2], 0)
     )
+    specificity_layak = np.select([any_rule(_PRIORITY_RULES), any_rule(_HIGH_PRIORITY_RULES)], [15, 10], 0)
+    es_layak = np.clip(40 + strength_bonus + quality_layak + specificity_layak, 0, 75)
+    
+    # Status Cukup Layak Minum (base 25, max 50)
+    quality_cukup = (
+        np.select([(6.95 <= ph) & (ph <= 7.05), (6.8 <= ph) & (ph <= 7.2)], [2, 1], 0)
+        + np.select([tds <= 300, tds <= 500], [2, 1], 0)
+        + np.where(ntu <= 1, 1, 0)
+    )
+    specificity_cukup = np.select([any_rule(_MEDIUM_PRIORITY_RULES), rules_active.any(axis=1)], [10, 5], 0)
+    es_cukup = np.clip(25 + strength_bonus + quality_cukup + specificity_cukup, 0, 50)
+    
+    es_confidence = np.select([status == LAYAK, status == CUKUP_LAYAK], [es_layak, es_cukup], 0)
+    
+    # === TOTAL CONFIDENCE ===
+    return np.where(danger, np.where(ml_layak, 25, 0), np.clip(ml_confidence + es_confidence, 0, 100))
+
+
+def evaluate_water_quality_batch(ph, tds, ntu, ml_result=None):
+    """
+    Evaluasi kualitas air untuk banyak pembacaan sekaligus.
     
-    explanations.append(f"\nDefuzzifikasi Score: {score:.2f}")
+    ml_result boleh None, satu label, atau array label/kode status ML.
+    Mengembalikan (final_status, details, confidence, has_active_rules)
+    dengan final_status dan confidence berupa array; hasilnya sama dengan
+    memanggil evaluate_water_quality per baris, tanpa teks penjelasan.
+    details['decision'] berisi indeks DECISION_NOTES (-1 tanpa ML).
+    """
+    es_status, score, details, has_active_rules = fuzzy_inference_batch(ph, tds, ntu)
+    n = len(es_status)
+    
+    final_status, decision = hybrid_decision_batch(es_status, ml_result)
+    confidence = calculate_confidence_batch(
+        final_status, details['firing_strength'], details['rules_active'],
+        ph, tds, ntu, ml_result, es_status
+    )
     
+    # Tanpa aturan aktif: 25% hanya jika label ML persis "Layak Minum" (tanpa strip)
     if ml_result is not None:
-        explanations.append(f"\n🤖 Prediksi ML: {ml_status}")
-        explanations.append(f"🧠 Prediksi ES: {es_status}")
-        explanations.append(f"⚖️ Keputusan: {decision_note}")
-        explanations.append(f"🎯 Status Final: {final_status}")
+        ml_layak_exact = _status_codes(ml_result, n, strip=False) == LAYAK
+        ml_codes = _status_codes(ml_result, n)
     else:
-        explanations.append(f"Status Akhir: {final_status}")
+        ml_layak_exact = np.zeros(n, dtype=bool)
+        ml_codes = np.full(n, -1)
+    confidence = np.where(has_active_rules, confidence, np.where(ml_layak_exact, 25, 0))
     
-    explanations.append(confidence_explanation)
+    details['es_status'] = es_status
+    details['ml_status'] = ml_codes
+    details['decision'] = decision
     
-    return final_status, explanations, confidence, has_active_rules
+    return final_status, details, confidence, has_active_rules
 
 
 def get_recommendations(status, ph, tds, ntu):
@@ -0,0 +1,343 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+import Sistem_Pakar as sp
+
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# TABEL KEPUTUSAN 3-D (LOOKUP TABLE) UNTUK SISTEM PAKAR
+# =============================
+#
+# fuzzy_inference adalah fungsi murni atas domain terbatas
+# (pH 0-14, TDS 0-2000, NTU 0-300), sehingga score dan firing strength
+# bisa dihitung sekali di atas grid lalu dijawab dengan interpolasi
+# trilinear. Grid selalu memuat semua titik patah himpunan fuzzy, jadi
+# di dalam sel yang keanggotaannya konstan hasil interpolasi sama dengan
+# mesin eksak; sel pada pita transisi dijawab ulang oleh mesin eksak.
+#
+# Setelah rules.json dimuat ulang (hot reload) atau metode defuzzifikasi
+# diganti, tabel yang sidik jarinya tidak lagi cocok tidak dipakai: semua
+# query dijawab mesin eksak sampai refresh() membangun ulang tabel.
+
+DOMAIN = {
+    'ph': (0.0, 14.0),
+    'tds': (0.0, 2000.0),
+    'ntu': (0.0, 300.0),
+}
+
+# Jarak antar titik grid default per sumbu (pH, TDS, NTU)
+DEFAULT_RESOLUTION = (0.25, 50.0, 5.0)
+
+# Jumlah titik fallback maksimum yang dihitung lewat fuzzy_inference skalar
+_SCALAR_FALLBACK_LIMIT = 16
+
+# Kolom nilai yang disimpan per titik grid
+_VALUE_COLUMNS = ['score'] + [f'fs_{name}' for name in sp.OUTPUT_SETS]
+
+
+def _axis_nodes(sets, domain, step):
+    """Titik grid satu sumbu: grid seragam digabung dengan semua titik patah himpunan"""
+    low, high = domain
+    uniform = np.linspace(low, high, int(round((high - low) / step)) + 1)
+    breakpoints = [v for params in sets.values() for v in params if low <= v <= high]
+    return np.unique(np.concatenate([uniform, breakpoints]))
+
+
+def _constant_cells(nodes, sets):
+    """True untuk sel yang semua derajat keanggotaannya konstan (tidak ada pita transisi)"""
+    memberships = np.array([sp.trapmf_batch(nodes, params) for params in sets.values()])
+    return (memberships[:, :-1] == memberships[:, 1:]).all(axis=0)
+
+
+def rule_base_fingerprint():
+    """Sidik jari basis pengetahuan; tabel dibangun ulang jika berubah"""
+    payload = json.dumps([
+        sp.PH_SETS, sp.TDS_SETS, sp.NTU_SETS, sp.OUTPUT_SETS,
+        [list(rule[:3]) for rule in sp.RULES], sp.DEFUZZIFIKASI_METHOD,
+        sp.DEFUZZIFIKASI_RESOLUTION if sp.DEFUZZIFIKASI_METHOD in sp.SAMPLED_METHODS else None,
+    ], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FuzzyLookupTable:
+    """
+    Mesin inferensi fuzzy berbasis tabel keputusan yang sudah dihitung.
+
+    Nilai grid disimpan sebagai `<path>.npy` (dibuka dengan mmap, read-only)
+    dan sumbu + metadata sebagai `<path>.npz`. Jika file sudah ada dan
+    cocok dengan basis aturan serta resolusi saat ini, tabel langsung dimuat
+    tanpa dibangun ulang.
+
+    Tabel yang sudah basi (basis aturan berubah sejak dibangun, lihat
+    is_current) dilewati dan query memakai mesin eksak; refresh() membangun
+    ulang tabel untuk basis aturan yang baru.
+    """
+
+    def __init__(self, path="fuzzy_lut", resolution=DEFAULT_RESOLUTION, exact_fallback=True, rebuild=False):
+        self.path = path
+        self.resolution = tuple(float(r) for r in resolution)
+        self.exact_fallback = exact_fallback
+        self.report = None
+        self.fingerprint = None
+        self._checked = None
+        self._current = False
+
+        if rebuild or not self._load():
+            self.build()
+
+    @property
+    def values_file(self):
+        return f"{self.path}.npy"
+
+    @property
+    def meta_file(self):
+        return f"{self.path}.npz"
+
+    def _load(self):
+        if not (os.path.exists(self.values_file) and os.path.exists(self.meta_file)):
+            return False
+
+        with np.load(self.meta_file) as meta:
+            fingerprint = str(meta['fingerprint'])
+            if fingerprint != rule_base_fingerprint():
+                logger.info("Lookup table '%s' tidak cocok dengan basis aturan, membangun ulang", self.path)
+                return False
+            if tuple(meta['resolution'].tolist()) != self.resolution:
+                return False
+            self.nodes = [meta['ph_nodes'], meta['tds_nodes'], meta['ntu_nodes']]
+            self.report = json.loads(str(meta['report']))
+
+        self.values = np.load(self.values_file, mmap_mode='r')
+        self._prepare(fingerprint)
+        logger.info("Lookup table loaded from %s (shape %s)", self.values_file, self.values.shape,
+                    extra={'fields': {'event': 'lut_loaded', 'path': self.values_file,
+                                      'shape': list(self.values.shape)}})
+        return True
+
+    def build(self):
+        """Hitung tabel dengan mesin eksak, simpan ke disk, dan laporkan galatnya"""
+        start = time.perf_counter()
+        fingerprint = rule_base_fingerprint()
+        self.nodes = [
+            _axis_nodes(sp.PH_SETS, DOMAIN['ph'], self.resolution[0]),
+            _axis_nodes(sp.TDS_SETS, DOMAIN['tds'], self.resolution[1]),
+            _axis_nodes(sp.NTU_SETS, DOMAIN['ntu'], self.resolution[2]),
+        ]
+
+        grid = np.meshgrid(*self.nodes, indexing='ij')
+        status, score, details, has_active_rules = sp.fuzzy_inference_batch(*(g.ravel() for g in grid))
+        values = np.column_stack([score, details['firing_strength']])
+        values = values.reshape(grid[0].shape + (len(_VALUE_COLUMNS),))
+
+        np.save(self.values_file, values)
+        self.values = np.load(self.values_file, mmap_mode='r')
+        self._prepare(fingerprint)
+
+        self.report = self.error_report()
+        self.report['build_seconds'] = time.perf_counter() - start
+        self.report['grid_shape'] = list(values.shape[:3])
+
+        np.savez(
+            self.meta_file,
+            ph_nodes=self.nodes[0], tds_nodes=self.nodes[1], ntu_nodes=self.nodes[2],
+            resolution=np.array(self.resolution),
+            fingerprint=np.array(fingerprint),
+            report=np.array(json.dumps(self.report)),
+        )
+
+        logger.info(
+            "Lookup table built in %.2fs, grid %s; interpolasi vs eksak: max |Δscore| = %.4f, "
+            "mean |Δscore| = %.4f, status sama = %.2f%%, fallback eksak = %.2f%% sampel",
+            self.report['build_seconds'], self.report['grid_shape'], self.report['max_score_error'],
+            self.report['mean_score_error'], self.report['status_agreement'] * 100,
+            self.report['fallback_rate'] * 100,
+            extra={'fields': dict(self.report, event='lut_built', path=self.values_file)})
+        return self.report
+
+    def is_current(self):
+        """
+        True jika tabel masih cocok dengan basis aturan dan metode defuzzifikasi
+        aktif. Sidik jari hanya dihitung ulang saat objek basis aturan, metode,
+        atau resolusi berganti, sehingga pengecekan per query murah.
+        """
+        checked = self._checked
+        rule_base = sp.get_rule_base()
+        method, resolution = sp.DEFUZZIFIKASI_METHOD, sp.DEFUZZIFIKASI_RESOLUTION
+        if checked is None or checked[0] is not rule_base or checked[1:] != (method, resolution):
+            self._checked = (rule_base, method, resolution)
+            current = rule_base_fingerprint() == self.fingerprint
+            if self._current and not current:
+                logger.warning("Lookup table '%s' basi setelah basis aturan berubah; memakai mesin eksak",
+                               self.path, extra={'fields': {'event': 'lut_stale', 'path': self.path}})
+            self._current = current
+        return self._current
+
+    def refresh(self):
+        """Bangun ulang tabel jika sudah basi; True jika dibangun ulang"""
+        if self.is_current():
+            return False
+        self.build()
+        return True
+
+    def _prepare(self, fingerprint):
+        self.fingerprint = fingerprint
+        self._checked = None
+        self._current = True
+        self._constant = [
+            _constant_cells(self.nodes[0], sp.PH_SETS),
+            _constant_cells(self.nodes[1], sp.TDS_SETS),
+            _constant_cells(self.nodes[2], sp.NTU_SETS),
+        ]
+        # Tampilan ndarray biasa atas memmap dan list Python untuk jalur skalar query_one
+        self._array = np.asarray(self.values)
+        self._node_lists = [nodes.tolist() for nodes in self.nodes]
+        self._constant_lists = [constant.tolist() for constant in self._constant]
+
+    def _interpolate(self, ph, tds, ntu):
+        """Interpolasi trilinear; mengembalikan nilai (n, 4) dan mask titik yang perlu mesin eksak"""
+        n = len(ph)
+        index, weight = [], []
+        needs_exact = np.zeros(n, dtype=bool)
+        for x, nodes, constant in zip((ph, tds, ntu), self.nodes, self._constant):
+            i = np.clip(np.searchsorted(nodes, x, side='right') - 1, 0, len(nodes) - 2)
+            t = (x - nodes[i]) / (nodes[i + 1] - nodes[i])
+            needs_exact |= ~constant[i] | (x < nodes[0]) | (x > nodes[-1]) | np.isnan(x)
+            index.append(i)
+            weight.append(np.clip(t, 0, 1))
+
+        # Indeks datar ke tabel (titik, kolom) jauh lebih cepat daripada indeks 3-D pada memmap
+        shape = self.values.shape[:3]
+        flat_values = self.values.reshape(-1, len(_VALUE_COLUMNS))
+        base = np.ravel_multi_index(index, shape)
+        strides = [shape[1] * shape[2], shape[2], 1]
+
+        result = np.zeros((n, len(_VALUE_COLUMNS)))
+        for corner in range(8):
+            offsets = [(corner >> axis) & 1 for axis in range(3)]
+            w = np.ones(n)
+            for t, offset in zip(weight, offsets):
+                w = w * (t if offset else 1 - t)
+            corner_index = base + sum(o * stride for o, stride in zip(offsets, strides))
+            result += w[:, None] * np.take(flat_values, corner_index, axis=0)
+
+        return result, needs_exact
+
+    def query(self, ph, tds, ntu):
+        """
+        Inferensi melalui tabel. Mengembalikan (status, score, firing_strength)
+        berupa array: kode status (indeks STATUS_LABELS), skor defuzzifikasi,
+        dan firing strength (n, 3) dengan urutan OUTPUT_SETS.
+        """
+        ph = np.atleast_1d(np.asarray(ph, dtype=float))
+        tds = np.atleast_1d(np.asarray(tds, dtype=float))
+        ntu = np.atleast_1d(np.asarray(ntu, dtype=float))
+
+        if not self.is_current():
+            status, score, details, _ = sp.fuzzy_inference_batch(ph, tds, ntu)
+            return status, score, details['firing_strength']
+
+        values, needs_exact = self._interpolate(ph, tds, ntu)
+
+        if self.exact_fallback and needs_exact.any():
+            rows = np.flatnonzero(needs_exact)
+            if len(rows) <= _SCALAR_FALLBACK_LIMIT:
+                # Untuk beberapa titik saja, jalur skalar lebih murah daripada overhead batch
+                for i in rows:
+                    _, score, details, _ = sp.fuzzy_inference(ph[i], tds[i], ntu[i])
+                    values[i, 0] = score
+                    values[i, 1:] = list(details['firing_strength'].values())
+            else:
+                _, score, details, _ = sp.fuzzy_inference_batch(ph[rows], tds[rows], ntu[rows])
+                values[rows, 0] = score
+                values[rows, 1:] = details['firing_strength']
+
+        firing_strength = values[:, 1:]
+        status = np.where(firing_strength.max(axis=1) > 0, firing_strength.argmax(axis=1), sp.TIDAK_LAYAK)
+        return status, values[:, 0], firing_strength
+
+    def query_one(self, ph, tds, ntu):
+        """
+        Jalur skalar tanpa overhead NumPy untuk aliran data satu-per-satu.
+        Mengembalikan (status, score, firing_strength) seperti fuzzy_inference:
+        label status, skor, dan dict firing strength per himpunan output.
+        """
+        if not self.is_current():
+            status, score, details, _ = sp.fuzzy_inference(ph, tds, ntu)
+            return status, score, details['firing_strength']
+
+        index, weight = [], []
+        needs_exact = False
+        for x, nodes, constant in zip((ph, tds, ntu), self._node_lists, self._constant_lists):
+            if not nodes[0] <= x <= nodes[-1]:
+                needs_exact = True
+                break
+            i = min(bisect.bisect_right(nodes, x) - 1, len(nodes) - 2)
+            if not constant[i]:
+                needs_exact = True
+                break
+            index.append(i)
+            weight.append((x - nodes[i]) / (nodes[i + 1] - nodes[i]))
+
+        if needs_exact:
+            if not self.exact_fallback:
+                values = self.query(ph, tds, ntu)
+                firing_strength = dict(zip(sp.OUTPUT_SETS, values[2][0].tolist()))
+                return sp.STATUS_LABELS[values[0][0]], float(values[1][0]), firing_strength
+            status, score, details, _ = sp.fuzzy_inference(ph, tds, ntu)
+            return status, score, details['firing_strength']
+
+        # Sel konstan: trilinear atas blok 2x2x2 sudut (satu kali akses ke tabel)
+        i, j, k = index
+        block = self._array[i:i + 2, j:j + 2, k:k + 2].tolist()
+        result = [0.0] * len(_VALUE_COLUMNS)
+        for corner in range(8):
+            offsets = [(corner >> axis) & 1 for axis in range(3)]
+            w = 1.0
+            for t, offset in zip(weight, offsets):
+                w *= t if offset else 1 - t
+            for c, value in enumerate(block[offsets[0]][offsets[1]][offsets[2]]):
+                result[c] += w * value
+
+        firing_strength = dict(zip(sp.OUTPUT_SETS, result[1:]))
+        max_strength = max(result[1:])
+        status = sp.STATUS_LABELS[result[1:].index(max_strength)] if max_strength > 0 else sp.STATUS_LABELS[sp.TIDAK_LAYAK]
+        return status, result[0], firing_strength
+
+    def error_report(self, samples=200_000, seed=0):
+        """
+        Bandingkan interpolasi murni (tanpa fallback) dengan mesin eksak pada
+        sampel acak: separuh seragam di seluruh domain, separuh di sekitar
+        titik patah keanggotaan.
+        """
+        rng = np.random.default_rng(seed)
+        half = samples // 2
+        columns = []
+        for name, sets in (('ph', sp.PH_SETS), ('tds', sp.TDS_SETS), ('ntu', sp.NTU_SETS)):
+            low, high = DOMAIN[name]
+            breakpoints = np.array([v for params in sets.values() for v in params])
+            spread = (high - low) * 0.001
+            near = rng.choice(breakpoints, samples - half) + rng.uniform(-spread, spread, samples - half)
+            columns.append(np.clip(np.concatenate([rng.uniform(low, high, half), near]), low, high))
+
+        exact_status, exact_score, _, _ = sp.fuzzy_inference_batch(*columns)
+        values, needs_exact = self._interpolate(*columns)
+        firing_strength = values[:, 1:]
+        status = np.where(firing_strength.max(axis=1) > 0, firing_strength.argmax(axis=1), sp.TIDAK_LAYAK)
+        score_error = np.abs(values[:, 0] - exact_score)
+
+        return {
+            'samples': int(samples),
+            'max_score_error': float(score_error.max()),
+            'mean_score_error': float(score_error.mean()),
+            'status_agreement': float((status == exact_status).mean()),
+            'fallback_rate': float(needs_exact.mean()),
+            'max_score_error_without_fallback_cells': float(score_error[~needs_exact].max(initial=0)),
+        }
@@ -1,14 +1,19 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
-import json
+import os
+import time
+import uuid
 import pandas as pd
 from collections import deque
 from streamlit_autorefresh import st_autorefresh
 import plotly.graph_objects as go
-import re
-from Machine_Learning import WaterQualityModel
-from Sistem_Pakar import evaluate_water_quality, get_recommendations
+from Machine_Learning import WaterQualityModel, configure_logging
+from Sistem_Pakar import evaluate, reload_rule_base_if_changed, enable_evaluation_cache
+from Monte_Carlo import propagate
+from Model_Registry import REGISTRY_DIR, HotSwapModel, ModelRegistry
+from Inference_Service import InferenceClient, ServiceEvaluation, ServiceUnavailable
+from Online_Learning import OnlineLearner
+from Firebase_Connection import ConnectionManager
+from Evaluation_Worker import STORE_FILE, WORKER_STALE_AFTER, ResultStore, heartbeat_age
 
 
 # =====================================================
@@ -26,6 +31,13 @@ PAGE_CONFIG = {
 REFRESH_INTERVAL = 3000  # milliseconds
 HISTORY_MAXLEN = 30
 DEVICE_TIMEOUT = 15  # seconds - consider device offline if no update within this time
+EVALUATION_CACHE_SIZE = 256  # LRU entries for expert-system results (quantized sensor readings)
+UNCERTAINTY_SAMPLES = 2000  # Monte Carlo samples per reading (uncertainty mode)
+MODEL_FILE = "water_potability_model.pkl"
+MODEL_REGISTRY_DIR = os.environ.get("ML_REGISTRY_DIR", REGISTRY_DIR)  # versioned models (hot swap)
+INFERENCE_SERVICE_URL = os.environ.get("INFERENCE_SERVICE_URL")  # e.g. http://127.0.0.1:8765 (serve_inference.py)
+ONLINE_LEARNING = os.environ.get("ONLINE_LEARNING") == "1"  # opt-in: challenger dari pembacaan berlabel (Online_Learning.py)
+EVALUATION_STORE = os.environ.get("EVALUATION_STORE", STORE_FILE)  # hasil worker headless (run_worker.py) -> mode viewer
 
 # =====================================================
 # SVG ICONS
@@ -79,43 +91,166 @@ def initialize_session_state():
         st.session_state.last_timestamp = None
     if "no_update_count" not in st.session_state:
         st.session_state.no_update_count = 0
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+
+
+@st.cache_resource
+def get_firebase_manager():
+    """Koneksi Firebase bersama untuk semua sesi (satu app per credential + URL)"""
+    return ConnectionManager()
 
 
 def init_firebase(key_file, db_url: str) -> tuple:
-    """Initialize Firebase with proper error handling"""
+    """
+    Koneksi Firebase untuk sesi ini dengan proper error handling.
+    Rerun berikutnya memakai app, HTTP session dan token yang sama.
+    Returns: (connection atau None, pesan)
+    """
     try:
-        key_file.seek(0)
-        key_dict = json.load(key_file)
-        
-        if firebase_admin._apps:
-            firebase_admin.delete_app(firebase_admin.get_app())
-        
-        cred = credentials.Certificate(key_dict)
-        firebase_admin.initialize_app(
-            cred,
-            {
-                'databaseURL': db_url,
-                'databaseAuthVariableOverride': {
-                    'uid': 'streamlit-app'
-                }
-            }   
-        )
-        return True, "✅ Firebase connected"
+        connection = get_firebase_manager().acquire(st.session_state.session_id, key_file.getvalue(), db_url)
+        return connection, "✅ Firebase connected"
     except Exception as e:
-        return False, f"❌ Error: {str(e)}"
+        return None, f"❌ Error: {str(e)}"
 
 
 @st.cache_resource
 def load_model():
-    """Load ML model with caching"""
-    return WaterQualityModel("water_potability_model.pkl")
+    """
+    Load ML model with caching. Jika registry model berisi versi, model mengikuti
+    versi aktif registry dan ditukar di latar belakang saat versi baru dipromosikan.
+    """
+    registry = ModelRegistry(MODEL_REGISTRY_DIR)
+    if registry.current_version() is not None:
+        return HotSwapModel(registry)
+    return WaterQualityModel(MODEL_FILE)
+
+
+@st.cache_resource
+def get_inference_client():
+    """Klien layanan inferensi lokal; None jika INFERENCE_SERVICE_URL tidak di-set"""
+    return InferenceClient(INFERENCE_SERVICE_URL) if INFERENCE_SERVICE_URL else None
+
+
+@st.cache_resource
+def get_online_learner():
+    """
+    Pembelajaran online (opt-in via ONLINE_LEARNING=1). Butuh registry model
+    berisi versi: challenger yang lebih baik dipromosikan ke registry lalu
+    ditukar oleh HotSwapModel. None jika tidak aktif.
+    """
+    registry = ModelRegistry(MODEL_REGISTRY_DIR)
+    if not ONLINE_LEARNING or registry.current_version() is None:
+        return None
+    return OnlineLearner(registry)
 
 
-def get_sensor_data_wib(path: str) -> tuple:
-    """Fetch data from Firebase and ensure WIB timestamp"""
+def render_operator_feedback(record, status, ph, tds, ntu):
+    """
+    Label operator untuk pembacaan saat ini (mengalahkan label sistem pakar).
+    record(ph, tds, ntu, label) mencatat label; status dari OnlineLearner.status().
+    """
+    st.markdown("### Koreksi Operator")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Label: Layak Minum", key="label_potable", use_container_width=True):
+            record(ph, tds, ntu, 1)
+            st.success("Label operator dicatat")
+    with col2:
+        if st.button("Label: Tidak Layak Minum", key="label_not_potable", use_container_width=True):
+            record(ph, tds, ntu, 0)
+            st.success("Label operator dicatat")
+    
+    report = status['last_report']
+    st.caption(
+        f"Pembelajaran online: {status['pending'] + status['queued']} pembacaan baru, "
+        f"{status['cycles']} siklus, {status['promotions']} promosi"
+        + (f" | siklus terakhir: {report['decision']}" if report else "")
+    )
+
+
+def record_operator_label(ph, tds, ntu, label):
+    """Mode viewer: label operator ke inbox worker (worker yang mencatatnya ke OnlineLearner)"""
+    get_result_store().inbox.put(ph, tds, ntu, label)
+
+
+@st.cache_resource
+def get_result_store():
+    """Store hasil worker evaluasi headless (Evaluation_Worker.py)"""
+    return ResultStore(EVALUATION_STORE)
+
+
+def render_worker_status(snapshot):
+    """Mode viewer: status worker evaluasi di sidebar"""
+    worker = snapshot['worker']
+    age = heartbeat_age(snapshot)
+    if age > WORKER_STALE_AFTER:
+        st.error(
+            f"❌ Worker evaluasi tidak aktif (heartbeat {age:.0f} detik lalu). Jalankan run_worker.py, "
+            f"atau hapus {EVALUATION_STORE} untuk kembali ke mode interaktif."
+        )
+    else:
+        st.success(f"✅ Worker evaluasi aktif (PID {worker['pid']})")
+    st.caption(
+        f"Path: {worker['path']} | stream: {worker['stream']['state']} | "
+        f"{worker['evaluations']} evaluasi, {worker['uploads']} upload status"
+        + (f" | model {worker['model_version']}" if worker['model_version'] else "")
+    )
+    if worker['upload_error']:
+        st.warning(f"⚠️ Upload status gagal: {worker['upload_error']}")
+
+
+def run_inference(ph, tds, ntu):
+    """
+    (ml_result, evaluation) untuk satu pembacaan. Jika layanan inferensi
+    dikonfigurasi, ML + sistem pakar dijalankan di sana (micro-batch bersama
+    sesi lain); jika layanan tidak bisa dihubungi, evaluasi dilakukan lokal.
+    """
+    client = get_inference_client()
+    if client is not None:
+        try:
+            evaluation = client.evaluate(ph, tds, ntu)
+            return evaluation.ml_result, evaluation
+        except ServiceUnavailable as e:
+            st.sidebar.warning(f"⚠️ Layanan inferensi tidak tersedia, evaluasi lokal: {e}")
+    
+    model = load_model()
+    ml_result = model.predict(ph, tds, ntu)
+    return ml_result, evaluate(ph, tds, ntu, ml_result)
+
+
+def render_model_load_report():
+    """Waktu muat dan memori model ML (model dimuat lazy pada prediksi pertama)"""
     try:
-        ref = db.reference(path)
-        data = ref.get()
+        model = load_model()
+    except FileNotFoundError:
+        st.caption("Model ML tidak ditemukan")
+        return
+    
+    version = f" {model.version}" if isinstance(model, HotSwapModel) else ""
+    report = model.load_report
+    if report is None:
+        st.caption(f"Model ML{version}: dimuat saat prediksi pertama")
+        return
+    
+    rss = report['rss_after_mb']
+    st.caption(
+        f"Model ML{version}: dimuat via {report['source']} dalam {report['load_seconds'] * 1000:.0f} ms"
+        + (f" | RSS proses {rss:.0f} MB" if rss is not None else "")
+    )
+
+
+def get_sensor_data_wib(connection, path: str) -> tuple:
+    """
+    Data sensor terbaru. Selama listener push (Sensor_Stream.py) live, dibaca
+    dari ring buffer di memori tanpa read ke Firebase; saat listener masih
+    menyambung/backoff, fallback ke satu get() seperti sebelumnya.
+    """
+    try:
+        stream = connection.stream(path)
+        data = stream.latest() if stream.is_live else None
+        if data is None:
+            data = connection.get(path)
 
         if not data:
             return None, "Tidak ada data"
@@ -138,13 +273,11 @@ def get_sensor_data_wib(path: str) -> tuple:
         return None, str(e)
 
 
-def upload_status_to_firebase(sensor_path: str, status: str, confidence: int):
+def upload_status_to_firebase(connection, sensor_path: str, status: str, confidence: int):
     """Upload final status and confidence to sensor node in Firebase"""
     try:
-        ref = db.reference(sensor_path)
-        
         # Update only status and confidence fields in the sensor node
-        ref.update({
+        connection.update(sensor_path, {
             "status": status
         })
     except Exception as e:
@@ -379,7 +512,7 @@ def render_status_and_confidence(status: str, confidence: int):
     """, unsafe_allow_html=True)
 
 
-def render_decision_explanation(ml_result: str, es_result: str, final_status: str, explanations: list, rule_ids: list, has_active_rules: bool):
+def render_decision_explanation(ml_result: str, es_result: str, final_status: str, rules_fired: list, has_active_rules: bool):
     """Render decision explanation card with parallel processing"""
     ml_result_clean = ml_result.strip()
     es_result_clean = es_result.strip()
@@ -390,11 +523,10 @@ def render_decision_explanation(ml_result: str, es_result: str, final_status: st
     # Format Expert System result
     if has_active_rules:
         rules_html = "<ul style='margin-top:5px;'>"
-        for exp in explanations:
-            if exp.startswith("R") or exp.startswith("\nR") or exp.startswith("  R"):
-                rules_html += f"<li>{exp.strip()}</li>"
+        for rule_id, strength, condition in rules_fired:
+            rules_html += f"<li>{rule_id} (μ={strength:.3f}): {condition}</li>"
         rules_html += "</ul>"
-        es_summary = f"<b>Sistem Pakar:</b> {len(set(rule_ids))} aturan aktif → <b>{es_result_clean}</b>{rules_html}"
+        es_summary = f"<b>Sistem Pakar:</b> {len(rules_fired)} aturan aktif → <b>{es_result_clean}</b>{rules_html}"
     else:
         es_summary = f"<b>Sistem Pakar:</b> ❌ tidak ada aturan yang aktif → <b>{es_result_clean}</b>"
     
@@ -448,6 +580,24 @@ def render_recommendations(recommendations: list):
     st.markdown(rec_html, unsafe_allow_html=True)
 
 
+def render_uncertainty(result):
+    """Render status probabilities and confidence spread from Monte Carlo sampling"""
+    cols = st.columns(len(result.status_probability) + 1)
+    for col, (label, probability) in zip(cols, result.status_probability.items()):
+        with col:
+            st.metric(label=f"P({label})", value=f"{probability:.1%}")
+    with cols[-1]:
+        p = result.confidence_percentiles
+        st.metric(
+            label="Confidence (P5–P95)",
+            value=f"{result.confidence_mean:.0f}% ± {result.confidence_std:.0f}",
+            delta=f"{p['p5']:.0f}% – {p['p95']:.0f}%",
+            delta_color="off"
+        )
+    ml_text = f"ML memprediksi Layak pada {result.ml_layak_probability:.1%} sampel · " if result.ml_layak_probability is not None else ""
+    st.caption(f"{ml_text}{result.n_samples} sampel Monte Carlo · {result.elapsed_s * 1000:.0f} ms")
+
+
 def render_pipeline(data, ml_active: bool, es_active: bool):
     """Render system intelligence pipeline with 4 steps"""
     st.markdown("### Pipeline Sistem")
@@ -1095,6 +1245,13 @@ def main():
     # Initialize session state
     initialize_session_state()
     
+    # Logging ML (level/sampling/format dari ML_LOG_LEVEL, ML_LOG_SAMPLE_EVERY, ML_LOG_FORMAT)
+    configure_logging()
+    
+    # Hot reload basis aturan jika rules.json diubah (tanpa restart Streamlit)
+    reload_rule_base_if_changed()
+    enable_evaluation_cache(maxsize=EVALUATION_CACHE_SIZE)
+    
     # Header
     st.markdown("<h1>SISTEM MONITORING KUALITAS AIR BERBASIS IOT DENGAN PREDIKSI MACHINE LEARNING DAN SISTEM PAKAR</h1>", unsafe_allow_html=True)
     st.markdown("""
@@ -1104,31 +1261,50 @@ def main():
     """, unsafe_allow_html=True)
     st.divider()
     
+    # Worker headless (run_worker.py) aktif -> dashboard hanya viewer hasilnya
+    snapshot = get_result_store().read()
+    viewer_mode = snapshot is not None
+    
     # Sidebar - Firebase Configuration
     with st.sidebar:
         st.title("Konfigurasi")
         
-        with st.expander("Pengaturan Firebase", expanded=True):
-            firebase_url = st.text_input(
-                "Database URL",
-                placeholder="https://project-id.firebaseio.com/",
-                help="URL dari Firebase Realtime Database"
-            )
+        if viewer_mode:
+            # Mode viewer: koneksi Firebase, evaluasi dan upload status dipegang worker
+            render_worker_status(snapshot)
+            firebase_url = firebase_key = None
+            db_path = snapshot["worker"]["path"]
+        else:
+            with st.expander("Pengaturan Firebase", expanded=True):
+                firebase_url = st.text_input(
+                    "Database URL",
+                    placeholder="https://project-id.firebaseio.com/",
+                    help="URL dari Firebase Realtime Database"
+                )
             
-            db_path = st.text_input(
-                "Database Path (Sensor Data)",
-                value="sensor",
-                help="Path lokasi data sensor di database (status akan disimpan di node yang sama)"
-            )
+                db_path = st.text_input(
+                    "Database Path (Sensor Data)",
+                    value="sensor",
+                    help="Path lokasi data sensor di database (status akan disimpan di node yang sama)"
+                )
             
-            firebase_key = st.file_uploader(
-                "Service Account JSON",
-                type=["json"],
-                help="Upload file JSON dari Firebase Console"
-            )
+                firebase_key = st.file_uploader(
+                    "Service Account JSON",
+                    type=["json"],
+                    help="Upload file JSON dari Firebase Console"
+                )
         
         st.markdown("---")
         
+        # Mode viewer tidak menjalankan inferensi sendiri: simulasi Monte Carlo (model ML) dinonaktifkan
+        uncertainty_mode = st.toggle(
+            "Mode Ketidakpastian Sensor",
+            value=False,
+            disabled=viewer_mode,
+            help="Simulasi Monte Carlo noise sensor: peluang tiap status dan sebaran confidence"
+            + (" (tidak tersedia di mode viewer)" if viewer_mode else "")
+        ) and not viewer_mode
+        
         with st.expander("Informasi Sistem"):
             st.info("""
             **Model ML:** Random Forest  
@@ -1137,31 +1313,40 @@ def main():
             **Update:** Real-time (3s)
             **Firebase Upload:** Aktif
             """)
+            render_model_load_report()
         
         st.markdown("---")
     
     # Connect to Firebase
     firebase_connected = False
+    connection = None
     
     if firebase_url and firebase_key:
         if not firebase_url.startswith("https://") or not firebase_url.endswith("/"):
             st.sidebar.warning("⚠️ URL harus format: https://...firebaseio.com/")
         else:
-            success, message = init_firebase(firebase_key, firebase_url)
+            connection, message = init_firebase(firebase_key, firebase_url)
             
-            if success:
+            if connection is not None:
                 firebase_connected = True
                 st.sidebar.success(message)
             else:
                 st.sidebar.error(message)
     
+    if not firebase_connected:
+        # Lepas koneksi bersama yang mungkin dipegang sesi ini sebelumnya
+        get_firebase_manager().release(st.session_state.session_id)
+    
     # Auto refresh if connected
-    if firebase_connected:
+    if firebase_connected or viewer_mode:
         st_autorefresh(interval=REFRESH_INTERVAL, key="refresh")
     
     # Main dashboard logic
-    if firebase_connected:
-        data, error = get_sensor_data_wib(db_path)
+    if firebase_connected or viewer_mode:
+        if viewer_mode:
+            data, error = snapshot["latest"], None
+        else:
+            data, error = get_sensor_data_wib(connection, db_path)
         
         if error:
             st.error(f"Error mengambil data: {error}")
@@ -1183,33 +1368,45 @@ def main():
             ntu = float(data.get("ntu", 0))
             timestamp = data.get("timestamp", "00:00:00")  # Direct from Firebase
             
-            # Create a data signature from sensor values (not timestamp)
-            # Round values to avoid floating point precision issues
-            current_data_signature = f"{ph:.2f}|{tds:.1f}|{ntu:.2f}"
-            
-            # Check if data has changed (ESP32 is sending new data)
-            if st.session_state.last_timestamp is None:
-                # First run
-                st.session_state.last_timestamp = current_data_signature
-                st.session_state.no_update_count = 0
-            elif current_data_signature == st.session_state.last_timestamp:
-                # Data hasn't changed - ESP32 not sending new data
-                st.session_state.no_update_count += 1
+            if viewer_mode:
+                # Perangkat offline jika pembacaan terbaru diterima worker > DEVICE_TIMEOUT detik lalu
+                offline_seconds = int(time.time() - data["received_at"])
+                is_online = offline_seconds < DEVICE_TIMEOUT
+                status_message = "Menerima data baru" if is_online else f"Tidak ada data baru ({offline_seconds}s)"
+                
+                # Riwayat grafik dari store worker (sama untuk semua sesi)
+                history = snapshot["history"][-HISTORY_MAXLEN:]
+                for key, field in (("ph_hist", "ph"), ("tds_hist", "tds"), ("ntu_hist", "ntu"), ("time_hist", "timestamp")):
+                    st.session_state[key] = deque((item[field] for item in history), maxlen=HISTORY_MAXLEN)
             else:
-                # Data has changed - ESP32 is sending new data
-                st.session_state.last_timestamp = current_data_signature
-                st.session_state.no_update_count = 0
+                # Create a data signature from sensor values (not timestamp)
+                # Round values to avoid floating point precision issues
+                current_data_signature = f"{ph:.2f}|{tds:.1f}|{ntu:.2f}"
             
-            # Check device status based on data updates
-            device_status = check_device_status(st.session_state.no_update_count)
-            is_online = device_status["is_online"]
-            status_message = device_status["message"]
+                # Check if data has changed (ESP32 is sending new data)
+                if st.session_state.last_timestamp is None:
+                    # First run
+                    st.session_state.last_timestamp = current_data_signature
+                    st.session_state.no_update_count = 0
+                elif current_data_signature == st.session_state.last_timestamp:
+                    # Data hasn't changed - ESP32 not sending new data
+                    st.session_state.no_update_count += 1
+                else:
+                    # Data has changed - ESP32 is sending new data
+                    st.session_state.last_timestamp = current_data_signature
+                    st.session_state.no_update_count = 0
             
-            # Update history
-            st.session_state.ph_hist.append(ph)    
-            st.session_state.tds_hist.append(tds)
-            st.session_state.ntu_hist.append(ntu)
-            st.session_state.time_hist.append(timestamp)
+                # Check device status based on data updates
+                device_status = check_device_status(st.session_state.no_update_count)
+                is_online = device_status["is_online"]
+                status_message = device_status["message"]
+            
+                # Update history
+                st.session_state.ph_hist.append(ph)    
+                st.session_state.tds_hist.append(tds)
+                st.session_state.ntu_hist.append(ntu)
+                st.session_state.time_hist.append(timestamp)
+                offline_seconds = st.session_state.no_update_count * 3
             
             # 1. COMPACT DEVICE STATUS
             if is_online:
@@ -1287,7 +1484,7 @@ def main():
             
             # Show warning if offline
             if not is_online:
-                st.warning(f"⚠️ **ESP32 tidak mengirim data baru ke Firebase.** Data terakhir diterima {st.session_state.no_update_count * 3} detik yang lalu. Pastikan ESP32 terhubung ke WiFi dan Firebase.")
+                st.warning(f"⚠️ **ESP32 tidak mengirim data baru ke Firebase.** Data terakhir diterima {offline_seconds} detik yang lalu. Pastikan ESP32 terhubung ke WiFi dan Firebase.")
             
             # 2. CHARTS & TRENDS
             st.markdown("### Tren Historis")
@@ -1385,26 +1582,32 @@ def main():
                 )
             
             # 4. AI ANALYSIS & FINAL STATUS - PARALLEL PROCESSING
-            model = load_model()
-            
             # *** PARALLEL HYBRID WORKFLOW - SIMPLIFIED ***
             # Tahap 1: Machine Learning - berjalan independen
-            ml_result = model.predict(ph, tds, ntu)
-            
             # Tahap 2: Expert System - berjalan independen dengan ML result
             # ES akan menghitung confidence berdasarkan agreement dengan ML
-            es_result, es_explanations, confidence, has_active_rules = evaluate_water_quality(ph, tds, ntu, ml_result)
-            rule_ids = re.findall(r"R\d+", " ".join(es_explanations))
+            # Teks penjelasan tidak dirender di sini; aturan aktif dibaca langsung dari hasil
+            # Keduanya lewat layanan inferensi jika INFERENCE_SERVICE_URL di-set
+            # Mode viewer: hasil evaluasi worker (field sama dengan EvaluationResult)
+            if viewer_mode:
+                evaluation = ServiceEvaluation(data)
+                ml_result = evaluation.ml_result
+            else:
+                ml_result, evaluation = run_inference(ph, tds, ntu)
+            es_result = evaluation.status
+            confidence = evaluation.confidence
+            has_active_rules = evaluation.has_active_rules
             
             # Tahap 3: Tentukan Status Final berdasarkan Voting Logic
-            # Status final ditentukan oleh hybrid_decision di dalam evaluate_water_quality
+            # Status final ditentukan oleh hybrid_decision di dalam evaluate
             # Confidence sudah dihitung dengan benar (ML 0-25% + ES 0-75%)
             
             status = es_result  # Status final dari ES (sudah melalui hybrid_decision)
-            explanations = es_explanations
             
             # **UPLOAD STATUS TO FIREBASE (same node as sensor)**
-            upload_status_to_firebase(db_path, status, confidence)
+            # Mode viewer: status sudah ditulis sekali oleh worker
+            if not viewer_mode:
+                upload_status_to_firebase(connection, db_path, status, confidence)
             
             # Status Card + Confidence
             st.markdown("### Status Kualitas Air")
@@ -1412,12 +1615,31 @@ def main():
             
             # Decision Explanation
             st.markdown("### Penjelasan Keputusan")
-            render_decision_explanation(ml_result, es_result, status, explanations, rule_ids, has_active_rules)
+            render_decision_explanation(ml_result, es_result, status, evaluation.rules_fired, has_active_rules)
+            
+            # Sensor Uncertainty (Monte Carlo)
+            if uncertainty_mode:
+                st.markdown("### Ketidakpastian Sensor")
+                render_uncertainty(propagate(ph, tds, ntu, model=load_model(), n_samples=UNCERTAINTY_SAMPLES))
             
             # Recommendations
             st.markdown("### Rekomendasi Tindakan")
-            recommendations = get_recommendations(status, ph, tds, ntu)
-            render_recommendations(recommendations)
+            render_recommendations(evaluation.recommendations)
+            
+            # Online Learning (opt-in): hanya antre di memori, training di worker latar
+            # Mode viewer: label sistem pakar dicatat worker; label operator lewat inbox worker
+            if viewer_mode:
+                learning_status = snapshot["worker"]["online_learning"]
+                if learning_status is not None:
+                    render_operator_feedback(record_operator_label, learning_status, ph, tds, ntu)
+            else:
+                learner = get_online_learner()
+                if learner is not None:
+                    if has_active_rules:
+                        learner.record(ph, tds, ntu, status, source='expert')
+                    render_operator_feedback(
+                        lambda *reading: learner.record(*reading, source='operator'), learner.status(), ph, tds, ntu
+                    )
             
             # System Pipeline
             render_pipeline(data, True, True)
@@ -0,0 +1,353 @@
+"""
+Micro-benchmark Sistem Pakar (fuzzy expert system).
+
+Menjalankan semua benchmark dan menyimpan hasil ke JSON:
+    python benchmark.py
+
+Simpan baseline, lalu bandingkan setelah mengubah Sistem_Pakar.py:
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+
+Hasil compare ditulis ke --output (default benchmark_results.json) dan tidak
+boleh sama dengan file baseline.
+
+Versi singkat tanpa ukuran 100k (loop skalar 100k memakan beberapa menit):
+    python benchmark.py --quick
+
+Mode compare menandai kasus yang lebih lambat dari baseline melebihi
+--threshold (default 20%) dan keluar dengan kode 1 jika ada regresi.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import Sistem_Pakar as sp
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(BASE_DIR, "dataset_sensor.csv")
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_SIZES = (1, 1000, 100000)
+DEFAULT_THRESHOLD = 0.20
+
+# Anggaran waktu per kasus: ulangi pengukuran sampai waktu ini habis
+# (minimal MIN_REPEATS kali) lalu ambil waktu terbaik
+TIME_BUDGET = 0.5
+MIN_REPEATS = 3
+MAX_REPEATS = 1000
+
+SEED = 2024
+
+
+# =============================
+# DATA INPUT
+# =============================
+
+def load_sensor_dataset(path=DATASET_FILE):
+    """Baca dataset_sensor.csv -> array ph, tds, ntu, label ML"""
+    ph, tds, ntu, labels = [], [], [], []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            ph.append(float(row['ph']))
+            tds.append(float(row['Solids']))
+            ntu.append(float(row['Turbidity']))
+            labels.append("Layak Minum" if row['Potability'].strip() == '1' else "Tidak Layak Minum")
+    return np.array(ph), np.array(tds), np.array(ntu), np.array(labels, dtype=object)
+
+
+def breakpoint_values(sets, eps=1e-6):
+    """Titik sudut semua himpunan fuzzy (dan tepat di sekitarnya)"""
+    points = np.unique([p for params in sets.values() for p in params])
+    return np.unique(np.concatenate([points - eps, points, points + eps]))
+
+
+def make_inputs(n, seed=SEED):
+    """
+    n baris input: separuh diambil dari dataset_sensor.csv, separuh kasus tepi
+    pada breakpoint fungsi keanggotaan (dipasangkan acak antar variabel).
+    """
+    rng = np.random.default_rng(seed)
+    ph, tds, ntu, labels = load_sensor_dataset()
+
+    n_edge = n // 2
+    n_data = n - n_edge
+    idx = rng.integers(0, len(ph), n_data)
+
+    rule_base = sp.get_rule_base()
+    edges = [breakpoint_values(rule_base.input_sets[var]) for var in sp.VARIABLES]
+    edge_cols = [rng.choice(values, n_edge) for values in edges]
+    edge_labels = rng.choice(np.array(sp.STATUS_LABELS[::2], dtype=object), n_edge)
+
+    order = rng.permutation(n)
+    return {
+        'ph': np.concatenate([ph[idx], np.maximum(edge_cols[0], 0.0)])[order],
+        'tds': np.concatenate([tds[idx], np.maximum(edge_cols[1], 0.0)])[order],
+        'ntu': np.concatenate([ntu[idx], np.maximum(edge_cols[2], 0.0)])[order],
+        'ml': np.concatenate([labels[idx], edge_labels])[order],
+    }
+
+
+# =============================
+# KASUS BENCHMARK
+# =============================
+#
+# Setiap kasus: (nama fungsi, mode, setup) dengan setup(inputs) -> callable
+# tanpa argumen yang memproses seluruh input sekali. Mode "scalar" memanggil
+# fungsi per baris dalam loop Python, mode "batch" memakai API vektor.
+
+def _scalar_loop(func, *columns):
+    rows = list(zip(*[c.tolist() for c in columns]))
+    return lambda: [func(*row) for row in rows]
+
+
+def _prepared_inference(inputs):
+    """Hasil fuzzy_inference per baris (dihitung sekali) untuk benchmark defuzzifikasi/confidence"""
+    if 'inference' not in inputs:
+        inputs['inference'] = [
+            sp.fuzzy_inference(p, t, n)
+            for p, t, n in zip(inputs['ph'].tolist(), inputs['tds'].tolist(), inputs['ntu'].tolist())
+        ]
+    return inputs['inference']
+
+
+def _setup_trapmf_scalar(inputs):
+    params = next(iter(sp.PH_SETS.values()))
+    return _scalar_loop(lambda x: sp.trapmf(x, params), inputs['ph'])
+
+
+def _setup_trapmf_batch(inputs):
+    params = next(iter(sp.PH_SETS.values()))
+    ph = inputs['ph']
+    return lambda: sp.trapmf_batch(ph, params)
+
+
+def _setup_fuzzifikasi_batch(column, sets_name):
+    def setup(inputs):
+        x = inputs[column]
+        sets = getattr(sp, sets_name)
+        return lambda: sp._fuzzifikasi_batch(x, sets)
+    return setup
+
+
+def _setup_defuzz_scalar(inputs):
+    strengths = [details['firing_strength'] for _, _, details, _ in _prepared_inference(inputs)]
+    return lambda: [sp.defuzzifikasi_output(fs) for fs in strengths]
+
+
+def _setup_defuzz_batch(inputs):
+    _, _, details, _ = sp.fuzzy_inference_batch(inputs['ph'], inputs['tds'], inputs['ntu'])
+    fs = details['firing_strength']
+    return lambda: sp.defuzzifikasi_output_batch(fs)
+
+
+def _setup_inference_batch(inputs):
+    ph, tds, ntu = inputs['ph'], inputs['tds'], inputs['ntu']
+    return lambda: sp.fuzzy_inference_batch(ph, tds, ntu)
+
+
+def _setup_confidence_scalar(inputs):
+    args = []
+    for (status, _, d, _), p, t, n, ml in zip(_prepared_inference(inputs), inputs['ph'].tolist(),
+                                            inputs['tds'].tolist(), inputs['ntu'].tolist(), inputs['ml']):
+        args.append((status, d['firing_strength'], d['rules_fired'], p, t, n,
+                     d['ph_membership'], d['tds_membership'], d['ntu_membership'], ml, status))
+    return lambda: [sp.calculate_confidence(*a) for a in args]
+
+
+def _setup_confidence_batch(inputs):
+    ph, tds, ntu, ml = inputs['ph'], inputs['tds'], inputs['ntu'], inputs['ml']
+    status, _, details, _ = sp.fuzzy_inference_batch(ph, tds, ntu)
+    fs, active = details['firing_strength'], details['rules_active']
+    return lambda: sp.calculate_confidence_batch(status, fs, active, ph, tds, ntu, ml, status)
+
+
+def _setup_evaluate_scalar(inputs):
+    return _scalar_loop(sp.evaluate_water_quality, inputs['ph'], inputs['tds'], inputs['ntu'], inputs['ml'])
+
+
+def _setup_evaluate_result_scalar(inputs):
+    return _scalar_loop(sp.evaluate, inputs['ph'], inputs['tds'], inputs['ntu'], inputs['ml'])
+
+
+def _setup_evaluate_batch(inputs):
+    ph, tds, ntu, ml = inputs['ph'], inputs['tds'], inputs['ntu'], inputs['ml']
+    return lambda: sp.evaluate_water_quality_batch(ph, tds, ntu, ml)
+
+
+CASES = [
+    ('trapmf', 'scalar', _setup_trapmf_scalar),
+    ('trapmf', 'batch', _setup_trapmf_batch),
+    ('fuzzifikasi_ph', 'scalar', lambda inputs: _scalar_loop(sp.fuzzifikasi_ph, inputs['ph'])),
+    ('fuzzifikasi_ph', 'batch', _setup_fuzzifikasi_batch('ph', 'PH_SETS')),
+    ('fuzzifikasi_tds', 'scalar', lambda inputs: _scalar_loop(sp.fuzzifikasi_tds, inputs['tds'])),
+    ('fuzzifikasi_tds', 'batch', _setup_fuzzifikasi_batch('tds', 'TDS_SETS')),
+    ('fuzzifikasi_kekeruhan', 'scalar', lambda inputs: _scalar_loop(sp.fuzzifikasi_kekeruhan, inputs['ntu'])),
+    ('fuzzifikasi_kekeruhan', 'batch', _setup_fuzzifikasi_batch('ntu', 'NTU_SETS')),
+    ('defuzzifikasi_output', 'scalar', _setup_defuzz_scalar),
+    ('defuzzifikasi_output', 'batch', _setup_defuzz_batch),
+    ('fuzzy_inference', 'scalar', lambda inputs: _scalar_loop(sp.fuzzy_inference, inputs['ph'], inputs['tds'], inputs['ntu'])),
+    ('fuzzy_inference', 'batch', _setup_inference_batch),
+    ('calculate_confidence', 'scalar', _setup_confidence_scalar),
+    ('calculate_confidence', 'batch', _setup_confidence_batch),
+    ('evaluate_water_quality', 'scalar', _setup_evaluate_scalar),
+    ('evaluate_water_quality', 'batch', _setup_evaluate_batch),
+    ('evaluate', 'scalar', _setup_evaluate_result_scalar),
+]
+
+
+def case_key(name, mode, size):
+    return f"{name}[{mode},n={size}]"
+
+
+def time_case(func, budget=TIME_BUDGET):
+    """Ulangi func sampai anggaran waktu habis; kembalikan (best, median, repeats)"""
+    times = []
+    started = time.perf_counter()
+    while len(times) < MAX_REPEATS:
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+        if len(times) >= MIN_REPEATS and time.perf_counter() - started >= budget:
+            break
+        # Kasus yang sangat lambat cukup diukur sekali
+        if times[0] >= budget * 4:
+            break
+    return min(times), float(np.median(times)), len(times)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, only=None, budget=TIME_BUDGET):
+    # Cache evaluasi dimatikan agar yang diukur adalah perhitungan sebenarnya
+    sp.disable_evaluation_cache()
+    results = {}
+    for size in sizes:
+        inputs = make_inputs(size)
+        for name, mode, setup in CASES:
+            if only and not any(pattern in name for pattern in only):
+                continue
+            key = case_key(name, mode, size)
+            func = setup(inputs)
+            best, median, repeats = time_case(func, budget)
+            results[key] = {
+                'function': name,
+                'mode': mode,
+                'size': size,
+                'best_s': best,
+                'median_s': median,
+                'repeats': repeats,
+                'per_item_us': best / size * 1e6,
+            }
+            print(f"{key:<48} best {best * 1e3:10.3f} ms  ({best / size * 1e6:9.3f} µs/item, {repeats} runs)")
+    return results
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'defuzzifikasi_method': sp.DEFUZZIFIKASI_METHOD,
+        'rules_file': sp.get_rule_base().source,
+    }
+
+
+# =============================
+# PERBANDINGAN BASELINE
+# =============================
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Bandingkan waktu terbaik per kasus. Mengembalikan list baris
+    (key, baseline_s, current_s, ratio, status) dengan status
+    'REGRESSION', 'faster', 'ok', atau 'new'.
+    """
+    rows = []
+    for key, result in current.items():
+        old = baseline.get(key)
+        if old is None:
+            rows.append((key, None, result['best_s'], None, 'new'))
+            continue
+        ratio = result['best_s'] / old['best_s'] if old['best_s'] > 0 else float('inf')
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+        elif ratio < 1 / (1 + threshold):
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((key, old['best_s'], result['best_s'], ratio, status))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"\nPerbandingan dengan baseline (ambang regresi {threshold:.0%}):")
+    for key, old, new, ratio, status in rows:
+        if ratio is None:
+            print(f"  {key:<48} {'-':>12} {new * 1e3:10.3f} ms  {status}")
+        else:
+            marker = "⚠️ " if status == 'REGRESSION' else ""
+            print(f"  {key:<48} {old * 1e3:10.3f} -> {new * 1e3:10.3f} ms  x{ratio:5.2f}  {marker}{status}")
+    regressions = [row for row in rows if row[4] == 'REGRESSION']
+    print(f"\n{len(regressions)} regresi dari {len(rows)} kasus")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark Sistem_Pakar.py")
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT, help="file JSON hasil benchmark")
+    parser.add_argument('--compare', metavar='BASELINE', help="file JSON baseline untuk dibandingkan")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="ambang perlambatan relatif yang dianggap regresi (default 0.20)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="ukuran input")
+    parser.add_argument('--quick', action='store_true', help="hanya ukuran 1 dan 1000")
+    parser.add_argument('--only', nargs='+', help="hanya fungsi yang namanya memuat teks ini")
+    parser.add_argument('--budget', type=float, default=TIME_BUDGET, help="detik pengukuran per kasus")
+    args = parser.parse_args(argv)
+    if args.compare and os.path.realpath(args.output) == os.path.realpath(args.compare):
+        parser.error(f"--output sama dengan baseline --compare ({args.compare}); "
+                     "pilih file --output lain agar baseline tidak tertimpa")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    sizes = [size for size in args.sizes if size <= 1000] if args.quick else args.sizes
+    results = run_benchmarks(sizes, args.only, args.budget)
+    report = {'environment': environment_info(), 'threshold': args.threshold, 'results': results}
+
+    exit_code = 0
+    if baseline is not None:
+        rows = compare_results(baseline, results, args.threshold)
+        report['comparison'] = {
+            'baseline': args.compare,
+            'cases': [
+                {'key': key, 'baseline_s': old, 'current_s': new, 'ratio': ratio, 'status': status}
+                for key, old, new, ratio, status in rows
+            ],
+        }
+        if print_comparison(rows, args.threshold):
+            exit_code = 1
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nHasil disimpan ke {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
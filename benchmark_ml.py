@@ -0,0 +1,104 @@
+"""
+Benchmark latensi inferensi ML untuk satu pembacaan.
+
+Membandingkan waktu per panggilan:
+- legacy       : DataFrame satu baris + model.predict + model.predict_proba (implementasi awal)
+- sklearn      : DataFrame satu baris + satu kali model.predict_proba
+- predict_batch: WaterQualityModel.predict_batch dengan satu baris
+- fast         : WaterQualityModel.predict_with_confidence (buffer NumPy + forest terkompilasi;
+                 estimator non-forest dengan nama fitur tetap memakai DataFrame satu baris)
+
+    python benchmark_ml.py --model water_potability_model.pkl
+"""
+
+import argparse
+import contextlib
+import io
+import json
+
+import pandas as pd
+
+from Machine_Learning import WaterQualityModel
+from benchmark import case_key, load_sensor_dataset, time_case
+
+
+def legacy_predict(model, ph, tds, ntu):
+    """Alur predict sebelum predict_batch: DataFrame + dua kali traversal forest"""
+    feature_mapping = {'ph': ph, 'Solids': tds, 'Turbidity': ntu}
+    X = pd.DataFrame([[feature_mapping.get(fn, 0) for fn in model.feature_names]], columns=model.feature_names)
+    pred = model.model.predict(X)[0]
+    proba = model.model.predict_proba(X)[0]
+    return ("Layak Minum" if pred == 1 else "Tidak Layak Minum"), int(max(proba) * 100)
+
+
+def sklearn_predict(model, ph, tds, ntu):
+    """Satu kali predict_proba sklearn (dengan validasi input dan dispatch joblib)"""
+    proba = model.model.predict_proba(model._feature_frame(ph, tds, ntu))[0]
+    best = proba.argmax()
+    return ("Layak Minum" if model.model.classes_[best] == 1 else "Tidak Layak Minum"), int(proba[best] * 100)
+
+
+def run(model, rows, budget):
+    paths = {
+        'legacy': lambda: [legacy_predict(model, *row) for row in rows],
+        'sklearn': lambda: [sklearn_predict(model, *row) for row in rows],
+        'predict_batch': lambda: [model.predict_batch(*row) for row in rows],
+        'fast': lambda: [model.predict_with_confidence(*row) for row in rows],
+    }
+    results = {}
+    for name, func in paths.items():
+        best, median, repeats = time_case(func, budget)
+        key = case_key('ml_predict', name, 1)
+        results[key] = {
+            'function': 'ml_predict',
+            'mode': name,
+            'size': 1,
+            'best_s': best / len(rows),
+            'median_s': median / len(rows),
+            'repeats': repeats,
+            'per_item_us': best / len(rows) * 1e6,
+        }
+        print(f"{name:<14} {best / len(rows) * 1e3:8.3f} ms/panggilan  ({repeats} runs x {len(rows)} pembacaan)")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latensi inferensi ML satu pembacaan: sebelum vs sesudah")
+    parser.add_argument('--model', default="water_potability_model.pkl", help="file model .pkl")
+    parser.add_argument('--rows', type=int, default=20, help="jumlah pembacaan dari dataset_sensor.csv per run")
+    parser.add_argument('--budget', type=float, default=2.0, help="detik pengukuran per jalur")
+    parser.add_argument('--output', '-o', help="simpan hasil ke JSON (format sama dengan benchmark.py)")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = WaterQualityModel(args.model)
+
+    ph, tds, ntu, _ = load_sensor_dataset()
+    rows = list(zip(ph.tolist(), tds.tolist(), ntu.tolist()))[:args.rows]
+
+    # Pastikan semua jalur memberi hasil yang sama sebelum diukur
+    for row in rows:
+        labels, confidences = model.predict_batch(*row)
+        expected = (str(labels[0]), int(confidences[0]))
+        if any(result != expected for result in (
+            legacy_predict(model, *row), sklearn_predict(model, *row), model.predict_with_confidence(*row)
+        )):
+            raise AssertionError(f"Hasil berbeda untuk input {row}")
+
+    report = model.load_report
+    print(f"model dimuat via {report['source']} dalam {report['load_seconds'] * 1e3:.1f} ms, "
+          f"RSS {report['rss_before_mb']:.1f} -> {report['rss_after_mb']:.1f} MB\n")
+    
+    results = run(model, rows, args.budget)
+    legacy = results[case_key('ml_predict', 'legacy', 1)]['best_s']
+    fast = results[case_key('ml_predict', 'fast', 1)]['best_s']
+    print(f"\nfast vs legacy: {legacy / fast:.1f}x lebih cepat")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'model': args.model, 'results': results}, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Kompresi model ML: kandidat yang lebih kecil beserta laporan akurasi/latensi.
+
+Dari model terlatih dan CSV training (split hold-out sama dengan notebook)
+dibuat kandidat:
+- trees-K       : K pohon pertama dari forest asli (tanpa training ulang)
+- rf-dD-K       : forest baru K pohon dengan kedalaman maksimum D, didistilasi
+                  dari label model asli
+- tree-dD       : satu pohon (forest 1 pohon tanpa bootstrap) hasil distilasi
+- table-B       : tabel keputusan B bin per fitur (Decision_Table)
+
+Distilasi memakai label model asli pada data training ditambah salinan data
+training yang diberi jitter, sehingga kandidat meniru batas keputusan model
+asli, bukan hanya label dataset.
+
+Model yang dikirim (train.py, notebook) dilatih ulang pada seluruh baris,
+termasuk baris hold-out. Agar akurasi hold-out adil, perbandingan memakai
+teacher hold-out: salinan model asli (parameter sama) yang dilatih ulang
+hanya pada x_train; semua kandidat dibangun dari teacher ini. Kandidat yang
+dipilih lalu dibangun ulang dari model asli (distilasi pada seluruh baris)
+untuk file keluaran. Jika model asli tidak bisa dilatih ulang (bukan
+estimator sklearn), akurasi hold-out bias ke model asli dan trees-K, sehingga
+--max-accuracy-drop tidak dipakai sebagai kriteria.
+
+Per kandidat dilaporkan: kecocokan dengan teacher (hold-out dan data
+jitter), akurasi hold-out, ukuran file .pkl (+ bundle forest), dan latensi
+per pembacaan lewat WaterQualityModel.predict_with_confidence. Kandidat
+terkecil yang memenuhi --min-agreement dan --max-accuracy-drop (atau --choose)
+ditulis sebagai .pkl yang langsung bisa dipakai WaterQualityModel.
+
+    python compress_model.py --model water_potability_model.pkl --output water_potability_model_small.pkl
+"""
+
+import argparse
+import copy
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+
+from Decision_Table import DecisionTable
+from Machine_Learning import WaterQualityModel, load_training_data, split_training_data
+from benchmark import time_case
+
+
+SEED = 2024
+TREE_COUNTS = (10, 25, 50, 100, 200)
+SHALLOW_FORESTS = ((4, 50), (6, 50), (8, 50))
+TREE_DEPTHS = (4, 6, 8, 10)
+TABLE_BINS = (8, 16, 32)
+
+# Data distilasi: salinan data training dengan jitter Gaussian (sigma = JITTER x std fitur)
+JITTER_COPIES = 5
+JITTER = 0.1
+
+LATENCY_ROWS = 200
+LATENCY_BUDGET = 0.5
+
+DEFAULT_MIN_AGREEMENT = 0.98
+DEFAULT_MAX_ACCURACY_DROP = 0.01
+
+
+# =============================
+# KANDIDAT
+# =============================
+
+def truncate_forest(forest, n_trees):
+    """Salinan forest dengan n_trees pohon pertama (pohon sklearn dibagi, tidak disalin)"""
+    small = copy.copy(forest)
+    small.estimators_ = forest.estimators_[:n_trees]
+    small.n_estimators = n_trees
+    return small
+
+
+def jittered(X, rng, copies=JITTER_COPIES, scale=JITTER):
+    """Salinan X dengan noise Gaussian per fitur, dipotong ke rentang nilai X"""
+    values = np.asarray(X, dtype=np.float64)
+    noise = rng.normal(0.0, scale, (copies,) + values.shape) * values.std(axis=0)
+    samples = np.clip((values + noise).reshape(-1, values.shape[1]), values.min(axis=0), values.max(axis=0))
+    return pd.DataFrame(samples, columns=X.columns)
+
+
+def distill_forest(X, labels, n_estimators, max_depth, bootstrap=True):
+    forest = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        bootstrap=bootstrap,
+        max_features=None if n_estimators == 1 else 'sqrt',
+        random_state=SEED,
+        n_jobs=-1,
+    )
+    return forest.fit(X, labels)
+
+
+def candidate_factories(teacher, x_fit):
+    """{nama: fungsi pembuat kandidat} dari teacher; distilasi pada x_fit + salinan jitter"""
+    rng = np.random.default_rng(SEED)
+    x_distill = pd.concat([x_fit, jittered(x_fit, rng)], ignore_index=True)
+    y_distill = teacher.predict(x_distill)
+
+    factories = {}
+    n_trees = len(getattr(teacher, 'estimators_', ()))
+    for k in TREE_COUNTS:
+        if k < n_trees:
+            factories[f"trees-{k}"] = lambda k=k: truncate_forest(teacher, k)
+    for depth, k in SHALLOW_FORESTS:
+        factories[f"rf-d{depth}-{k}"] = lambda depth=depth, k=k: distill_forest(x_distill, y_distill, k, depth)
+    for depth in TREE_DEPTHS:
+        factories[f"tree-d{depth}"] = lambda depth=depth: distill_forest(
+            x_distill, y_distill, 1, depth, bootstrap=False)
+    for bins in TABLE_BINS:
+        factories[f"table-{bins}"] = lambda bins=bins: DecisionTable.distill(teacher, x_distill, bins)
+    return factories
+
+
+def build_candidates(teacher, x_fit):
+    """Generator (nama, estimator) untuk semua kandidat"""
+    for name, factory in candidate_factories(teacher, x_fit).items():
+        yield name, factory()
+
+
+def holdout_teacher(teacher, x_train, y_train):
+    """Salinan teacher (parameter sama) yang dilatih hanya pada x_train; None jika tidak bisa"""
+    try:
+        return clone(teacher).fit(x_train, y_train)
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+# =============================
+# EVALUASI
+# =============================
+
+def measure_artifact(estimator, rows, workdir, name):
+    """
+    Simpan estimator ke .pkl dan muat lewat WaterQualityModel (sama seperti app):
+    ukuran file, ukuran bundle forest, latensi per pembacaan, dan hasil prediksinya.
+    """
+    path = os.path.join(workdir, f"{name}.pkl")
+    joblib.dump(estimator, path)
+    model = WaterQualityModel(path, lazy=False)
+    outputs = [model.predict_with_confidence(*row) for row in rows]
+    best, _, _ = time_case(lambda: [model.predict_with_confidence(*row) for row in rows], LATENCY_BUDGET)
+    return {
+        'pkl_kb': os.path.getsize(path) / 1024,
+        'bundle_kb': model.compiled.nbytes() / 1024 if model.compiled is not None else None,
+        'latency_us': best / len(rows) * 1e6,
+    }, outputs
+
+
+def evaluate_candidates(teacher, x_train, x_test, y_test):
+    rng = np.random.default_rng(SEED + 1)
+    x_probe = jittered(x_test, rng)
+    reference_test = teacher.predict(x_test)
+    reference_probe = teacher.predict(x_probe)
+    rows = list(x_test.itertuples(index=False, name=None))[:LATENCY_ROWS]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        teacher_stats, _ = measure_artifact(teacher, rows, workdir, "original")
+        results = [{
+            'name': 'original',
+            'agreement': 1.0,
+            'probe_agreement': 1.0,
+            'accuracy': float((reference_test == y_test).mean()),
+            'dropin_ok': True,
+            **teacher_stats,
+        }]
+        estimators = {'original': teacher}
+
+        for name, estimator in build_candidates(teacher, x_train):
+            stats, outputs = measure_artifact(estimator, rows, workdir, name)
+            predicted = estimator.predict(x_test)
+            results.append({
+                'name': name,
+                'agreement': float((predicted == reference_test).mean()),
+                'probe_agreement': float((estimator.predict(x_probe) == reference_probe).mean()),
+                'accuracy': float((predicted == y_test).mean()),
+                # Label lewat WaterQualityModel harus sama dengan estimator.predict
+                'dropin_ok': [label for label, _ in outputs] == [
+                    "Layak Minum" if p == 1 else "Tidak Layak Minum" for p in predicted[:len(rows)]
+                ],
+                **stats,
+            })
+            estimators[name] = estimator
+
+    return results, estimators
+
+
+def choose(results, min_agreement, max_accuracy_drop):
+    """
+    Kandidat terkecil (.pkl) yang cukup mirip dan tidak terlalu menurunkan akurasi.
+    Ukuran dipakai sebagai kriteria utama karena deterministik; latensi hanya pemecah seri.
+    max_accuracy_drop None: akurasi tidak dipakai (hold-out tidak adil, lihat docstring modul).
+    """
+    baseline = results[0]['accuracy']
+    eligible = [
+        r for r in results[1:]
+        if r['dropin_ok'] and r['agreement'] >= min_agreement
+        and (max_accuracy_drop is None or r['accuracy'] >= baseline - max_accuracy_drop)
+    ]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: (r['pkl_kb'], r['latency_us']))
+
+
+def render_markdown(results, chosen):
+    lines = [
+        "| kandidat | cocok hold-out | cocok jitter | akurasi hold-out | .pkl KB | bundle KB | µs/pembacaan |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        marker = " **(dipilih)**" if chosen is not None and r['name'] == chosen['name'] else ""
+        bundle = f"{r['bundle_kb']:.0f}" if r['bundle_kb'] is not None else "-"
+        lines.append(
+            f"| {r['name']}{marker} | {r['agreement']:.2%} | {r['probe_agreement']:.2%} | "
+            f"{r['accuracy']:.2%} | {r['pkl_kb']:.0f} | {bundle} | {r['latency_us']:.0f} |"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat kandidat model ML yang lebih kecil dan pilih satu")
+    parser.add_argument('--model', default="water_potability_model.pkl", help="model asli (.pkl)")
+    parser.add_argument('--output', '-o', default="water_potability_model_small.pkl",
+                        help="file .pkl untuk kandidat terpilih (drop-in untuk WaterQualityModel)")
+    parser.add_argument('--choose', help="paksa nama kandidat tertentu (lihat tabel)")
+    parser.add_argument('--min-agreement', type=float, default=DEFAULT_MIN_AGREEMENT,
+                        help="kecocokan hold-out minimum dengan model asli (default 0.98)")
+    parser.add_argument('--max-accuracy-drop', type=float, default=DEFAULT_MAX_ACCURACY_DROP,
+                        help="penurunan akurasi hold-out maksimum (default 0.01)")
+    parser.add_argument('--report', help="simpan tabel markdown ke file ini")
+    args = parser.parse_args(argv)
+
+    teacher = joblib.load(args.model)
+    X, y = load_training_data()
+    x_train, x_test, y_train, y_test = split_training_data(X, y)
+
+    # Model asli sudah melihat x_test: bandingkan kandidat dengan teacher yang dilatih pada x_train saja
+    comparison_teacher = holdout_teacher(teacher, x_train, y_train)
+    max_accuracy_drop = args.max_accuracy_drop
+    if comparison_teacher is None:
+        comparison_teacher = teacher
+        max_accuracy_drop = None
+        note = ("Catatan: model asli tidak bisa dilatih ulang pada x_train; model asli dan trees-K sudah melihat "
+                "baris hold-out, sehingga akurasi hold-out bias dan --max-accuracy-drop tidak dipakai.")
+    else:
+        note = ("Akurasi hold-out dari teacher yang dilatih ulang pada x_train (parameter model asli); "
+                "kandidat terpilih dibangun ulang dari model asli.")
+
+    results, _ = evaluate_candidates(comparison_teacher, x_train, x_test, y_test.to_numpy())
+
+    if args.choose:
+        chosen = next((r for r in results if r['name'] == args.choose), None)
+        if chosen is None:
+            parser.error(f"kandidat tidak dikenal: {args.choose}")
+    else:
+        chosen = choose(results, args.min_agreement, max_accuracy_drop)
+
+    report = render_markdown(results, chosen) + "\n\n" + note
+    print(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+
+    if chosen is None:
+        print("\nTidak ada kandidat yang memenuhi syarat; longgarkan --min-agreement/--max-accuracy-drop atau pakai --choose")
+        return 1
+
+    # Kandidat keluaran: resep yang sama dari model asli (yang dilatih pada seluruh baris)
+    if chosen['name'] == 'original':
+        estimator = teacher
+    else:
+        estimator = candidate_factories(teacher, X)[chosen['name']]()
+    joblib.dump(estimator, args.output)
+    print(f"\nKandidat '{chosen['name']}' disimpan ke {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
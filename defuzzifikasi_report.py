@@ -0,0 +1,155 @@
+"""
+Laporan perbandingan metode defuzzifikasi pada dataset bawaan.
+
+Untuk setiap metode (DEFUZZIFIKASI_METHODS, metode grid pada beberapa
+resolusi) dihitung:
+- kecocokan kelas skor dengan centroid eksak: kelas = himpunan output dengan
+  keanggotaan tertinggi pada skor hasil defuzzifikasi
+- selisih skor maksimum/rata-rata terhadap centroid eksak
+- latensi batch (µs per baris) dan skalar (µs per panggilan)
+
+Status sistem sendiri ditentukan dari firing strength terbesar, sehingga
+tidak berubah oleh pilihan metode; yang berubah adalah skor defuzzifikasi.
+
+    python defuzzifikasi_report.py --output LAPORAN_DEFUZZIFIKASI.md
+"""
+
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+import Sistem_Pakar as sp
+from benchmark import BASE_DIR, load_sensor_dataset
+
+
+POTABILITY_FILE = os.path.join(BASE_DIR, "water_quality_potability_v2.csv")
+SAMPLED_RESOLUTIONS = (100, 1000)
+SCALAR_SAMPLE = 300
+REPEATS = 5
+
+
+def load_potability_dataset(path=POTABILITY_FILE):
+    """water_quality_potability_v2.csv; Solids diskalakan ke rentang TDS sensor (/62000*1000)"""
+    ph, tds, ntu = [], [], []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            if not row['ph']:
+                continue
+            ph.append(float(row['ph']))
+            tds.append(float(row['Solids']) / 62000 * 1000)
+            ntu.append(float(row['Turbidity']))
+    return np.array(ph), np.array(tds), np.array(ntu)
+
+
+def score_class(score, rule_base):
+    """Indeks himpunan output dengan keanggotaan tertinggi pada skor (seri -> indeks pertama)"""
+    memberships = np.array([sp.trapmf_batch(score, params) for params in rule_base.output_sets.values()])
+    return memberships.argmax(axis=0)
+
+
+def method_variants():
+    for method in sp.DEFUZZIFIKASI_METHODS:
+        if method in sp.SAMPLED_METHODS:
+            for resolution in SAMPLED_RESOLUTIONS:
+                yield method, resolution
+        else:
+            yield method, None
+
+
+def _best_time(func, repeats=REPEATS):
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def compare_methods(ph, tds, ntu):
+    """Baris laporan per metode untuk satu dataset (hanya baris dengan aturan aktif)"""
+    rule_base = sp.get_rule_base()
+    _, _, details, active = sp.fuzzy_inference_batch(ph, tds, ntu)
+    fs = details['firing_strength'][active]
+    status = details['status'][active]
+
+    reference = sp.defuzzifikasi_output_batch(fs, 'centroid')
+    reference_class = score_class(reference, rule_base)
+
+    sample = [dict(zip(sp.OUTPUT_NAMES, row)) for row in fs[:SCALAR_SAMPLE].tolist()]
+
+    rows = []
+    for method, resolution in method_variants():
+        scores = sp.defuzzifikasi_output_batch(fs, method, resolution)
+        # Tabel skor kombinasi 0/1 disiapkan dulu agar tidak ikut terukur
+        batch_s = _best_time(lambda: sp.defuzzifikasi_output_batch(fs, method, resolution))
+        scalar_s = _best_time(lambda: [sp.defuzzifikasi_output(row, method, resolution) for row in sample], 3)
+        classes = score_class(scores, rule_base)
+        diff = np.abs(scores - reference)
+        rows.append({
+            'method': method,
+            'resolution': resolution,
+            'class_agreement': float((classes == reference_class).mean()),
+            'status_agreement': float((classes == status).mean()),
+            'max_abs_diff': float(diff.max()),
+            'mean_abs_diff': float(diff.mean()),
+            'batch_us': batch_s / len(fs) * 1e6,
+            'scalar_us': scalar_s / len(sample) * 1e6,
+        })
+    return len(ph), len(fs), rows
+
+
+def render_markdown(results):
+    lines = [
+        "# Laporan Metode Defuzzifikasi",
+        "",
+        "Dihasilkan oleh `python defuzzifikasi_report.py`. Hanya baris dengan aturan aktif yang dihitung.",
+        "",
+        "- **kelas = centroid**: kelas skor (himpunan output dengan keanggotaan tertinggi pada skor) sama dengan kelas skor centroid eksak",
+        "- **kelas = status**: kelas skor sama dengan status sistem (firing strength terbesar)",
+        "- **|Δ skor|**: selisih terhadap centroid eksak",
+        "- latensi batch per baris (`defuzzifikasi_output_batch`) dan skalar per panggilan (`defuzzifikasi_output`)",
+        "",
+    ]
+    for name, (n_rows, n_active, rows) in results.items():
+        lines += [
+            f"## {name}",
+            "",
+            f"{n_rows} baris, {n_active} dengan aturan aktif.",
+            "",
+            "| metode | resolusi | kelas = centroid | kelas = status | max \\|Δ skor\\| | rata-rata \\|Δ skor\\| | batch µs/baris | skalar µs/panggilan |",
+            "|---|---|---|---|---|---|---|---|",
+        ]
+        for row in rows:
+            lines.append(
+                f"| {row['method']} | {row['resolution'] or '-'} | {row['class_agreement']:.2%} | "
+                f"{row['status_agreement']:.2%} | {row['max_abs_diff']:.3f} | {row['mean_abs_diff']:.3f} | "
+                f"{row['batch_us']:.3f} | {row['scalar_us']:.1f} |"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan metode defuzzifikasi pada dataset bawaan")
+    parser.add_argument('--output', '-o', help="simpan laporan markdown ke file ini")
+    args = parser.parse_args(argv)
+
+    sensor_ph, sensor_tds, sensor_ntu, _ = load_sensor_dataset()
+    results = {
+        'dataset_sensor.csv': compare_methods(sensor_ph, sensor_tds, sensor_ntu),
+        'water_quality_potability_v2.csv': compare_methods(*load_potability_dataset()),
+    }
+
+    report = render_markdown(results)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+        print(f"\nLaporan disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Ekspor model ML (random forest) ke header C untuk inferensi langsung di ESP32.
+
+    python export_forest_c.py water_potability_model_small.pkl -o wq_forest.h
+    python export_forest_c.py water_potability_model_small.pkl -o wq_forest.h --fixed-point
+
+--check menjalankan uji diferensial: header dikompilasi dengan gcc
+(-Wall -Wextra -Werror -pedantic, C99) dan g++ (sintaks C++ seperti sketch
+Arduino), lalu prediksi program C pada seluruh baris CSV training
+dibandingkan dengan predict_proba sklearn. Gagal (exit 1) jika ada kelas
+yang berbeda pada baris yang tidak seri, atau selisih peluang melebihi
+toleransi mode.
+
+    python export_forest_c.py water_potability_model_small.pkl --check [--fixed-point]
+
+Hanya RandomForestClassifier/ExtraTreesClassifier sklearn (satu output) yang
+bisa diekspor. Forest 500 pohon penuh terlalu besar untuk flash ESP32; gunakan
+kandidat forest dari compress_model.py (trees-K, rf-dD-K atau tree-dD), mis.
+
+    python compress_model.py --model water_potability_model.pkl --choose rf-d8-50 -o small.pkl
+    python export_forest_c.py small.pkl -o wq_forest.h --check
+
+Kandidat table-B (DecisionTable) bukan forest dan ditolak.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from Forest_Codegen import PROBA_ONE, c_identifier, generate_c_header, table_bytes
+from Forest_Compiler import compile_forest
+from Machine_Learning import WaterQualityModel, load_training_data
+
+
+# Baris dengan selisih peluang kelas sklearn di bawah ini dianggap seri
+# (urutan penjumlahan float32 di C boleh memilih kelas lain)
+TIE_MARGIN = 1e-5
+FLOAT_TOLERANCE = 1e-5
+SUPPORTED_ESTIMATORS = "RandomForestClassifier/ExtraTreesClassifier sklearn satu output"
+GCC_FLAGS = ['-std=c99', '-O2', '-Wall', '-Wextra', '-Werror', '-pedantic']
+
+HARNESS = """\
+#include <stdio.h>
+#include "{header}"
+
+int main(void)
+{{
+    float x[{P}_N_FEATURES], proba[{P}_N_CLASSES];
+    int i;
+
+    for (;;) {{
+        for (i = 0; i < {P}_N_FEATURES; i++)
+            if (scanf("%f", &x[i]) != 1)
+                return 0;
+        printf("%d", {p}_predict(x, proba));
+        for (i = 0; i < {P}_N_CLASSES; i++)
+            printf(" %.9g", proba[i]);
+        putchar('\\n');
+    }}
+}}
+"""
+
+
+def load_forest(model_path):
+    """(WaterQualityModel, CompiledForest) dari file model"""
+    model = WaterQualityModel(model_path, lazy=False)
+    forest = model.compiled
+    if forest is None:
+        # Bukan forest yang dikompilasi otomatis (mis. DecisionTable)
+        try:
+            forest = compile_forest(model.model)
+        except ValueError as e:
+            raise ValueError(f"{type(model.model).__name__} tidak bisa diekspor ({e})") from e
+    return model, forest
+
+
+def run_harness(header_text, prefix, X, workdir):
+    """Kompilasi header + harness, jalankan pada X; (kelas indeks, peluang)"""
+    header = os.path.join(workdir, f"{prefix}.h")
+    source = os.path.join(workdir, "harness.c")
+    binary = os.path.join(workdir, "harness")
+    with open(header, 'w', encoding='utf-8') as f:
+        f.write(header_text)
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write(HARNESS.format(header=os.path.basename(header), p=prefix, P=prefix.upper()))
+
+    subprocess.run(['gcc', *GCC_FLAGS, source, '-o', binary, '-lm'], check=True)
+    subprocess.run(['g++', '-std=c++11', '-Wall', '-Wextra', '-Werror', '-fsyntax-only', '-x', 'c++', header],
+                   check=True)
+
+    # %.9g: nilai float32 ditulis persis, sehingga scanf("%f") membaca float32 yang sama dengan sklearn
+    text = "\n".join(" ".join(f"{v:.9g}" for v in row) for row in X.astype(np.float32))
+    result = subprocess.run([binary], input=text, capture_output=True, text=True, check=True)
+    output = np.loadtxt(result.stdout.splitlines(), ndmin=2)
+    return output[:, 0].astype(int), output[:, 1:]
+
+
+def differential_check(model, forest, header_text, prefix, fixed_point):
+    """Bandingkan program C dengan sklearn pada CSV training; True jika lolos"""
+    X_df, _ = load_training_data()
+    X = X_df[forest.feature_names].to_numpy(dtype=np.float64)
+    expected = model.model.predict_proba(X_df[forest.feature_names])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        labels, proba = run_harness(header_text, prefix, X, workdir)
+
+    expected_labels = expected.argmax(axis=1)
+    sorted_proba = np.sort(expected, axis=1)
+    tie = sorted_proba[:, -1] - sorted_proba[:, -2] <= TIE_MARGIN
+    mismatch = labels != expected_labels
+    diff = np.abs(proba - expected).max(axis=1)
+    # Fixed-point: pembulatan Q16 per pohon (maks 0.5/PROBA_ONE) + pembagian float
+    tolerance = 1.0 / PROBA_ONE if fixed_point else FLOAT_TOLERANCE
+
+    print(f"Baris training     : {len(X)}")
+    print(f"Kelas sama         : {len(X) - mismatch.sum()}/{len(X)} ({1 - mismatch.mean():.4%})")
+    print(f"Beda pada baris seri: {(mismatch & tie).sum()} (seri: {tie.sum()})")
+    print(f"Selisih peluang    : maks {diff.max():.3g}, rata-rata {diff.mean():.3g} (toleransi {tolerance:.3g})")
+    failed = (mismatch & ~tie).sum() + (diff > tolerance).sum()
+    if failed:
+        for index in np.flatnonzero((mismatch & ~tie) | (diff > tolerance))[:10]:
+            print(f"  baris {index}: x={X[index].tolist()} sklearn={expected[index].round(6).tolist()} "
+                  f"C={proba[index].round(6).tolist()}")
+    return failed == 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor random forest ke header C (ESP32)")
+    parser.add_argument('model', help="file model .pkl")
+    parser.add_argument('--output', '-o', help="file header .h keluaran")
+    parser.add_argument('--prefix', default='wq_forest', help="awalan nama simbol C")
+    parser.add_argument('--fixed-point', action='store_true', help="ambang int32 dan peluang Q16 (tanpa FPU)")
+    parser.add_argument('--check', action='store_true', help="uji diferensial gcc vs sklearn pada CSV training")
+    args = parser.parse_args(argv)
+    if not args.output and not args.check:
+        parser.error("butuh --output dan/atau --check")
+
+    prefix = c_identifier(args.prefix).lower()
+    try:
+        model, forest = load_forest(args.model)
+    except ValueError as e:
+        parser.error(f"{args.model}: {e}; yang didukung: {SUPPORTED_ESTIMATORS} "
+                     "(kandidat compress_model.py trees-K, rf-dD-K, tree-dD; bukan table-B)")
+    header_text = generate_c_header(forest, prefix, args.fixed_point, source=os.path.basename(args.model))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(header_text)
+        print(f"{args.output}: {forest.n_trees} pohon, {forest.n_nodes} node, "
+              f"tabel {table_bytes(forest, args.fixed_point) / 1024:.0f} KB flash")
+
+    if args.check:
+        ok = differential_check(model, forest, header_text, prefix, args.fixed_point)
+        print("LOLOS" if ok else "GAGAL")
+        if not ok:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Ekspor sistem pakar fuzzy (rules.json) ke header C untuk firmware ESP32.
+
+    python export_fuzzy_c.py -o wq_fuzzy.h
+    python export_fuzzy_c.py --rules rules_baru.json -o wq_fuzzy.h
+
+--check menjalankan uji diferensial: header dikompilasi dengan gcc (C99,
+-Werror) dan g++, lalu hasil program C pada grid padat dibandingkan dengan
+fuzzy_inference (defuzzifikasi centroid) dan confidence evaluate():
+
+- grid seragam --points titik per variabel (sedikit melewati semesta, agar
+  daerah tanpa aturan aktif ikut diuji)
+- grid batas: semua parameter trapesium dan ambang confidence, masing-masing
+  beserta nilai double tepat di bawah/atasnya
+
+Dengan WQ_FUZZY_REAL double, status, aturan aktif, firing strength dan
+confidence harus identik dan skor berselisih <= SCORE_TOLERANCE. Kecocokan
+versi float (-DWQ_FUZZY_REAL=float, lebih cepat di ESP32) ikut dilaporkan.
+
+    python export_fuzzy_c.py --check [--points 41]
+"""
+
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+import Sistem_Pakar as sp
+from Fuzzy_Codegen import DEFAULT_PREFIX, c_identifier, generate_c_header
+from export_forest_c import GCC_FLAGS
+
+
+DEFAULT_POINTS = 41
+SCORE_TOLERANCE = 1e-9
+# Ambang pita confidence di confidence_breakdown (tidak tersimpan di rules.json)
+CONFIDENCE_EDGES = {'ph': (6.5, 6.8, 6.95, 7.05, 7.2, 8.5), 'tds': (300, 500, 600), 'ntu': (1, 3, 5)}
+ML_CASES = (None, "Tidak Layak Minum", "Layak Minum")
+
+HARNESS = """\
+#include <stdio.h>
+#include "{header}"
+
+int main(void)
+{{
+    double ph, tds, ntu;
+    {p}_result r;
+    int k;
+
+    while (scanf("%lf %lf %lf", &ph, &tds, &ntu) == 3) {{
+        {p}_infer(ph, tds, ntu, &r);
+        printf("%d %d %lu %.17g", r.status, r.has_active_rules, (unsigned long)r.rules_fired, (double)r.score);
+        for (k = 0; k < {P}_N_OUTPUTS; k++)
+            printf(" %.17g", (double)r.firing[k]);
+        printf(" %d %d %d\\n", {p}_confidence(&r, ph, tds, ntu, -1),
+               {p}_confidence(&r, ph, tds, ntu, {P}_TIDAK_LAYAK), {p}_confidence(&r, ph, tds, ntu, {P}_LAYAK));
+    }}
+    return 0;
+}}
+"""
+
+
+def variable_range(sets):
+    lo = min(params[0] for params in sets.values())
+    hi = max(params[3] for params in sets.values())
+    return lo - 0.05 * (hi - lo), hi + 0.05 * (hi - lo)
+
+
+def grid_points(rule_base, points):
+    """(grid seragam, grid batas), masing-masing array (n, 3)"""
+    uniform = [np.linspace(*variable_range(rule_base.input_sets[v]), points) for v in sp.VARIABLES]
+    edges = []
+    for v in sp.VARIABLES:
+        values = {p for params in rule_base.input_sets[v].values() for p in params} | set(CONFIDENCE_EDGES[v])
+        values = np.array(sorted(values), dtype=float)
+        edges.append(np.unique(np.concatenate([values, np.nextafter(values, -np.inf), np.nextafter(values, np.inf)])))
+    return np.array(list(itertools.product(*uniform))), np.array(list(itertools.product(*edges)))
+
+
+def python_reference(rule_base, X):
+    """
+    Kolom yang sama dengan keluaran harness, dihitung dengan Sistem_Pakar:
+    fuzzy_inference (centroid) dan confidence dari evaluate per status ML
+    """
+    status_code = {label: code for code, label in enumerate(sp.STATUS_LABELS)}
+    bit = {rule_id: 1 << r for r, rule_id in enumerate(rule_base.rule_ids)}
+    rows = []
+    for ph, tds, ntu in X:
+        status, score, details, active = sp.fuzzy_inference(ph, tds, ntu, method='centroid')
+        firing = details['firing_strength']
+        fired = details['rules_fired']
+        confidences = [sp.evaluate(ph, tds, ntu, ml).confidence for ml in ML_CASES]
+        rows.append([status_code[status], int(active), sum(bit[r[0]] for r in fired), score,
+                     *(firing[name] for name in sp.OUTPUT_NAMES), *confidences])
+    return np.array(rows, dtype=object)
+
+
+def run_harness(header_text, prefix, X, workdir, real='double'):
+    """Kompilasi header + harness dengan tipe WQ_FUZZY_REAL tertentu, jalankan pada X"""
+    header = os.path.join(workdir, f"{prefix}.h")
+    source = os.path.join(workdir, "harness.c")
+    binary = os.path.join(workdir, f"harness_{real}")
+    with open(header, 'w', encoding='utf-8') as f:
+        f.write(header_text)
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write(HARNESS.format(header=os.path.basename(header), p=prefix, P=prefix.upper()))
+
+    subprocess.run(['gcc', *GCC_FLAGS, f'-D{prefix.upper()}_REAL={real}', source, '-o', binary], check=True)
+    subprocess.run(['g++', '-std=c++11', '-Wall', '-Wextra', '-Werror', '-fsyntax-only', '-x', 'c++', header],
+                   check=True)
+
+    text = "\n".join(f"{ph!r} {tds!r} {ntu!r}" for ph, tds, ntu in X.tolist())
+    result = subprocess.run([binary], input=text, capture_output=True, text=True, check=True)
+    return np.array([line.split() for line in result.stdout.splitlines()], dtype=object)
+
+
+def compare(expected, output):
+    """Jumlah baris berbeda per komponen dan selisih skor maksimum"""
+    n_outputs = len(sp.OUTPUT_NAMES)
+    status = output[:, 0].astype(int) != expected[:, 0].astype(int)
+    active = output[:, 1].astype(int) != expected[:, 1].astype(int)
+    rules = output[:, 2].astype(np.int64) != expected[:, 2].astype(np.int64)
+    score_diff = np.abs(output[:, 3].astype(float) - expected[:, 3].astype(float))
+    firing = (output[:, 4:4 + n_outputs].astype(float) != expected[:, 4:4 + n_outputs].astype(float)).any(axis=1)
+    confidence = (output[:, 4 + n_outputs:].astype(int) != expected[:, 4 + n_outputs:].astype(int)).any(axis=1)
+    return {
+        'status': status, 'active': active, 'rules': rules, 'firing': firing,
+        'confidence': confidence, 'score': score_diff > SCORE_TOLERANCE, 'score_diff': score_diff,
+    }
+
+
+def differential_check(rule_base, header_text, prefix, points):
+    uniform, edges = grid_points(rule_base, points)
+    X = np.concatenate([uniform, edges])
+    expected = python_reference(rule_base, X)
+    with tempfile.TemporaryDirectory() as workdir:
+        exact = compare(expected, run_harness(header_text, prefix, X, workdir))
+        # float hanya pada grid seragam: titik batas grid ditujukan untuk presisi double
+        single = compare(expected[:len(uniform)], run_harness(header_text, prefix, uniform, workdir, real='float'))
+
+    print(f"Titik grid            : {len(uniform)} seragam + {len(edges)} batas")
+    for name in ('status', 'active', 'rules', 'firing', 'confidence', 'score'):
+        print(f"Beda {name:<17}: {exact[name].sum()}")
+    print(f"Selisih skor          : maks {exact['score_diff'].max():.3g} (toleransi {SCORE_TOLERANCE:g})")
+    print(f"float (grid seragam): status sama {1 - single['status'].mean():.4%}, confidence sama "
+          f"{1 - single['confidence'].mean():.4%}, selisih skor maks {single['score_diff'].max():.3g}")
+
+    failed = np.zeros(len(X), dtype=bool)
+    for name in ('status', 'active', 'rules', 'firing', 'confidence', 'score'):
+        failed |= exact[name]
+    for index in np.flatnonzero(failed)[:10]:
+        print(f"  x={X[index].tolist()} python={expected[index].tolist()}")
+    return not failed.any()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor sistem pakar fuzzy ke header C (ESP32)")
+    parser.add_argument('--rules', help="file basis aturan (default rules.json)")
+    parser.add_argument('--output', '-o', help="file header .h keluaran")
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help="awalan nama simbol C")
+    parser.add_argument('--check', action='store_true', help="uji diferensial gcc vs fuzzy_inference pada grid padat")
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help="titik grid seragam per variabel")
+    args = parser.parse_args(argv)
+    if not args.output and not args.check:
+        parser.error("butuh --output dan/atau --check")
+
+    prefix = c_identifier(args.prefix).lower()
+    rule_base = sp.load_rule_base(args.rules) if args.rules else sp.get_rule_base()
+    header_text = generate_c_header(rule_base, prefix)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(header_text)
+        print(f"{args.output}: {len(rule_base.rules)} aturan")
+
+    if args.check:
+        ok = differential_check(rule_base, header_text, prefix, args.points)
+        print("LOLOS" if ok else "GAGAL")
+        if not ok:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Kelola registry model ML (Model_Registry.py).
+
+    python publish_model.py publish water_potability_model.pkl --metrics metrics.json
+    python publish_model.py publish model_baru.pkl --no-promote
+    python publish_model.py promote v0002
+    python publish_model.py list
+
+Dashboard yang sedang berjalan (HotSwapModel) memuat versi aktif baru di
+latar belakang pada pemeriksaan berikutnya, tanpa restart.
+"""
+
+import argparse
+import json
+
+from Machine_Learning import configure_logging
+from Model_Registry import REGISTRY_DIR, ModelRegistry
+
+
+def list_versions(registry):
+    current = registry.current_version()
+    versions = registry.versions()
+    if not versions:
+        print(f"Registry kosong: {registry.root}")
+        return
+    for version in versions:
+        meta = registry.metadata(version)
+        metrics = ", ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in meta['metrics'].items())
+        marker = "*" if version == current else " "
+        print(f"{marker} {version}  {meta['created_at']}  {meta['model_class']}  "
+              f"data={str(meta['training_data_hash'])[:12]}  {metrics}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registry model ML berversi")
+    parser.add_argument('--registry', default=REGISTRY_DIR, help="direktori registry")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    publish = commands.add_parser('publish', help="terbitkan file .pkl sebagai versi baru")
+    publish.add_argument('model', help="file model .pkl")
+    publish.add_argument('--metrics', help="file JSON metrik evaluasi (mis. keluaran train.py)")
+    publish.add_argument('--no-promote', action='store_true', help="jangan jadikan versi aktif")
+
+    promote = commands.add_parser('promote', help="jadikan versi tertentu aktif")
+    promote.add_argument('version')
+
+    commands.add_parser('list', help="daftar versi (* = aktif)")
+
+    args = parser.parse_args(argv)
+    configure_logging()
+    registry = ModelRegistry(args.registry)
+
+    if args.command == 'publish':
+        metrics = None
+        if args.metrics:
+            with open(args.metrics, encoding='utf-8') as f:
+                metrics = json.load(f)
+        version = registry.publish(args.model, metrics=metrics, promote=not args.no_promote)
+        print(version)
+    elif args.command == 'promote':
+        try:
+            registry.promote(args.version)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        list_versions(registry)
+
+
+if __name__ == "__main__":
+    main()
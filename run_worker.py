@@ -0,0 +1,70 @@
+"""
+Jalankan worker evaluasi headless (Evaluation_Worker.py).
+
+    python run_worker.py --key service-account.json --db-url https://project-id.firebaseio.com/
+    python run_worker.py --key service-account.json --db-url https://... --path sensor --online-learning
+
+Worker mengevaluasi setiap pembacaan sensor sekali, menulis status ke node
+sensor di Firebase, dan menyimpan hasilnya ke --store. Selama file store
+ada, app.py berjalan sebagai viewer read-only atas hasil worker (set
+EVALUATION_STORE jika --store bukan lokasi default).
+"""
+
+import argparse
+import os
+
+from Evaluation_Worker import HEARTBEAT_INTERVAL, POLL_INTERVAL, STORE_FILE, EvaluationWorker, ResultStore
+from Firebase_Connection import FirebaseConnection
+from Machine_Learning import configure_logging
+from Model_Registry import REGISTRY_DIR, ModelRegistry
+from Online_Learning import OnlineLearner
+from serve_inference import load_service_model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker evaluasi headless: Firebase -> ML + sistem pakar -> status")
+    parser.add_argument('--key', required=True, help="file JSON service account Firebase")
+    parser.add_argument('--db-url', required=True, help="URL Realtime Database (https://...firebaseio.com/)")
+    parser.add_argument('--path', default="sensor", help="path node sensor (status ditulis ke node yang sama)")
+    parser.add_argument('--store', default=os.environ.get("EVALUATION_STORE", STORE_FILE),
+                        help="file hasil untuk viewer (app.py)")
+    parser.add_argument('--model', default="water_potability_model.pkl", help="file model .pkl")
+    parser.add_argument('--registry', default=os.environ.get("ML_REGISTRY_DIR", REGISTRY_DIR),
+                        help="direktori registry model (dipakai jika berisi versi)")
+    parser.add_argument('--no-ml', action='store_true', help="hanya sistem pakar")
+    parser.add_argument('--online-learning', action='store_true', default=os.environ.get("ONLINE_LEARNING") == "1",
+                        help="teruskan label sistem pakar ke pembelajaran online (butuh registry berisi versi)")
+    parser.add_argument('--heartbeat', type=float, default=HEARTBEAT_INTERVAL, help="interval heartbeat store (detik)")
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                        help="interval get() selama stream belum live (detik)")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    model = None if args.no_ml else load_service_model(args.model, args.registry)
+    if model is not None:
+        # Warm-up: pemuatan model tidak terjadi di pembacaan pertama
+        model.predict_batch(7.0, 300.0, 1.0)
+
+    learner = None
+    if args.online_learning:
+        registry = ModelRegistry(args.registry)
+        if registry.current_version() is None:
+            parser.error(f"--online-learning butuh registry berisi versi: {args.registry}")
+        learner = OnlineLearner(registry)
+
+    with open(args.key, 'rb') as f:
+        connection = FirebaseConnection(f.read(), args.db_url)
+    worker = EvaluationWorker(connection, args.path, model, ResultStore(args.store), learner=learner,
+                              heartbeat_interval=args.heartbeat, poll_interval=args.poll_interval)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection.close()
+        if learner is not None:
+            learner.stop()
+
+
+if __name__ == "__main__":
+    main()
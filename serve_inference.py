@@ -0,0 +1,63 @@
+"""
+Jalankan layanan inferensi lokal (Inference_Service.py).
+
+    python serve_inference.py --model water_potability_model.pkl --port 8765
+    python serve_inference.py --unix /tmp/kualitas_air.sock --max-latency-ms 5
+
+Di app.py set environment INFERENCE_SERVICE_URL ke http://127.0.0.1:8765
+atau unix:///tmp/kualitas_air.sock agar dashboard memakai layanan ini.
+"""
+
+import argparse
+import asyncio
+import os
+
+from Inference_Service import (
+    DEFAULT_HOST, DEFAULT_MAX_BATCH, DEFAULT_MAX_LATENCY_MS, DEFAULT_PORT,
+    InferenceServer, MicroBatcher,
+)
+from Machine_Learning import WaterQualityModel, configure_logging
+from Model_Registry import REGISTRY_DIR, HotSwapModel, ModelRegistry
+
+
+def load_service_model(model_path, registry_dir):
+    """Model dari registry (dengan hot swap) jika berisi versi, selain itu file .pkl"""
+    registry = ModelRegistry(registry_dir)
+    if registry.current_version() is not None:
+        return HotSwapModel(registry)
+    return WaterQualityModel(model_path, lazy=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan inferensi lokal ML + sistem pakar dengan micro-batching")
+    parser.add_argument('--model', default="water_potability_model.pkl", help="file model .pkl")
+    parser.add_argument('--registry', default=os.environ.get("ML_REGISTRY_DIR", REGISTRY_DIR),
+                        help="direktori registry model (dipakai jika berisi versi)")
+    parser.add_argument('--no-ml', action='store_true', help="hanya sistem pakar")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="dengarkan di Unix socket ini, bukan TCP")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="pembacaan maksimum per batch")
+    parser.add_argument('--max-latency-ms', type=float, default=DEFAULT_MAX_LATENCY_MS,
+                        help="tenggat pengumpulan batch sejak pembacaan pertama (ms); 0 = batch hanya terbentuk selama worker sibuk")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    model = None if args.no_ml else load_service_model(args.model, args.registry)
+    if model is not None:
+        # Warm-up sebelum menerima koneksi: pemuatan tidak terjadi di batch pertama
+        model.predict_batch(7.0, 300.0, 1.0)
+
+    batcher = MicroBatcher(model, max_batch=args.max_batch, max_latency_ms=args.max_latency_ms)
+    server = InferenceServer(batcher, host=args.host, port=args.port, unix_path=args.unix)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+if __name__ == "__main__":
+    main()
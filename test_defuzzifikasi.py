@@ -0,0 +1,65 @@
+"""
+Uji centroid eksak (defuzzifikasi_output method='centroid', _centroid_scalar)
+terhadap integral numerik dan metode 'sampled' (scan DEFUZZIFIKASI_RESOLUTION titik).
+
+    python -m pytest -q test_defuzzifikasi.py
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+import Sistem_Pakar as sp
+
+
+# Scan 1000 titik pada semesta 0-100 (langkah ~0.1) vs centroid eksak
+SAMPLED_TOLERANCE = 0.05
+# Centroid eksak vs integral trapesium dengan INTEGRAL_POINTS titik
+INTEGRAL_POINTS = 200001
+INTEGRAL_TOLERANCE = 1e-6
+
+
+def firing_strength_sweep(step=0.05, random_rows=2000, seed=0):
+    """Semua kombinasi firing strength pada grid step + baris acak; array (n, 3)"""
+    levels = np.round(np.arange(0.0, 1.0 + step / 2, step), 10)
+    grid = np.array(list(itertools.product(levels, repeat=len(sp.OUTPUT_NAMES))))
+    rng = np.random.default_rng(seed)
+    return np.concatenate([grid, rng.random((random_rows, len(sp.OUTPUT_NAMES)))])
+
+
+def numeric_centroid(strengths, points=INTEGRAL_POINTS):
+    x = np.linspace(0.0, 100.0, points)
+    agregat = np.zeros_like(x)
+    for s, params in zip(strengths, sp.get_rule_base().output_sets.values()):
+        agregat = np.maximum(agregat, np.minimum(s, sp.trapmf_batch(x, params)))
+    dx = np.diff(x)
+    area = np.sum(dx * (agregat[1:] + agregat[:-1]) / 2)
+    moment = np.sum(dx * (x[1:] * agregat[1:] + x[:-1] * agregat[:-1]) / 2)
+    return 50.0 if area == 0 else moment / area
+
+
+@pytest.fixture(scope='module')
+def sweep():
+    return firing_strength_sweep()
+
+
+def test_sampled_within_bound_of_exact_centroid(sweep):
+    exact = sp.defuzzifikasi_output_batch(sweep, method='centroid')
+    sampled = sp.defuzzifikasi_output_batch(sweep, method='sampled', resolution=sp.DEFUZZIFIKASI_RESOLUTION)
+    diff = np.abs(exact - sampled)
+    assert diff.max() < SAMPLED_TOLERANCE, sweep[diff.argmax()].tolist()
+
+
+def test_scalar_centroid_matches_batch(sweep):
+    exact = sp.defuzzifikasi_output_batch(sweep, method='centroid')
+    for row, expected in zip(sweep[::7], exact[::7]):
+        strengths = dict(zip(sp.OUTPUT_NAMES, row.tolist()))
+        assert sp.defuzzifikasi_output(strengths, method='centroid') == expected
+
+
+def test_exact_centroid_matches_numeric_integral():
+    rows = firing_strength_sweep(step=0.25, random_rows=100, seed=1)
+    exact = sp.defuzzifikasi_output_batch(rows, method='centroid')
+    for row, score in zip(rows, exact):
+        assert abs(score - numeric_centroid(row)) < INTEGRAL_TOLERANCE, row.tolist()
@@ -0,0 +1,51 @@
+"""
+Uji diferensial export_forest_c: header C hasil ekspor forest kecil
+dikompilasi gcc/g++ dan dibandingkan dengan predict_proba sklearn
+(mode float dan fixed-point). Dilewati jika gcc/g++ tidak tersedia.
+
+    python -m pytest -q test_export_forest_c.py
+"""
+
+import shutil
+
+import joblib
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import export_forest_c
+from Decision_Table import DecisionTable
+from Forest_Codegen import generate_c_header
+from Machine_Learning import load_training_data
+
+
+needs_compiler = pytest.mark.skipif(shutil.which('gcc') is None or shutil.which('g++') is None,
+                                    reason="butuh gcc dan g++")
+
+
+@pytest.fixture(scope='module')
+def small_forest(tmp_path_factory):
+    X, y = load_training_data()
+    estimator = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=0).fit(X, y)
+    path = tmp_path_factory.mktemp('forest') / "small.pkl"
+    joblib.dump(estimator, path)
+    return export_forest_c.load_forest(str(path))
+
+
+@needs_compiler
+@pytest.mark.parametrize('fixed_point', [False, True], ids=['float', 'fixed-point'])
+def test_differential_check_passes(small_forest, fixed_point):
+    model, forest = small_forest
+    header_text = generate_c_header(forest, 'wq_forest', fixed_point, source="small.pkl")
+    assert export_forest_c.differential_check(model, forest, header_text, 'wq_forest', fixed_point)
+
+
+def test_non_forest_model_is_a_usage_error(tmp_path, capsys):
+    X, _ = load_training_data()
+    teacher = RandomForestClassifier(n_estimators=4, max_depth=4, random_state=0).fit(X, (X['ph'] > 7).astype(int))
+    path = tmp_path / "table.pkl"
+    joblib.dump(DecisionTable.distill(teacher, X, 8), path)
+
+    with pytest.raises(SystemExit) as exit_info:
+        export_forest_c.main([str(path), '-o', str(tmp_path / "out.h")])
+    assert exit_info.value.code == 2
+    assert "DecisionTable tidak bisa diekspor" in capsys.readouterr().err
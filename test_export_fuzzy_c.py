@@ -0,0 +1,38 @@
+"""
+Header C sistem pakar (export_fuzzy_c): uji diferensial gcc vs
+fuzzy_inference pada grid, dan wq_fuzzy.h yang di-commit harus sama persis
+dengan hasil generate_c_header dari rules.json.
+
+    python -m pytest -q test_export_fuzzy_c.py
+"""
+
+import json
+import os
+import shutil
+
+import pytest
+
+import Sistem_Pakar as sp
+from export_fuzzy_c import differential_check
+from Fuzzy_Codegen import DEFAULT_PREFIX, generate_c_header
+
+
+HEADER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wq_fuzzy.h")
+
+needs_compiler = pytest.mark.skipif(shutil.which('gcc') is None or shutil.which('g++') is None,
+                                    reason="butuh gcc dan g++")
+
+
+@needs_compiler
+def test_differential_check_passes():
+    rule_base = sp.get_rule_base()
+    assert differential_check(rule_base, generate_c_header(rule_base, DEFAULT_PREFIX), DEFAULT_PREFIX, points=11)
+
+
+def test_committed_header_matches_rules_json():
+    with open(sp.RULES_FILE, encoding='utf-8') as f:
+        rule_base = sp.RuleBase(json.load(f), source=sp.RULES_FILE)
+    with open(HEADER_FILE, encoding='utf-8', newline='') as f:
+        committed = f.read()
+    assert committed == generate_c_header(rule_base, DEFAULT_PREFIX), \
+        "wq_fuzzy.h tidak sesuai rules.json; jalankan: python export_fuzzy_c.py -o wq_fuzzy.h"
@@ -0,0 +1,30 @@
+"""
+Modul ringan (sistem pakar, ingest) tidak boleh menarik stack ML
+(pandas, sklearn, joblib) hanya karena logging.
+
+    python -m pytest -q test_imports.py
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+
+ML_STACK = ('Machine_Learning', 'pandas', 'sklearn', 'joblib')
+
+LIGHT_MODULES = ['Sistem_Pakar', 'Sistem_Pakar_LUT', 'Sensor_Stream', 'Firebase_Connection']
+
+# Dependensi pihak ketiga per modul; uji dilewati jika tidak terpasang
+REQUIRES = {'Firebase_Connection': 'firebase_admin'}
+
+
+@pytest.mark.parametrize('module', LIGHT_MODULES)
+def test_module_does_not_import_ml_stack(module):
+    if module in REQUIRES:
+        pytest.importorskip(REQUIRES[module])
+    code = (f"import json, sys; import {module}; "
+            f"print(json.dumps([m for m in {ML_STACK!r} if m in sys.modules]))")
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert json.loads(out) == []
@@ -0,0 +1,78 @@
+"""
+FuzzyLookupTable setelah hot reload rules.json: tabel lama tidak boleh
+dipakai lagi (query dijawab mesin eksak) sampai refresh() membangun ulang.
+
+    python -m pytest -q test_lookup_table.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import Sistem_Pakar as sp
+from Sistem_Pakar_LUT import FuzzyLookupTable
+
+
+# Grid kasar agar build cepat; hasil eksak tetap dijamin lewat fallback
+RESOLUTION = (0.5, 100.0, 10.0)
+
+
+@pytest.fixture
+def original_rule_base():
+    source = sp.get_rule_base().source
+    yield source
+    sp.load_rule_base(source)
+
+
+def sample_points(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(5.0, 9.5, n), rng.uniform(0.0, 1400.0, n), rng.uniform(0.0, 30.0, n)
+
+
+def shifted_rules(source, path):
+    """Salinan rules.json dengan batas TDS Sempurna/Baik digeser dari 300 ke 500"""
+    with open(source, encoding='utf-8') as f:
+        data = json.load(f)
+    data['input_sets']['tds']['Sempurna'] = [0, 0, 500, 501]
+    data['input_sets']['tds']['Baik'] = [500, 501, 600, 601]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return path
+
+
+def test_table_is_bypassed_after_rule_reload_until_refresh(tmp_path, original_rule_base):
+    table = FuzzyLookupTable(str(tmp_path / "lut"), resolution=RESOLUTION)
+    points = sample_points()
+    before, _, _ = table.query(*points)
+
+    sp.load_rule_base(shifted_rules(original_rule_base, tmp_path / "rules.json"))
+    assert not table.is_current()
+
+    exact_status, exact_score, details, _ = sp.fuzzy_inference_batch(*points)
+    status, score, firing_strength = table.query(*points)
+    assert (before != exact_status).any()  # perubahan aturan memang menggeser keputusan
+    np.testing.assert_array_equal(status, exact_status)
+    np.testing.assert_allclose(score, exact_score)
+    np.testing.assert_allclose(firing_strength, details['firing_strength'])
+
+    for ph, tds, ntu in list(zip(*points))[:200]:
+        status, score, details, _ = sp.fuzzy_inference(ph, tds, ntu)
+        assert table.query_one(ph, tds, ntu) == (status, score, details['firing_strength'])
+
+    assert table.refresh()
+    assert table.is_current()
+    assert not table.refresh()
+    status, _, _ = table.query(*points)
+    np.testing.assert_array_equal(status, exact_status)
+
+
+def test_stale_table_on_disk_is_rebuilt_on_load(tmp_path, original_rule_base):
+    path = str(tmp_path / "lut")
+    FuzzyLookupTable(path, resolution=RESOLUTION)
+    sp.load_rule_base(shifted_rules(original_rule_base, tmp_path / "rules.json"))
+
+    table = FuzzyLookupTable(path, resolution=RESOLUTION)
+    assert table.is_current()
+    status, _, _ = table.query(*sample_points())
+    np.testing.assert_array_equal(status, sp.fuzzy_inference_batch(*sample_points())[0])
@@ -0,0 +1,54 @@
+"""
+Jalur satu pembacaan WaterQualityModel.predict_proba_one: forest terkompilasi
+tanpa pandas; estimator sklearn lain dengan nama fitur memakai DataFrame dan
+hal itu dicatat sekali.
+
+    python -m pytest -q test_predict_one.py
+"""
+
+import logging
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+import Machine_Learning
+from Machine_Learning import WaterQualityModel, load_training_data
+
+
+READINGS = [(7.1, 200.0, 1.0), (5.5, 900.0, 12.0), (8.9, 450.0, 3.5)]
+
+
+def fitted_model(tmp_path, estimator):
+    X, y = load_training_data()
+    path = tmp_path / "model.pkl"
+    joblib.dump(estimator.fit(X, y), path)
+    return WaterQualityModel(str(path), lazy=False)
+
+
+def forbidden_dataframe(*args, **kwargs):
+    raise AssertionError("DataFrame dibuat di jalur satu pembacaan")
+
+
+def test_compiled_forest_path_builds_no_dataframe(tmp_path):
+    model = fitted_model(tmp_path, RandomForestClassifier(n_estimators=5, max_depth=5, random_state=0))
+    expected = [model.model.predict_proba(model._feature_frame(*reading))[0] for reading in READINGS]
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(Machine_Learning.pd, 'DataFrame', forbidden_dataframe)
+        proba = [model.predict_proba_one(*reading) for reading in READINGS]
+    np.testing.assert_allclose(proba, expected)
+
+
+def test_non_forest_estimator_falls_back_to_dataframe_and_logs_once(tmp_path, caplog, monkeypatch):
+    model = fitted_model(tmp_path, GradientBoostingClassifier(n_estimators=10, random_state=0))
+    assert model.compiled is None
+
+    monkeypatch.setattr(Machine_Learning.logger, 'propagate', True)  # configure_logging mematikannya
+    with caplog.at_level(logging.INFO, logger=Machine_Learning.logger.name):
+        proba = [model.predict_proba_one(*reading) for reading in READINGS]
+    fallbacks = [r for r in caplog.records if getattr(r, 'fields', {}).get('event') == 'ml_dataframe_fallback']
+    assert len(fallbacks) == 1
+    expected = [model.model.predict_proba(model._feature_frame(*reading))[0] for reading in READINGS]
+    np.testing.assert_allclose(proba, expected)
@@ -0,0 +1,305 @@
+"""
+Uji SensorStream terhadap server HTTP/SSE lokal pengganti Firebase
+(http.server stdlib, tanpa Firebase sungguhan).
+
+    python -m pytest -q test_sensor_stream.py
+"""
+
+import json
+import queue
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import Sensor_Stream
+from Sensor_Stream import AuthRevoked, SensorStream, StreamCancelled
+
+
+NODE = {'ph': 7.1, 'tds': 200.0, 'ntu': 1.0, 'timestamp': '10:00:00', 'status': 'Layak Minum'}
+
+
+# =============================
+# SERVER PENGGANTI
+# =============================
+
+class Stream:
+    """Rencana koneksi: respons 200 text/event-stream, event dikirim lewat send()"""
+
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def send(self, event, data):
+        self.events.put((event, data))
+
+    def close(self):
+        self.events.put(None)
+
+
+class Redirect:
+    def __init__(self, location):
+        self.location = location
+
+
+class Fail:
+    def __init__(self, status):
+        self.status = status
+
+
+class Hang:
+    """Terima request tapi tidak pernah mengirim header respons"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+
+class StandInServer:
+    """Setiap GET mengambil rencana berikutnya dari antrean plans (default 503)"""
+
+    def __init__(self):
+        self.plans = queue.Queue()
+        self.requests = []  # (waktu monotonic, path, header Accept)
+        self.opened = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append((time.monotonic(), self.path, self.headers.get('Accept')))
+                try:
+                    plan = server.plans.get(timeout=2.0)
+                except queue.Empty:
+                    plan = Fail(503)
+                server.opened.append(plan)
+                if isinstance(plan, Redirect):
+                    self.send_response(307)
+                    self.send_header('Location', plan.location + self.path)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                elif isinstance(plan, Fail):
+                    body = b'{"error": "unavailable"}'
+                    self.send_response(plan.status)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif isinstance(plan, Hang):
+                    plan.release.wait()
+                else:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Connection', 'close')
+                    self.end_headers()
+                    self.wfile.flush()
+                    while True:
+                        item = plan.events.get()
+                        if item is None:
+                            return
+                        event, data = item
+                        try:
+                            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                            self.wfile.flush()
+                        except OSError:
+                            return
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/"
+
+    def plan(self, plan):
+        self.plans.put(plan)
+        return plan
+
+    def query(self, index):
+        return urllib.parse.parse_qs(urllib.parse.urlsplit(self.requests[index][1]).query)
+
+    def close(self):
+        for plan in self.opened + list(self.plans.queue):
+            if isinstance(plan, Stream):
+                plan.close()
+            elif isinstance(plan, Hang):
+                plan.release.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def make_stream(server):
+    streams = []
+
+    def make(**kwargs):
+        kwargs.setdefault('backoff_initial', 0.05)
+        kwargs.setdefault('backoff_max', 1.0)
+        stream = SensorStream(server.url, '/sensor', **kwargs)
+        streams.append(stream)
+        return stream
+
+    yield make
+    for stream in streams:
+        stream.stop()
+
+
+# =============================
+# UJI
+# =============================
+
+def test_redirect_followed_with_stream_headers_and_auth(server, make_stream):
+    server.plan(Redirect('/moved'))
+    live = server.plan(Stream())
+    live.send('put', {'path': '/', 'data': NODE})
+
+    stream = make_stream(token_provider=lambda: 'token-1', auth_override={'uid': 'streamlit-app'})
+    assert wait_until(lambda: stream.buffer.seq == 1)
+
+    assert stream.is_live
+    assert server.requests[1][1].startswith('/moved/sensor.json?')
+    assert server.requests[1][2] == 'text/event-stream'
+    assert server.query(1) == {'access_token': ['token-1'], 'auth_variable_override': ['{"uid":"streamlit-app"}']}
+    assert stream.latest()['ph'] == 7.1
+
+
+def test_field_writes_produce_one_reading_and_status_none(server, make_stream):
+    live = server.plan(Stream())
+    live.send('put', {'path': '/', 'data': NODE})
+    stream = make_stream()
+    assert wait_until(lambda: stream.buffer.seq == 1)
+
+    # Urutan tulis ESP32: ntu, ph, tds, lalu timestamp
+    live.send('put', {'path': '/ntu', 'data': 1.5})
+    live.send('put', {'path': '/ph', 'data': 6.9})
+    live.send('put', {'path': '/tds', 'data': 250})
+    live.send('keep-alive', None)
+    live.send('put', {'path': '/timestamp', 'data': '10:00:03'})
+    assert wait_until(lambda: stream.buffer.seq == 2)
+
+    # Tulisan status dashboard/worker bukan pembacaan baru
+    live.send('patch', {'path': '/', 'data': {'status': 'Tidak Layak Minum'}})
+    live.send('put', {'path': '/status', 'data': 'Layak Minum'})
+    # patch root berisi seluruh field -> tepat satu pembacaan
+    live.send('patch', {'path': '/', 'data': {'ph': 7.0, 'tds': 300, 'ntu': 2.0, 'timestamp': '10:00:06'}})
+    assert wait_until(lambda: stream.buffer.seq == 3)
+    time.sleep(0.1)
+
+    readings = [(r['ph'], r['tds'], r['ntu'], r['timestamp']) for r in stream.buffer.snapshot()]
+    assert readings == [
+        (7.1, 200.0, 1.0, '10:00:00'),
+        (6.9, 250.0, 1.5, '10:00:03'),
+        (7.0, 300.0, 2.0, '10:00:06'),
+    ]
+    assert stream.events == 9
+
+
+def test_auth_revoked_reconnects_immediately_with_new_token(server, make_stream):
+    tokens = iter(['token-1', 'token-2'])
+    first = server.plan(Stream())
+    first.send('put', {'path': '/', 'data': NODE})
+    # Backoff awal besar: sambung ulang yang cepat hanya mungkin tanpa backoff
+    stream = make_stream(token_provider=lambda: next(tokens), backoff_initial=5.0)
+    assert wait_until(lambda: stream.is_live)
+
+    second = server.plan(Stream())
+    second.send('put', {'path': '/', 'data': dict(NODE, timestamp='10:00:09')})
+    revoked_at = time.monotonic()
+    first.send('auth_revoked', 'credential is no longer valid')
+    first.close()
+
+    assert wait_until(lambda: stream.buffer.seq == 2, timeout=2.0)
+    assert server.requests[1][0] - revoked_at < 1.0
+    assert server.query(1)['access_token'] == ['token-2']
+    assert stream.last_error.startswith(AuthRevoked.__name__)
+
+
+def test_backoff_grows_on_503(server, make_stream, monkeypatch):
+    monkeypatch.setattr(Sensor_Stream.random, 'uniform', lambda low, high: high)  # tanpa jitter
+    for _ in range(4):
+        server.plan(Fail(503))
+    live = server.plan(Stream())
+    live.send('put', {'path': '/', 'data': NODE})
+
+    stream = make_stream(backoff_initial=0.1, backoff_max=10.0)
+    assert wait_until(lambda: stream.is_live)
+
+    times = [t for t, _, _ in server.requests[:5]]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    for gap, expected in zip(gaps, (0.1, 0.2, 0.4, 0.8)):
+        assert expected <= gap < expected + 0.25
+    assert stream.buffer.seq == 1
+
+
+def test_cancel_reconnects_after_backoff(server, make_stream):
+    first = server.plan(Stream())
+    first.send('put', {'path': '/', 'data': NODE})
+    stream = make_stream()
+    assert wait_until(lambda: stream.is_live)
+
+    second = server.plan(Stream())
+    second.send('put', {'path': '/', 'data': NODE})
+    first.send('cancel', 'Permission denied')
+    first.close()
+
+    assert wait_until(lambda: len(server.requests) == 2 and stream.is_live)
+    assert stream.last_error.startswith(StreamCancelled.__name__)
+    assert stream.connects == 2
+    assert stream.buffer.seq == 1  # snapshot ulang yang sama bukan pembacaan baru
+
+
+def test_silent_stream_reconnects_after_read_timeout(server, make_stream):
+    server.plan(Stream())  # header terkirim, lalu diam tanpa keep-alive
+    live = server.plan(Stream())
+    live.send('put', {'path': '/', 'data': NODE})
+
+    stream = make_stream(read_timeout=0.3)
+    assert wait_until(lambda: stream.is_live)
+    assert len(server.requests) == 2
+    assert 'timed out' in stream.last_error
+
+
+def test_stop_while_streaming(server, make_stream):
+    live = server.plan(Stream())
+    live.send('put', {'path': '/', 'data': NODE})
+    stream = make_stream()
+    assert wait_until(lambda: stream.is_live)
+
+    started = time.monotonic()
+    assert stream.stop(timeout=2.0)
+    assert time.monotonic() - started < 1.0
+    assert stream.state == 'stopped'
+
+
+def test_stop_while_waiting_for_response_then_restart(server, make_stream):
+    hang = server.plan(Hang())
+    stream = make_stream()
+    assert wait_until(lambda: len(server.requests) == 1)
+
+    started = time.monotonic()
+    assert stream.stop(timeout=2.0)
+    assert time.monotonic() - started < 1.0
+    assert stream.state == 'stopped'
+    hang.release.set()
+
+    live = server.plan(Stream())
+    live.send('put', {'path': '/', 'data': NODE})
+    stream.start()
+    assert wait_until(lambda: stream.buffer.seq == 1)
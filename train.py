@@ -0,0 +1,267 @@
+"""
+Pipeline training model ML, reproduksi deterministik dari water_quality_v2.ipynb.
+
+Langkah (sama dengan notebook):
+1. water_quality_potability_v2.csv: kolom ph, Solids, Turbidity, Potability;
+   Solids diskalakan /62000*1000, digabung dengan dataset_sensor.csv,
+   duplikat dibuang, ph kosong diisi rata-rata (Machine_Learning.load_training_data)
+2. Split hold-out 80/20 (random_state=42 = --seed default)
+3. Lima model bawaan notebook (Decision Tree, KNN, AdaBoost, Random Forest,
+   XGBoost) dibandingkan dengan setelan default
+4. Model final: RandomForestClassifier(n_estimators=500, max_depth=8),
+   dievaluasi pada hold-out lalu dilatih ulang pada seluruh data
+
+Tambahan dibanding notebook:
+- semua random_state ditetapkan (--seed), sehingga hasil bisa direproduksi
+- cross-validation (StratifiedKFold) dan grid search Random Forest dijalankan
+  paralel di semua core (--n-jobs); setiap (model, fold) dijalankan sebagai
+  satu tugas joblib
+- data hasil praproses + indeks split/fold dan skor per fold disimpan di
+  .train_cache/, sehingga menjalankan ulang hanya melatih model final
+
+Keluaran: model .pkl (langsung dipakai WaterQualityModel) dan
+<model>.metrics.json (WaterQualityModel.metrics).
+
+    python train.py --output water_potability_model.pkl --n-jobs -1
+    python train.py --use-best --publish
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from Machine_Learning import (
+    BASE_DIR, DEFAULT_FEATURES, POTABILITY_FILE, SENSOR_FILE,
+    load_training_data, metrics_path, split_training_data,
+)
+from Model_Registry import REGISTRY_DIR, ModelRegistry, training_data_hash
+
+try:
+    from xgboost import XGBClassifier
+except ImportError:  # opsional: baseline XGBoost dilewati
+    XGBClassifier = None
+
+
+SEED = 42
+N_SPLITS = 5
+CACHE_DIR = os.path.join(BASE_DIR, ".train_cache")
+
+# Naikkan jika langkah praproses berubah agar cache data lama tidak dipakai
+PREPROCESS_VERSION = 1
+
+# Setelan model final di notebook
+FINAL_PARAMS = {'n_estimators': 500, 'max_depth': 8}
+
+# Grid search Random Forest (mencakup FINAL_PARAMS)
+PARAM_GRID = {'n_estimators': [200, 500], 'max_depth': [6, 8, 10, 12]}
+
+
+def baseline_models(seed):
+    """Lima model perbandingan notebook, setelan default + random_state tetap"""
+    models = {
+        'Decision_Tree_Class': DecisionTreeClassifier(random_state=seed),
+        'KNNClassifier': KNeighborsClassifier(),
+        'AdaBoostClassifier': AdaBoostClassifier(random_state=seed),
+        'RandomForestClassifier': RandomForestClassifier(random_state=seed),
+    }
+    if XGBClassifier is not None:
+        models['XGBClassifier'] = XGBClassifier(random_state=seed, n_jobs=1)
+    return models
+
+
+def final_model(params, seed, n_jobs=1):
+    return RandomForestClassifier(**params, random_state=seed, n_jobs=n_jobs)
+
+
+# =============================
+# DATA + CACHE
+# =============================
+
+def prepare_data(seed, n_splits, cache_dir=CACHE_DIR):
+    """
+    Data training + indeks hold-out dan fold CV. Disimpan di cache dengan kunci
+    hash isi CSV, seed, jumlah fold, dan PREPROCESS_VERSION.
+    Returns: dict X, y, train, test, folds (list (train, valid) indeks posisi), data_hash
+    """
+    files, data_hash = training_data_hash((POTABILITY_FILE, SENSOR_FILE))
+    key = hashlib.sha256(f"{data_hash}:{seed}:{n_splits}:{PREPROCESS_VERSION}".encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"data-{key}.npz")
+
+    if not os.path.exists(path):
+        X, y = load_training_data()
+        train, test, _, _ = split_training_data(np.arange(len(X)), y, random_state=seed)
+        # fold_of[i] = fold validasi untuk baris train ke-i
+        fold_of = np.empty(len(train), dtype=np.int64)
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+        for fold, (_, valid) in enumerate(splitter.split(train, y.iloc[train])):
+            fold_of[valid] = fold
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(path, X=X.to_numpy(), y=y.to_numpy(), train=train, test=test, fold_of=fold_of)
+
+    # Selalu dibangun dari array cache: hash joblib (cache skor fold) sama di setiap run
+    cached = np.load(path)
+    X = pd.DataFrame(cached['X'], columns=DEFAULT_FEATURES)
+    y = pd.Series(cached['y'], name='Potability')
+    train, test, fold_of = cached['train'], cached['test'], cached['fold_of']
+    folds = [(train[fold_of != k], train[fold_of == k]) for k in range(n_splits)]
+    return {'X': X, 'y': y, 'train': train, 'test': test, 'folds': folds,
+            'files': files, 'data_hash': data_hash, 'cache_file': path}
+
+
+def fit_score(estimator, X, y, train, valid):
+    """Akurasi estimator (clone) yang dilatih pada baris train dan diuji pada baris valid"""
+    model = clone(estimator).fit(X.iloc[train], y.iloc[train])
+    return float(accuracy_score(y.iloc[valid], model.predict(X.iloc[valid])))
+
+
+# =============================
+# EVALUASI
+# =============================
+
+def evaluate_candidates(candidates, data, n_jobs, memory):
+    """
+    Skor CV per fold + akurasi hold-out untuk setiap kandidat {nama: estimator}.
+    Semua pasangan (kandidat, fold) dijalankan paralel; hasil di-cache per pasangan.
+    """
+    scorer = memory.cache(fit_score)
+    splits = data['folds'] + [(data['train'], data['test'])]
+    tasks = [(name, estimator, split) for name, estimator in candidates.items() for split in splits]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(scorer)(estimator, data['X'], data['y'], *split) for _, estimator, split in tasks
+    )
+
+    results = {}
+    n = len(splits)
+    for i, name in enumerate(candidates):
+        fold_scores = scores[i * n:(i + 1) * n - 1]
+        results[name] = {
+            'cv_mean': float(np.mean(fold_scores)),
+            'cv_std': float(np.std(fold_scores)),
+            'cv_scores': fold_scores,
+            'holdout_accuracy': scores[(i + 1) * n - 1],
+        }
+    return results
+
+
+def holdout_metrics(model, X, y):
+    predicted = model.predict(X)
+    return {
+        'accuracy': float(accuracy_score(y, predicted)),
+        'precision': float(precision_score(y, predicted)),
+        'recall': float(recall_score(y, predicted)),
+        'f1': float(f1_score(y, predicted)),
+        'confusion_matrix': confusion_matrix(y, predicted).tolist(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latih model ML kelayakan air (reproduksi notebook)")
+    parser.add_argument('--output', '-o', default="water_potability_model.pkl", help="file model .pkl")
+    parser.add_argument('--seed', type=int, default=SEED, help="random_state untuk split, fold, dan model")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="jumlah proses paralel (-1 = semua core)")
+    parser.add_argument('--folds', type=int, default=N_SPLITS, help="jumlah fold cross-validation")
+    parser.add_argument('--no-search', action='store_true', help="lewati grid search Random Forest")
+    parser.add_argument('--use-best', action='store_true',
+                        help="model final memakai parameter terbaik grid search (default: setelan notebook)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="direktori cache data/fold/skor")
+    parser.add_argument('--no-cache', action='store_true', help="jangan pakai cache skor fold")
+    parser.add_argument('--publish', action='store_true', help="terbitkan model ke registry model")
+    parser.add_argument('--registry', default=REGISTRY_DIR, help="direktori registry untuk --publish")
+    args = parser.parse_args(argv)
+
+    if args.use_best and args.no_search:
+        parser.error("--use-best membutuhkan grid search (tanpa --no-search)")
+
+    started = time.perf_counter()
+    data = prepare_data(args.seed, args.folds, args.cache_dir)
+    X, y, train, test = data['X'], data['y'], data['train'], data['test']
+    print(f"Data: {len(X)} baris ({len(train)} train / {len(test)} test), cache {data['cache_file']}")
+    if XGBClassifier is None:
+        print("xgboost tidak terpasang: baseline XGBClassifier dilewati")
+
+    memory = joblib.Memory(None if args.no_cache else os.path.join(args.cache_dir, "scores"), verbose=0)
+
+    # 1. Perbandingan model notebook (setelan default)
+    baselines = evaluate_candidates(baseline_models(args.seed), data, args.n_jobs, memory)
+    print("\nModel bawaan notebook (default):")
+    for name, result in baselines.items():
+        print(f"  {name:<24} CV {result['cv_mean']:.4f} ± {result['cv_std']:.4f}   hold-out {result['holdout_accuracy']:.4f}")
+
+    # 2. Grid search Random Forest
+    search = {}
+    if not args.no_search:
+        grid = list(ParameterGrid(PARAM_GRID))
+        candidates = {json.dumps(params, sort_keys=True): final_model(params, args.seed) for params in grid}
+        search = evaluate_candidates(candidates, data, args.n_jobs, memory)
+        print("\nGrid search Random Forest:")
+        for key, result in sorted(search.items(), key=lambda item: -item[1]['cv_mean']):
+            print(f"  {key:<40} CV {result['cv_mean']:.4f} ± {result['cv_std']:.4f}   hold-out {result['holdout_accuracy']:.4f}")
+
+    if args.use_best:
+        best_key = max(search, key=lambda k: (search[k]['cv_mean'], -search[k]['cv_std']))
+        params = json.loads(best_key)
+    else:
+        params = dict(FINAL_PARAMS)
+
+    # 3. Evaluasi hold-out model final, lalu latih ulang pada seluruh data (seperti notebook)
+    evaluated = final_model(params, args.seed, args.n_jobs).fit(X.iloc[train], y.iloc[train])
+    holdout = holdout_metrics(evaluated, X.iloc[test], y.iloc[test])
+    model = final_model(params, args.seed, args.n_jobs).fit(X, y)
+    # n_jobs tidak ikut disimpan: inferensi satu pembacaan tidak butuh paralel
+    model.set_params(n_jobs=None)
+
+    joblib.dump(model, args.output)
+    metrics = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'seed': args.seed,
+        'sklearn_version': sklearn.__version__,
+        'features': DEFAULT_FEATURES,
+        'model': {'class': type(model).__name__, 'params': params},
+        'data': {
+            'rows': len(X),
+            'train_rows': len(train),
+            'test_rows': len(test),
+            'positive_rate': float(y.mean()),
+            'files': data['files'],
+            'hash': data['data_hash'],
+        },
+        'holdout': holdout,
+        'cv': {
+            'folds': args.folds,
+            'baselines': baselines,
+            'search': search,
+        },
+        'elapsed_s': time.perf_counter() - started,
+    }
+    with open(metrics_path(args.output), 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
+
+    print(f"\nModel final {params}: hold-out accuracy {holdout['accuracy']:.4f}, f1 {holdout['f1']:.4f}")
+    print(f"Model disimpan ke {args.output}, metrik ke {metrics_path(args.output)} ({metrics['elapsed_s']:.1f} s)")
+
+    if args.publish:
+        flat = {k: v for k, v in holdout.items() if k != 'confusion_matrix'}
+        cv = search.get(json.dumps(params, sort_keys=True))
+        if cv is not None:
+            flat['cv_accuracy'] = cv['cv_mean']
+        version = ModelRegistry(args.registry).publish(args.output, metrics=flat)
+        print(f"Diterbitkan ke registry sebagai {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+/*
+ * wq_fuzzy.h - dihasilkan oleh export_fuzzy_c.py dari rules.json; jangan diedit manual.
+ * Sistem pakar fuzzy Mamdani: 22 aturan, defuzzifikasi centroid tertutup.
+ * Tanpa alokasi memori; semua tabel const.
+ */
+#ifndef WQ_FUZZY_H
+#define WQ_FUZZY_H
+
+#include <stdint.h>
+
+#ifndef WQ_FUZZY_REAL
+#define WQ_FUZZY_REAL double
+#endif
+typedef WQ_FUZZY_REAL wq_fuzzy_real;
+
+#define WQ_FUZZY_N_RULES 22
+#define WQ_FUZZY_N_OUTPUTS 3
+#define WQ_FUZZY_N_RAMPS 4
+#define WQ_FUZZY_N_FIXED 18
+#define WQ_FUZZY_N_POINTS (WQ_FUZZY_N_FIXED + WQ_FUZZY_N_RAMPS * WQ_FUZZY_N_OUTPUTS)
+#define WQ_FUZZY_TIDAK_LAYAK 0
+#define WQ_FUZZY_CUKUP_LAYAK 1
+#define WQ_FUZZY_LAYAK 2
+#define WQ_FUZZY_DECISION_AGREE 0
+#define WQ_FUZZY_DECISION_ES_LAYAK 1
+#define WQ_FUZZY_DECISION_ES_CUKUP 2
+#define WQ_FUZZY_DECISION_SAFETY 3
+#define WQ_FUZZY_DECISION_ES_ONLY 4
+
+static const char *const wq_fuzzy_status_labels[3] = {
+    "Tidak Layak Minum", "Cukup Layak Minum", "Layak Minum",
+};
+
+static const char *const wq_fuzzy_rule_ids[22] = {
+    "R1", "R2", "R3", "R4", "R5", "R6", "R7", "R8",
+    "R9", "R10", "R11", "R12", "R13", "R14", "R15", "R16",
+    "R17", "R18", "R19", "R20", "R21", "R22",
+};
+
+#define WQ_FUZZY_N_PH_SETS 5
+static const wq_fuzzy_real wq_fuzzy_ph_sets[5][4] = {
+    {0.0, 0.0, 6.5, 6.5999999999999996},
+    {6.5, 6.5999999999999996, 6.9000000000000004, 7.0},
+    {6.9000000000000004, 7.0, 7.0, 7.0999999999999996},
+    {7.0, 7.0999999999999996, 8.5, 8.5999999999999996},
+    {8.5, 8.5999999999999996, 14.0, 14.0},
+};
+
+#define WQ_FUZZY_N_TDS_SETS 5
+static const wq_fuzzy_real wq_fuzzy_tds_sets[5][4] = {
+    {0.0, 0.0, 300.0, 301.0},
+    {300.0, 301.0, 600.0, 601.0},
+    {600.0, 601.0, 900.0, 901.0},
+    {900.0, 901.0, 1199.0, 1200.0},
+    {1199.0, 1200.0, 2000.0, 2000.0},
+};
+
+#define WQ_FUZZY_N_NTU_SETS 5
+static const wq_fuzzy_real wq_fuzzy_ntu_sets[5][4] = {
+    {0.0, 0.0, 1.0, 1.1000000000000001},
+    {1.0, 1.1000000000000001, 5.0, 5.0999999999999996},
+    {5.0, 5.0999999999999996, 25.0, 25.100000000000001},
+    {25.0, 25.100000000000001, 100.0, 100.09999999999999},
+    {100.0, 100.09999999999999, 300.0, 300.0},
+};
+
+static const wq_fuzzy_real wq_fuzzy_output_sets[3][4] = {
+    {0.0, 0.0, 40.0, 50.0},
+    {40.0, 50.0, 70.0, 80.0},
+    {70.0, 80.0, 100.0, 100.0},
+};
+
+static const int8_t wq_fuzzy_rule_antecedents[22][3] = {
+    {0, -1, -1},
+    {4, -1, -1},
+    {-1, 3, -1},
+    {-1, 4, -1},
+    {-1, -1, 3},
+    {-1, -1, 4},
+    {1, 2, 2},
+    {3, 2, 2},
+    {2, 2, 1},
+    {2, 1, 2},
+    {1, 1, 1},
+    {3, 1, 1},
+    {1, 1, 0},
+    {3, 1, 0},
+    {1, 0, 1},
+    {3, 0, 1},
+    {1, 0, 0},
+    {3, 0, 0},
+    {2, 0, 0},
+    {2, 1, 1},
+    {2, 0, 1},
+    {2, 1, 0},
+};
+
+static const uint8_t wq_fuzzy_rule_output[22] = {
+    0, 0, 0, 0, 0, 0, 1, 1,
+    1, 1, 1, 1, 1, 1, 1, 1,
+    2, 2, 2, 2, 2, 2,
+};
+
+static const wq_fuzzy_real wq_fuzzy_ramps[4][2] = {
+    {-0.10000000000000001, 5.0},
+    {0.10000000000000001, -4.0},
+    {-0.10000000000000001, 8.0},
+    {0.10000000000000001, -7.0},
+};
+
+static const wq_fuzzy_real wq_fuzzy_fixed_breakpoints[18] = {
+    0.0, 0.0, 0.0, 40.0, 40.0, 45.0, 50.0, 50.0,
+    60.0, 60.0, 70.0, 70.0, 75.0, 80.0, 80.0, 100.0,
+    100.0, 100.0,
+};
+
+#define WQ_FUZZY_DANGER_RULES 0x0000003fu
+#define WQ_FUZZY_PRIORITY_RULES 0x003c0000u
+#define WQ_FUZZY_HIGH_PRIORITY_RULES 0x00030000u
+#define WQ_FUZZY_MEDIUM_PRIORITY_RULES 0x0000fc00u
+
+typedef struct {
+    int status;                                 /* kode status ES (indeks wq_fuzzy_status_labels) */
+    int has_active_rules;
+    wq_fuzzy_real score;                        /* centroid 0-100; 0 jika tidak ada aturan aktif */
+    wq_fuzzy_real firing[WQ_FUZZY_N_OUTPUTS];   /* firing strength per himpunan output */
+    uint32_t rules_fired;                       /* bit r = aturan ke-r (wq_fuzzy_rule_ids) aktif */
+} wq_fuzzy_result;
+
+static inline wq_fuzzy_real wq_fuzzy_trapmf(wq_fuzzy_real x, const wq_fuzzy_real p[4])
+{
+    if (x < p[0] || x > p[3])
+        return 0;
+    if (p[0] <= x && x <= p[1])
+        return p[1] != p[0] ? (x - p[0]) / (p[1] - p[0]) : 1;
+    if (p[1] < x && x < p[2])
+        return 1;
+    if (p[2] <= x && x <= p[3])
+        return p[3] != p[2] ? (p[3] - x) / (p[3] - p[2]) : 1;
+    return 0;
+}
+
+/* Centroid eksak agregat max_k(min(s_k, mu_k(x))) (setara _centroid_scalar) */
+static inline wq_fuzzy_real wq_fuzzy_centroid(const wq_fuzzy_real strengths[WQ_FUZZY_N_OUTPUTS])
+{
+    wq_fuzzy_real x[WQ_FUZZY_N_POINTS], mu[WQ_FUZZY_N_POINTS];
+    wq_fuzzy_real area = 0, moment = 0;
+    int n = WQ_FUZZY_N_FIXED, i, j, k;
+
+    for (i = 0; i < WQ_FUZZY_N_FIXED; i++)
+        x[i] = wq_fuzzy_fixed_breakpoints[i];
+    /* Sisipkan titik potong tiap sisi miring pada tiap firing strength (insertion sort) */
+    for (i = 0; i < WQ_FUZZY_N_RAMPS; i++) {
+        for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++) {
+            wq_fuzzy_real cut = (strengths[k] - wq_fuzzy_ramps[i][1]) / wq_fuzzy_ramps[i][0];
+            cut = cut < 0 ? 0 : (cut > 100 ? 100 : cut);
+            for (j = n; j > 0 && x[j - 1] > cut; j--)
+                x[j] = x[j - 1];
+            x[j] = cut;
+            n++;
+        }
+    }
+    for (i = 0; i < n; i++) {
+        wq_fuzzy_real agregat = 0;
+        for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++) {
+            wq_fuzzy_real m = wq_fuzzy_trapmf(x[i], wq_fuzzy_output_sets[k]);
+            m = strengths[k] < m ? strengths[k] : m;
+            agregat = agregat > m ? agregat : m;
+        }
+        mu[i] = agregat;
+    }
+    for (i = 0; i + 1 < n; i++) {
+        wq_fuzzy_real h = x[i + 1] - x[i];
+        area += h * (mu[i] + mu[i + 1]) / 2;
+        moment += h * (x[i] * (2 * mu[i] + mu[i + 1]) + x[i + 1] * (mu[i] + 2 * mu[i + 1])) / 6;
+    }
+    return area == 0 ? 50 : moment / area;
+}
+
+/* Inferensi fuzzy (setara fuzzy_inference dengan defuzzifikasi 'centroid') */
+static inline void wq_fuzzy_infer(wq_fuzzy_real ph, wq_fuzzy_real tds, wq_fuzzy_real ntu, wq_fuzzy_result *out)
+{
+    wq_fuzzy_real mu_ph[WQ_FUZZY_N_PH_SETS], mu_tds[WQ_FUZZY_N_TDS_SETS], mu_ntu[WQ_FUZZY_N_NTU_SETS];
+    wq_fuzzy_real best;
+    int i, k;
+
+    for (i = 0; i < WQ_FUZZY_N_PH_SETS; i++)
+        mu_ph[i] = wq_fuzzy_trapmf(ph, wq_fuzzy_ph_sets[i]);
+    for (i = 0; i < WQ_FUZZY_N_TDS_SETS; i++)
+        mu_tds[i] = wq_fuzzy_trapmf(tds, wq_fuzzy_tds_sets[i]);
+    for (i = 0; i < WQ_FUZZY_N_NTU_SETS; i++)
+        mu_ntu[i] = wq_fuzzy_trapmf(ntu, wq_fuzzy_ntu_sets[i]);
+
+    for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++)
+        out->firing[k] = 0;
+    out->rules_fired = 0;
+
+    /* AND = min atas anteseden yang dipakai, agregasi per output = max */
+    for (i = 0; i < WQ_FUZZY_N_RULES; i++) {
+        const int8_t *a = wq_fuzzy_rule_antecedents[i];
+        wq_fuzzy_real strength = 1;
+        if (a[0] >= 0 && mu_ph[a[0]] < strength)
+            strength = mu_ph[a[0]];
+        if (a[1] >= 0 && mu_tds[a[1]] < strength)
+            strength = mu_tds[a[1]];
+        if (a[2] >= 0 && mu_ntu[a[2]] < strength)
+            strength = mu_ntu[a[2]];
+        if (strength > 0) {
+            k = wq_fuzzy_rule_output[i];
+            if (strength > out->firing[k])
+                out->firing[k] = strength;
+            out->rules_fired |= (uint32_t)1 << i;
+        }
+    }
+
+    out->has_active_rules = out->rules_fired != 0;
+    if (!out->has_active_rules) {
+        out->status = WQ_FUZZY_TIDAK_LAYAK;
+        out->score = 0;
+        return;
+    }
+    /* Status = himpunan output dengan firing strength terbesar (seri -> urutan pertama) */
+    out->status = 0;
+    best = out->firing[0];
+    for (k = 1; k < WQ_FUZZY_N_OUTPUTS; k++) {
+        if (out->firing[k] > best) {
+            best = out->firing[k];
+            out->status = k;
+        }
+    }
+    out->score = wq_fuzzy_centroid(out->firing);
+}
+
+/* Catatan keputusan hybrid (indeks DECISION_NOTES); status final selalu status ES */
+static inline int wq_fuzzy_decision(int es_status, int ml_status)
+{
+    if (ml_status == es_status)
+        return WQ_FUZZY_DECISION_AGREE;
+    if (ml_status == WQ_FUZZY_TIDAK_LAYAK && es_status == WQ_FUZZY_LAYAK)
+        return WQ_FUZZY_DECISION_ES_LAYAK;
+    if ((ml_status == WQ_FUZZY_TIDAK_LAYAK || ml_status == WQ_FUZZY_LAYAK) && es_status == WQ_FUZZY_CUKUP_LAYAK)
+        return WQ_FUZZY_DECISION_ES_CUKUP;
+    if (ml_status == WQ_FUZZY_LAYAK && es_status == WQ_FUZZY_TIDAK_LAYAK)
+        return WQ_FUZZY_DECISION_SAFETY;
+    return WQ_FUZZY_DECISION_ES_ONLY;
+}
+
+/*
+ * Confidence 0-100 (setara EvaluationResult.confidence / confidence_breakdown).
+ * ml_status: kode status ML, atau -1 jika ML tidak tersedia.
+ */
+static inline int wq_fuzzy_confidence(const wq_fuzzy_result *r, wq_fuzzy_real ph, wq_fuzzy_real tds,
+                                      wq_fuzzy_real ntu, int ml_status)
+{
+    int ml_confidence = 0, es_confidence = 0, quality = 0, specificity = 0, strength_bonus, k;
+    wq_fuzzy_real max_strength = 0;
+
+    /* Tanpa aturan aktif atau R1-R6 (alarm bahaya) aktif: 25 hanya jika ML menyatakan layak */
+    if (!r->has_active_rules || (r->rules_fired & WQ_FUZZY_DANGER_RULES))
+        return ml_status == WQ_FUZZY_LAYAK ? 25 : 0;
+
+    if (ml_status >= 0 && ml_status == r->status)
+        ml_confidence = 25;
+
+    for (k = 0; k < WQ_FUZZY_N_OUTPUTS; k++)
+        if (r->firing[k] > max_strength)
+            max_strength = r->firing[k];
+    strength_bonus = (int)(max_strength * 10);
+
+    if (r->status == WQ_FUZZY_LAYAK) {
+        if (6.95 <= ph && ph <= 7.05)
+            quality += 3;
+        else if (6.8 <= ph && ph <= 7.2)
+            quality += 2;
+        else if (6.5 <= ph && ph <= 8.5)
+            quality += 1;
+        if (tds <= 300)
+            quality += 3;
+        else if (tds <= 500)
+            quality += 2;
+        else if (tds <= 600)
+            quality += 1;
+        if (ntu <= 1)
+            quality += 4;
+        else if (ntu <= 3)
+            quality += 3;
+        else if (ntu <= 5)
+            quality += 2;
+        if (r->rules_fired & WQ_FUZZY_PRIORITY_RULES)
+            specificity = 15;
+        else if (r->rules_fired & WQ_FUZZY_HIGH_PRIORITY_RULES)
+            specificity = 10;
+        es_confidence = 40 + strength_bonus + quality + specificity;
+        es_confidence = es_confidence < 0 ? 0 : (es_confidence > 75 ? 75 : es_confidence);
+    } else if (r->status == WQ_FUZZY_CUKUP_LAYAK) {
+        if (6.95 <= ph && ph <= 7.05)
+            quality += 2;
+        else if (6.8 <= ph && ph <= 7.2)
+            quality += 1;
+        if (tds <= 300)
+            quality += 2;
+        else if (tds <= 500)
+            quality += 1;
+        if (ntu <= 1)
+            quality += 1;
+        if (r->rules_fired & WQ_FUZZY_MEDIUM_PRIORITY_RULES)
+            specificity = 10;
+        else if (r->rules_fired)
+            specificity = 5;
+        es_confidence = 25 + strength_bonus + quality + specificity;
+        es_confidence = es_confidence < 0 ? 0 : (es_confidence > 50 ? 50 : es_confidence);
+    }
+
+    k = ml_confidence + es_confidence;
+    return k < 0 ? 0 : (k > 100 ? 100 : k);
+}
+
+#endif /* WQ_FUZZY_H */